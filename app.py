@@ -1,8 +1,10 @@
 
 import streamlit as st
 from retrieval.retriever import ClaimEvidenceRetriever
+from retrieval.warmup import Warmup
 from pipeline.auto_ingestion_pipeline import AutoIngestionPipeline
 from arxiv_fetcher.arxiv_client import SmartArxivFetcher
+from monitoring.metrics import start_http_server
 
 st.set_page_config(
     page_title="Scientific Claim-Evidence Mapper",
@@ -30,18 +32,24 @@ st.markdown("*Powered by arXiv • Automated paper fetching and analysis*")
 
 @st.cache_resource
 def get_components():
+    start_http_server()
     retriever = ClaimEvidenceRetriever()
+    # Replays frequent recent queries in the background; /ready reports 503 until done.
+    warmup = Warmup(retriever).start()
     auto_pipeline = AutoIngestionPipeline()
-    return retriever, auto_pipeline
+    return retriever, auto_pipeline, warmup
 
 try:
-    retriever, auto_pipeline = get_components()
+    retriever, auto_pipeline, warmup = get_components()
 except Exception as e:
     st.error(f"Error initializing system: {e}")
     st.info("Make sure Qdrant is running: `docker run -p 6333:6333 qdrant/qdrant`")
     st.stop()
 
 with st.sidebar:
+    if not warmup.ready.is_set():
+        st.info("⏳ Warming up: the first searches may be slower")
+    
     st.header("🤖 Auto-Fetch Settings")
     
     auto_fetch = st.checkbox(
@@ -61,6 +69,12 @@ with st.sidebar:
     else:
         num_papers = 5
     
+    group_by_paper = st.checkbox(
+        "Group results by paper",
+        value=False,
+        help="Show the top papers, each with its best claims and evidence"
+    )
+    
     st.divider()
     
     st.header("📚 About")
@@ -104,9 +118,11 @@ with st.sidebar:
         if topic:
             with st.spinner(f"Fetching {bulk_num} papers on '{topic}'..."):
                 result = auto_pipeline.fetch_and_ingest_by_topic(topic, bulk_num)
-                if result:
+                if result['papers_count']:
                     st.success(f"✓ Imported {result['claims_count']} claims and "
                              f"{result['evidence_count']} evidence!")
+                else:
+                    st.warning("No papers found on arXiv for this topic")
 
 
 st.divider()
@@ -140,10 +156,40 @@ if (search_button or st.session_state.get('trigger_search', False)) and query:
                 st.warning(f"Could not fetch papers: {e}")
     
    
-    with st.spinner("🔄 Analyzing claims and evidence..."):
-        try:
-            results = retriever.retrieve(query)
+    try:
+        if group_by_paper:
+            with st.spinner("🔄 Analyzing claims and evidence..."):
+                grouped = retriever.retrieve_grouped(query)
+            st.session_state.grouped_results = grouped
+            st.session_state.pop('results', None)
+            st.metric("Papers Found", len(grouped['papers']))
+        else:
+            # Render claims as soon as they arrive, then evidence counts per chunk;
+            # the full layout below replaces this preview once the stream ends.
+            results = {'query': query, 'related_claims': [],
+                       'evidence': {'supporting': [], 'contradicting': [], 'neutral': []}}
+            claims_preview = st.empty()
+            evidence_preview = st.empty()
+            evidence_preview.caption("🔄 Analyzing claims and evidence...")
+            for event, data in retriever.retrieve_stream(query):
+                if event == 'claims':
+                    results['related_claims'] = data
+                    claims_preview.markdown("\n".join(
+                        f"- *{claim['text']}* ({claim['paper_title']}, {claim['year']})"
+                        for claim in data[:5]
+                    ) or "No related claims found.")
+                else:
+                    for category, items in data.items():
+                        results['evidence'][category].extend(items)
+                    evidence_preview.caption(
+                        f"🔄 Evidence so far: ✅ {len(results['evidence']['supporting'])} • "
+                        f"❌ {len(results['evidence']['contradicting'])} • "
+                        f"⚪ {len(results['evidence']['neutral'])}"
+                    )
+            claims_preview.empty()
+            evidence_preview.empty()
             st.session_state.results = results
+            st.session_state.pop('grouped_results', None)
             
        
             total_evidence = (len(results['evidence']['supporting']) + 
@@ -155,9 +201,9 @@ if (search_button or st.session_state.get('trigger_search', False)) and query:
                 st.metric("Related Claims Found", len(results['related_claims']))
             with col2:
                 st.metric("Evidence Statements", total_evidence)
-                
-        except Exception as e:
-            st.error(f"Error during search: {e}")
+            
+    except Exception as e:
+        st.error(f"Error during search: {e}")
 
 
 if 'results' in st.session_state:
@@ -187,6 +233,12 @@ if 'results' in st.session_state:
                 with col4:
                     if 'arxiv_id' in claim:
                         st.caption(f"🔗 arXiv:{claim.get('arxiv_id', 'N/A')}")
+                
+                if 'claim_id' in claim and st.button("🧭 Explore claim",
+                                                     key=f"explore_{claim['claim_id']}"):
+                    st.session_state.query = claim['text']
+                    st.session_state.results = retriever.retrieve_for_claim(claim['claim_id'])
+                    st.rerun()
     else:
         st.info("No related claims found. Try fetching more papers or adjusting your query.")
     
@@ -241,6 +293,31 @@ if 'results' in st.session_state:
     with tab3:
         display_evidence(results['evidence']['neutral'], "⚪")
 
+if 'grouped_results' in st.session_state:
+    grouped = st.session_state.grouped_results
+    
+    st.divider()
+    st.header("📚 Top Papers")
+    
+    if grouped['papers']:
+        for i, paper in enumerate(grouped['papers'], 1):
+            with st.expander(
+                f"**{i}. {paper['paper_title']}** ({paper['year']}) • "
+                f"Best match: {paper['score']:.1%}",
+                expanded=i <= 2
+            ):
+                st.caption(f"📍 {paper['venue']}")
+                for claim in paper['claims']:
+                    st.markdown(f"> *{claim['text']}*")
+                    st.caption(f"📄 {claim['section']} • 📊 {claim['similarity_score']:.1%}")
+                
+                for category, emoji in (('supporting', '✅'), ('contradicting', '❌'), ('neutral', '⚪')):
+                    for item in paper['evidence'][category]:
+                        st.markdown(f"{emoji} *{item['text']}*")
+                        st.caption(f"📄 {item['section']} • 📊 {item['similarity_score']:.1%}")
+    else:
+        st.info("No matching papers found. Try fetching more papers or adjusting your query.")
+
 # Footer
 st.divider()
 st.caption("💡 Powered by arXiv API • Papers are automatically fetched and analyzed in real-time")
@@ -1,13 +1,81 @@
 # arxiv_fetcher/arxiv_client.py
 import arxiv
+import queue
 import re
-from typing import List, Optional
+import threading
+from typing import Iterator, List, Optional
+from config import Config
 from models.paper import Paper
 from datetime import datetime
 
+_DONE = object()
+
+
 class ArxivClient:
-    def __init__(self):
-        self.client = arxiv.Client()
+    def __init__(self, page_size: int = None):
+        self.page_size = page_size or Config.ARXIV_PAGE_SIZE
+        self.client = arxiv.Client(
+            page_size=self.page_size,
+            delay_seconds=Config.ARXIV_DELAY_SECONDS,
+            num_retries=3
+        )
+    
+    def iter_pages(self, query: str, max_results: int = 10,
+                   sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+                   prefetch: int = None) -> Iterator[List[Paper]]:
+        """
+        Yield pages of converted papers while later pages are still downloading.
+        
+        A background thread walks the paginated arXiv results and hands
+        finished pages over a queue bounded to `prefetch` pages
+        (Config.ARXIV_PREFETCH_PAGES), so network waits overlap with whatever
+        the consumer does per page and at most prefetch + 1 pages are held in
+        memory. Stopping iteration early stops the fetch thread.
+        """
+        prefetch = max(1, prefetch or Config.ARXIV_PREFETCH_PAGES)
+        pages: queue.Queue = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+        search = arxiv.Search(query=query, max_results=max_results, sort_by=sort_by)
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            page = []
+            try:
+                for result in self.client.results(search):
+                    paper = self._convert_to_paper(result)
+                    if paper:
+                        page.append(paper)
+                    if len(page) >= self.page_size:
+                        if not put(page):
+                            return
+                        page = []
+                if page:
+                    put(page)
+            except Exception as exc:
+                put(exc)
+            finally:
+                put(_DONE)
+        
+        thread = threading.Thread(target=produce, name="arxiv-fetch", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
     
     def search_papers(self, query: str, max_results: int = 10, 
                      sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance) -> List[Paper]:
@@ -22,16 +90,9 @@ class ArxivClient:
         print(f"\n🔍 Searching arXiv for: '{query}'")
         print(f"   Fetching up to {max_results} papers...")
         
-        search = arxiv.Search(
-            query=query,
-            max_results=max_results,
-            sort_by=sort_by
-        )
-        
         papers = []
-        for result in self.client.results(search):
-            paper = self._convert_to_paper(result)
-            if paper:
+        for page in self.iter_pages(query, max_results, sort_by):
+            for paper in page:
                 papers.append(paper)
                 print(f"   ✓ {paper.title[:60]}... ({paper.year})")
         
@@ -45,6 +106,10 @@ class ArxivClient:
         query = f"cat:{category}"
         return self.search_papers(query, max_results, arxiv.SortCriterion.LastUpdatedDate)
     
+    def iter_category_pages(self, category: str, max_results: int = 10) -> Iterator[List[Paper]]:
+        """Paginated `search_by_category`."""
+        return self.iter_pages(f"cat:{category}", max_results, arxiv.SortCriterion.LastUpdatedDate)
+    
     def _convert_to_paper(self, result: arxiv.Result) -> Optional[Paper]:
         """Convert arXiv result to Paper object."""
         try:
@@ -65,7 +130,8 @@ class ArxivClient:
                 results=results,
                 discussion="", 
                 conclusion=conclusion,
-                arxiv_id=result.entry_id.split('/')[-1]
+                arxiv_id=result.entry_id.split('/')[-1],
+                category=result.primary_category
             )
             return paper
         except Exception as e:
@@ -136,6 +202,15 @@ class SmartArxivFetcher:
         
         return papers
     
+    def iter_relevant_pages(self, user_query: str, num_papers: int = 5) -> Iterator[List[Paper]]:
+        """Paginated `fetch_relevant_papers`: pages arrive while later ones download."""
+        print(f"\n🔍 Searching arXiv for: '{user_query}' (up to {num_papers} papers)")
+        return self.client.iter_pages(
+            self._prepare_search_query(user_query),
+            max_results=num_papers,
+            sort_by=arxiv.SortCriterion.Relevance
+        )
+    
     def _prepare_search_query(self, user_query: str) -> str:
         """
         Convert user query to arXiv search query.
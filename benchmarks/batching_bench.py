@@ -0,0 +1,63 @@
+"""
+Fixed-count vs token-budget batching for EmbeddingService.
+
+    python -m benchmarks.batching_bench [--topic "transformers"] [--max-tokens 8192]
+"""
+import argparse
+import time
+import numpy as np
+from config import Config
+from embeddings.embedding_service import EmbeddingService
+from embeddings.batching import padding_ratio, plan_batches, token_lengths
+from benchmarks.corpus import load_sentences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--texts', type=str, help='File with one sentence per line')
+    parser.add_argument('--topic', type=str, help='Build the corpus from arXiv papers on a topic')
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='Batch size of the fixed-count baseline')
+    parser.add_argument('--max-tokens', type=int, default=Config.EMBEDDING_MAX_BATCH_TOKENS)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_sentences(args.texts, args.topic)
+    service = EmbeddingService()
+    model = service.model
+
+    lengths = token_lengths(model.tokenizer, texts, model.max_seq_length)
+    print(f"Corpus: {len(texts)} sentences, tokens p50={np.percentile(lengths, 50):.0f} "
+          f"p90={np.percentile(lengths, 90):.0f} max={lengths.max()}")
+
+    fixed = [np.arange(i, min(i + args.batch_size, len(texts)))
+             for i in range(0, len(texts), args.batch_size)]
+    budget = plan_batches(lengths, args.max_tokens, Config.EMBEDDING_MAX_BATCH_SIZE)
+
+    def run(batches):
+        output = np.empty((len(texts), service.dimension), dtype=np.float32)
+        best = float("inf")
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            for indices in batches:
+                output[indices] = model.encode([texts[i] for i in indices],
+                                               batch_size=len(indices),
+                                               convert_to_numpy=True)
+            best = min(best, time.perf_counter() - start)
+        return output, best
+
+    run(fixed[:1])  # warm up
+    fixed_vecs, fixed_time = run(fixed)
+    budget_vecs, budget_time = run(budget)
+
+    print(f"\nfixed  ({len(fixed)} batches of {args.batch_size}): "
+          f"padding={padding_ratio(lengths, fixed):.2f}x  {len(texts) / fixed_time:.1f} texts/s")
+    print(f"budget ({len(budget)} batches, {args.max_tokens} tokens): "
+          f"padding={padding_ratio(lengths, budget):.2f}x  {len(texts) / budget_time:.1f} texts/s")
+    print(f"Speedup: {fixed_time / budget_time:.2f}x, "
+          f"max |diff| = {np.abs(fixed_vecs - budget_vecs).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
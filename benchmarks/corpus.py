@@ -0,0 +1,41 @@
+from pathlib import Path
+from typing import List, Optional
+from models.batch import SentenceBatch
+from extractors.claim_extractor import ClaimExtractor
+from extractors.evidence_extractor import EvidenceExtractor
+
+
+def load_sentences(path: Optional[str] = None, topic: Optional[str] = None,
+                   num_papers: int = 50, min_sentences: int = 512) -> List[str]:
+    """
+    Build a benchmark corpus of claim and evidence sentences.
+
+    Uses one sentence per line from `path` if given; otherwise runs the real
+    extractors over arXiv papers for `topic` (or the bundled sample papers),
+    so the length distribution matches what ingestion actually embeds.
+    """
+    if path:
+        lines = Path(path).read_text().splitlines()
+        return [line.strip() for line in lines if line.strip()]
+
+    if topic:
+        from arxiv_fetcher.arxiv_client import ArxivClient
+        papers = ArxivClient().search_papers(topic, max_results=num_papers)
+    else:
+        from main import create_sample_papers
+        papers = create_sample_papers()
+
+    claims = SentenceBatch('claim')
+    evidence = SentenceBatch('evidence')
+    claim_extractor = ClaimExtractor()
+    evidence_extractor = EvidenceExtractor()
+    for paper in papers:
+        claim_extractor.extract_claims_into(paper, claims)
+        evidence_extractor.extract_evidence_into(paper, evidence)
+
+    sentences = claims.texts + evidence.texts
+    if not sentences:
+        raise ValueError("No sentences extracted for the benchmark corpus")
+    while len(sentences) < min_sentences:
+        sentences = sentences + sentences
+    return sentences
@@ -0,0 +1,190 @@
+"""
+Replay a query log against ClaimEvidenceRetriever under concurrent load.
+
+    python -m benchmarks.load_test --log queries.jsonl --qps 20 --concurrency 1 4 16
+    python -m benchmarks.load_test --local --qps 0 --top-k 20 50 100
+
+Each log line is a JSON object with a "query" and optionally "year_from",
+"year_to", "categories" and "group_by_paper". Without --log, claim and
+evidence sentences from the sample corpus are used as queries.
+
+Requests are dispatched on an open-loop schedule at --qps into a pool of
+--concurrency worker threads sharing one retriever (and so one embedding
+model). Latency is measured from the scheduled start, so queueing behind
+busy workers counts against it. --qps 0 runs a closed loop instead: at
+most --concurrency requests are in flight, each sent as soon as one
+finishes, so latency is service time alone. Every (concurrency, top-k) combination is a separate run reporting
+throughput, p50/p95/p99 latency and per-stage time from the
+STAGE_SECONDS and SEARCH_SECONDS histograms. Requests go through
+ClaimEvidenceRetriever.replay, so they are not written to the query log.
+
+--local runs against qdrant-client's embedded in-memory mode (or a local
+directory with --location) and a temporary data directory, after ingesting
+the sample papers, so no Qdrant server is needed.
+"""
+import argparse
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+import numpy as np
+from config import Config
+from monitoring.metrics import REGISTRY, SEARCH_SECONDS, STAGE_SECONDS
+
+
+def load_queries(path: str = None, limit: int = None) -> List[Dict]:
+    if path:
+        with open(path) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    else:
+        from benchmarks.corpus import load_sentences
+        entries = [{"query": text} for text in dict.fromkeys(load_sentences(min_sentences=0))]
+    if not entries:
+        raise SystemExit("No queries to replay")
+    return entries[:limit] if limit else entries
+
+
+def use_local_store(location: str):
+    """Point Qdrant at embedded local mode and every data file at a temporary directory."""
+    Config.QDRANT_LOCATION = location
+    data_dir = Path(tempfile.mkdtemp(prefix="load_test_"))
+    for name in dir(Config):
+        value = getattr(Config, name)
+        if name.endswith("_PATH") and isinstance(value, Path) and Config.DATA_DIR in value.parents:
+            setattr(Config, name, data_dir / value.name)
+    print(f"Local store: {location}, data in {data_dir}")
+
+
+def _quantile(bounds: Tuple[float, ...], cumulative: List[int], count: int, q: float) -> float:
+    """Quantile estimated from cumulative histogram buckets by linear interpolation."""
+    rank = q * count
+    lower, seen = 0.0, 0
+    for bound, total in zip(bounds, cumulative):
+        if total >= rank:
+            in_bucket = total - seen
+            return lower + (bound - lower) * ((rank - seen) / in_bucket if in_bucket else 1.0)
+        lower, seen = bound, total
+    return bounds[-1]
+
+
+def stage_breakdown(before: Dict, after: Dict, bounds: Tuple[float, ...],
+                    requests: int) -> List[Tuple[str, int, float, float, float]]:
+    """(label, calls, ms per request, mean ms per call, ~p95 ms) from two histogram snapshots."""
+    rows = []
+    for key, state in after.items():
+        old = before.get(key, {'buckets': [0] * len(bounds), 'sum': 0.0, 'count': 0})
+        count = state['count'] - old['count']
+        if not count:
+            continue
+        total = state['sum'] - old['sum']
+        cumulative = [new - prev for new, prev in zip(state['buckets'], old['buckets'])]
+        rows.append((",".join(key), count, total / requests * 1000, total / count * 1000,
+                     _quantile(bounds, cumulative, count, 0.95) * 1000))
+    return sorted(rows, key=lambda row: -row[2])
+
+
+def run(retriever, queries: List[Dict], total: int, qps: float, concurrency: int) -> Dict:
+    """Replay `total` requests (cycling through the log) and collect per-request results."""
+    latencies = np.zeros(total)
+    service = np.zeros(total)
+    errors = []
+    lock = threading.Lock()
+    # Closed loop: a new request is only sent when a worker is free.
+    in_flight = threading.Semaphore(concurrency) if qps <= 0 else None
+
+    def request(i: int, scheduled: float):
+        entry = queries[i % len(queries)]
+        started = time.perf_counter()
+        try:
+            # replay() skips the query log, so load tests don't skew warmup.
+            retriever.replay(entry)
+        except Exception as exc:
+            with lock:
+                errors.append(repr(exc))
+        done = time.perf_counter()
+        latencies[i] = done - scheduled
+        service[i] = done - started
+        if in_flight is not None:
+            in_flight.release()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            if in_flight is not None:
+                in_flight.acquire()
+            scheduled = start + i / qps if qps > 0 else time.perf_counter()
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(request, i, scheduled)
+    elapsed = time.perf_counter() - start
+    return {'latencies': latencies * 1000, 'service': service * 1000,
+            'elapsed': elapsed, 'errors': errors}
+
+
+def report(result: Dict, total: int, stage_rows: List, search_rows: List):
+    latencies, service = result['latencies'], result['service']
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"  throughput {total / result['elapsed']:7.1f} req/s   "
+          f"latency p50 {p50:7.1f}  p95 {p95:7.1f}  p99 {p99:7.1f} ms   "
+          f"service p50 {np.percentile(service, 50):7.1f} ms   errors {len(result['errors'])}")
+    if result['errors']:
+        print(f"  first error: {result['errors'][0]}")
+    for title, rows in (("stage", stage_rows), ("search", search_rows)):
+        for label, calls, per_request, mean, p95_stage in rows:
+            print(f"    {title:6s} {label:32s} {calls:6d} calls  {per_request:8.2f} ms/req  "
+                  f"mean {mean:7.2f} ms  ~p95 {p95_stage:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--log', type=str, help='JSONL query log to replay')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per run')
+    parser.add_argument('--qps', type=float, default=10.0, help='Target rate; 0 for closed loop')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--top-k', type=int, nargs='+', default=[Config.TOP_K_EVIDENCE],
+                        help='TOP_K_EVIDENCE values to sweep')
+    parser.add_argument('--local', action='store_true',
+                        help='Use qdrant-client local mode and ingest the sample papers')
+    parser.add_argument('--location', type=str, default=':memory:',
+                        help='With --local: ":memory:" or a directory for local mode')
+    args = parser.parse_args()
+
+    if args.local:
+        use_local_store(args.location)
+    REGISTRY.enabled = True
+
+    # Imported after the store is configured: both read Config at construction time.
+    from retrieval.retriever import ClaimEvidenceRetriever
+    if args.local:
+        from main import create_sample_papers
+        from pipeline.ingestion_pipeline import IngestionPipeline
+        IngestionPipeline().process_papers(create_sample_papers())
+
+    queries = load_queries(args.log)
+    retriever = ClaimEvidenceRetriever()
+    retriever.replay(queries[0])  # load the model and warm connections
+
+    print(f"\nReplaying {args.requests} requests per run from {len(queries)} queries "
+          f"at {'max' if args.qps <= 0 else args.qps} qps")
+    for top_k in args.top_k:
+        Config.TOP_K_EVIDENCE = top_k
+        for concurrency in args.concurrency:
+            stages_before, searches_before = STAGE_SECONDS.snapshot(), SEARCH_SECONDS.snapshot()
+            result = run(retriever, queries, args.requests, args.qps, concurrency)
+            print(f"\nTOP_K_EVIDENCE={top_k} concurrency={concurrency}")
+            report(
+                result, args.requests,
+                stage_breakdown(stages_before, STAGE_SECONDS.snapshot(),
+                                STAGE_SECONDS.buckets, args.requests),
+                stage_breakdown(searches_before, SEARCH_SECONDS.snapshot(),
+                                SEARCH_SECONDS.buckets, args.requests)
+            )
+
+
+if __name__ == "__main__":
+    main()
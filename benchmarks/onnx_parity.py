@@ -0,0 +1,66 @@
+"""
+Parity and throughput check: quantized ONNX backend vs PyTorch.
+
+    python -m benchmarks.onnx_parity [--topic "transformers"] [--threads 4]
+"""
+import argparse
+import time
+import numpy as np
+from config import Config
+from embeddings.onnx_backend import OnnxEmbeddingModel
+from benchmarks.corpus import load_sentences
+
+
+def _throughput(model, texts, batch_size):
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm up
+    start = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return np.asarray(embeddings, dtype=np.float32), len(texts) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--texts', type=str, help='File with one sentence per line')
+    parser.add_argument('--topic', type=str, help='Build the corpus from arXiv papers on a topic')
+    parser.add_argument('--threads', type=int, default=Config.EMBEDDING_THREADS)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--fp32', action='store_true', help='Benchmark the unquantized ONNX graph')
+    parser.add_argument('--min-cosine', type=float, default=0.98,
+                        help='Fail if any sentence falls below this cosine similarity')
+    args = parser.parse_args()
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    texts = load_sentences(args.texts, args.topic)
+    print(f"Corpus: {len(texts)} sentences")
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch_model = SentenceTransformer(Config.EMBEDDING_MODEL, device="cpu")
+    onnx_model = OnnxEmbeddingModel(Config.EMBEDDING_MODEL,
+                                    quantized=not args.fp32,
+                                    num_threads=args.threads)
+
+    torch_vecs, torch_rate = _throughput(torch_model, texts, args.batch_size)
+    onnx_vecs, onnx_rate = _throughput(onnx_model, texts, args.batch_size)
+
+    torch_vecs /= np.linalg.norm(torch_vecs, axis=1, keepdims=True)
+    onnx_vecs /= np.linalg.norm(onnx_vecs, axis=1, keepdims=True)
+    cosine = (torch_vecs * onnx_vecs).sum(axis=1)
+
+    label = "onnx-fp32" if args.fp32 else "onnx-int8"
+    print(f"\nCosine parity ({label} vs torch): "
+          f"mean={cosine.mean():.4f} p01={np.percentile(cosine, 1):.4f} min={cosine.min():.4f}")
+    print(f"Throughput: torch={torch_rate:.1f}/s {label}={onnx_rate:.1f}/s "
+          f"({onnx_rate / torch_rate:.2f}x)")
+
+    if cosine.min() < args.min_cosine:
+        raise SystemExit(f"✗ Parity check failed: min cosine {cosine.min():.4f} < {args.min_cosine}")
+    print("✓ Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
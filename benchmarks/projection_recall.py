@@ -0,0 +1,56 @@
+"""
+Recall@k of two-stage evidence search (projected first stage + exact rescoring).
+
+    python -m benchmarks.projection_recall [--sample 20000] [--queries 500] [--k 20]
+
+Loads stored evidence vectors and uses stored claim vectors as queries
+(falling back to held-out evidence vectors), then sweeps projection method,
+dimension and candidate oversampling in memory. The exact top-k by
+full-precision cosine is the reference. The reported memory is the
+first-stage vector storage per million points, before index overhead.
+"""
+import argparse
+import time
+from storage.projection import METHODS, Projection, recall_at_k, sample_vectors
+from storage.qdrant_manager import QdrantManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sample', type=int, default=20000, help='Evidence vectors to load')
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--dims', type=int, nargs='+', default=[32, 64, 96, 128])
+    parser.add_argument('--oversample', type=int, nargs='+', default=[2, 4, 8, 16])
+    args = parser.parse_args()
+
+    qdrant = QdrantManager()
+    _, corpus = sample_vectors(qdrant, 'evidence', args.sample)
+    _, queries = sample_vectors(qdrant, 'claim', args.queries)
+    if not len(queries):
+        corpus, queries = corpus[args.queries:], corpus[:args.queries]
+    if not len(corpus):
+        raise SystemExit("No stored evidence vectors; ingest some papers first")
+    full_dim = corpus.shape[1]
+    print(f"{len(corpus)} evidence x {full_dim}d, {len(queries)} queries, recall@{args.k}\n")
+
+    header = "".join(f"{f'x{m}':>8s}" for m in args.oversample)
+    print(f"{'method':8s}{'dim':>5s}{'MB/1M':>8s}{'fit s':>7s}{header}")
+    print(f"{'exact':8s}{full_dim:5d}{full_dim * 4:8d}{'':>7s}")
+    for method in METHODS:
+        for dim in args.dims:
+            if dim >= full_dim:
+                continue
+            start = time.perf_counter()
+            projection = Projection().fit(corpus, dim, method)
+            fit_time = time.perf_counter() - start
+            recalls = "".join(
+                f"{recall_at_k(projection, corpus, queries, args.k, args.k * m):8.3f}"
+                for m in args.oversample
+            )
+            print(f"{method:8s}{dim:5d}{dim * 4:8d}{fit_time:7.2f}{recalls}")
+
+
+if __name__ == "__main__":
+    main()
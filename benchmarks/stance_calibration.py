@@ -0,0 +1,215 @@
+"""
+Fit, calibrate and latency-check the evidence stance classifier.
+
+    python -m benchmarks.stance_calibration --labels stance_labels.jsonl
+    python -m benchmarks.stance_calibration --check
+
+Each label line is a JSON object with "query", "evidence" and "stance"
+(supporting, contradicting or neutral). Without --labels, claim/evidence
+pairs from the sample papers are labelled by the keyword rules; that only
+bootstraps a classifier that imitates them, so use real labels when you
+have them.
+
+Texts are embedded with EMBEDDING_MODEL and split into a training and a
+held-out set. A multinomial logistic regression (scikit-learn) is fitted on
+[evidence, evidence - query]; its two coefficient blocks are the stance
+prototypes and difference directions. On the held-out set the softmax
+temperature is chosen to minimise log loss, and the confidence threshold is
+the lowest one at which the classifier's own decisions reach
+--target-accuracy; below it retrieval falls back to the keyword rules. The
+report shows coverage and accuracy per threshold against keywords alone.
+
+Finally the per-query classification of TOP_K_EVIDENCE vectors is timed and
+its p95 compared with STANCE_BUDGET_MS; the exit status is 1 if it is over.
+--check runs only the latency check on the saved classifier.
+"""
+import argparse
+import json
+import time
+from typing import List, Tuple
+import numpy as np
+from config import Config
+from retrieval.categorizer import EvidenceCategorizer
+from retrieval.knn_graph import CATEGORIES
+from retrieval.stance_classifier import StanceClassifier
+
+THRESHOLDS = (0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+TEMPERATURES = np.geomspace(0.25, 4.0, 25)
+
+
+def load_pairs(path: str = None) -> List[Tuple[str, str, str]]:
+    """(query, evidence, stance) triples from a label file, or keyword-labelled sample pairs."""
+    if path:
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        pairs = [(row["query"], row["evidence"], row["stance"]) for row in rows]
+        unknown = {stance for _, _, stance in pairs} - set(CATEGORIES)
+        if unknown:
+            raise SystemExit(f"Unknown stance labels: {sorted(unknown)}")
+        return pairs
+
+    print("⚠️  No --labels: bootstrapping from keyword rules on the sample papers")
+    from main import create_sample_papers
+    from extractors.claim_extractor import ClaimExtractor
+    from extractors.evidence_extractor import EvidenceExtractor
+    categorizer = EvidenceCategorizer()
+    claim_extractor, evidence_extractor = ClaimExtractor(), EvidenceExtractor()
+    pairs = []
+    for paper in create_sample_papers():
+        claims = [claim.text for claim in claim_extractor.extract_claims(paper)]
+        evidence = [item.text for item in evidence_extractor.extract_evidence(paper)]
+        pairs.extend((claim, text, categorizer.categorize(claim, text))
+                     for claim in claims for text in evidence)
+    return pairs
+
+
+def fit(queries: np.ndarray, evidence: np.ndarray, labels: np.ndarray,
+        c: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(prototypes, directions, bias) in CATEGORIES order."""
+    from sklearn.linear_model import LogisticRegression
+    if len(np.unique(labels)) < 2:
+        raise SystemExit("Training pairs cover a single stance; nothing to learn")
+    features = np.hstack([evidence, evidence - queries])
+    model = LogisticRegression(C=c, max_iter=2000).fit(features, labels)
+    dim = evidence.shape[1]
+    coef = np.zeros((len(CATEGORIES), 2 * dim), dtype=np.float32)
+    bias = np.full(len(CATEGORIES), -1e4, dtype=np.float32)  # unseen classes never win
+    if len(model.classes_) == 2:
+        # Binary fits have one row: the logit of classes_[1] against classes_[0] at 0.
+        negative, positive = model.classes_
+        coef[positive], bias[positive] = model.coef_[0], model.intercept_[0]
+        bias[negative] = 0.0
+        missing = (set(range(len(CATEGORIES))) - set(model.classes_.tolist())).pop()
+        print(f"⚠️  No {CATEGORIES[missing]} pairs in the training split; "
+              f"the classifier never predicts it")
+    else:
+        coef[model.classes_] = model.coef_
+        bias[model.classes_] = model.intercept_
+    return coef[:, :dim], coef[:, dim:], bias
+
+
+def _probabilities(logits: np.ndarray, temperature: float) -> np.ndarray:
+    logits = logits / temperature
+    logits = logits - logits.max(axis=1, keepdims=True)
+    probs = np.exp(logits)
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def calibrate(classifier: StanceClassifier, queries: np.ndarray, evidence: np.ndarray,
+              labels: np.ndarray, keyword_labels: np.ndarray, target: float):
+    """Set temperature and threshold from held-out pairs and print the threshold table."""
+    logits = classifier.pair_logits(queries, evidence)
+    rows = np.arange(len(labels))
+    losses = [-np.log(np.maximum(_probabilities(logits, t)[rows, labels], 1e-12)).mean()
+              for t in TEMPERATURES]
+    classifier.temperature = float(TEMPERATURES[int(np.argmin(losses))])
+    probs = _probabilities(logits, classifier.temperature)
+    predicted, confidence = probs.argmax(axis=1), probs.max(axis=1)
+
+    print(f"\nTemperature {classifier.temperature:.2f} (held-out log loss {min(losses):.3f})")
+    print(f"Keyword rules alone: accuracy {(keyword_labels == labels).mean():.3f}")
+    print(f"{'threshold':>10s}{'coverage':>10s}{'model acc':>11s}{'combined':>10s}")
+    classifier.threshold = None
+    for threshold in THRESHOLDS:
+        confident = confidence >= threshold
+        model_acc = (predicted[confident] == labels[confident]).mean() if confident.any() else 0.0
+        combined = np.where(confident, predicted, keyword_labels)
+        print(f"{threshold:10.2f}{confident.mean():10.3f}{model_acc:11.3f}"
+              f"{(combined == labels).mean():10.3f}")
+        if classifier.threshold is None and confident.any() and model_acc >= target:
+            classifier.threshold = threshold
+    if classifier.threshold is None:
+        classifier.threshold = THRESHOLDS[-1]
+        print(f"⚠️  No threshold reaches {target:.2f} accuracy; using {classifier.threshold}")
+    print(f"✓ Confidence threshold {classifier.threshold}")
+
+
+def check_latency(classifier: StanceClassifier, dim: int, repeats: int) -> bool:
+    """Time one query's classification against the budget; keyword rules for comparison."""
+    rng = np.random.default_rng(0)
+    n = Config.TOP_K_EVIDENCE
+    query = rng.standard_normal(dim).astype(np.float32)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32).tolist()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        # As in the retriever: from the vectors Qdrant returned to stance labels.
+        classifier.classify(query, np.asarray(vectors, dtype=np.float32))
+        timings.append(time.perf_counter() - start)
+    p50, p95 = np.percentile(timings, [50, 95]) * 1000
+
+    categorizer = EvidenceCategorizer()
+    text = "Our model achieved 28.4 BLEU, outperforming the previous best by 2 points."
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for _ in range(n):
+            categorizer.categorize("transformers outperform recurrent models", text)
+    keywords = (time.perf_counter() - start) / repeats * 1000
+
+    print(f"\nClassifying {n} vectors x {dim}d: p50 {p50:.3f} ms, p95 {p95:.3f} ms "
+          f"(keyword rules {keywords:.3f} ms)")
+    if p95 > Config.STANCE_BUDGET_MS:
+        print(f"⚠️  p95 exceeds STANCE_BUDGET_MS={Config.STANCE_BUDGET_MS} ms")
+        return False
+    print(f"✓ Within STANCE_BUDGET_MS={Config.STANCE_BUDGET_MS} ms")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--labels', type=str, help='JSONL of query/evidence/stance')
+    parser.add_argument('--holdout', type=float, default=0.25, help='Held-out fraction')
+    parser.add_argument('--c', type=float, default=1.0, help='Inverse L2 regularisation')
+    parser.add_argument('--target-accuracy', type=float, default=0.85,
+                        help='Model accuracy required above the confidence threshold')
+    parser.add_argument('--repeats', type=int, default=500, help='Latency check iterations')
+    parser.add_argument('--check', action='store_true',
+                        help='Only run the latency check on the saved classifier')
+    args = parser.parse_args()
+
+    if args.check:
+        classifier = StanceClassifier.load()
+        if not classifier.fitted:
+            raise SystemExit("No saved stance classifier; run without --check first")
+        raise SystemExit(0 if check_latency(classifier, classifier.prototypes.shape[1],
+                                            args.repeats) else 1)
+
+    pairs = load_pairs(args.labels)
+    labels = np.array([CATEGORIES.index(stance) for _, _, stance in pairs])
+    print(f"{len(pairs)} pairs: " + ", ".join(
+        f"{np.sum(labels == i)} {category}" for i, category in enumerate(CATEGORIES)))
+
+    from embeddings.embedding_service import EmbeddingService
+    embedder = EmbeddingService()
+    texts = list(dict.fromkeys(text for query, evidence, _ in pairs for text in (query, evidence)))
+    embeddings = embedder.encode(texts)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    vectors = dict(zip(texts, embeddings))
+    queries = np.asarray([vectors[query] for query, _, _ in pairs])
+    evidence = np.asarray([vectors[text] for _, text, _ in pairs])
+
+    order = np.random.default_rng(0).permutation(len(pairs))
+    split = max(1, int(len(pairs) * args.holdout))
+    test, train = order[:split], order[split:]
+    print(f"Fitting on {len(train)} pairs, calibrating on {len(test)}...")
+    classifier = StanceClassifier().set_weights(
+        embedder.model_name, *fit(queries[train], evidence[train], labels[train], args.c)
+    )
+
+    categorizer = EvidenceCategorizer()
+    keyword_labels = np.array([CATEGORIES.index(categorizer.categorize(pairs[i][0], pairs[i][1]))
+                               for i in test])
+    calibrate(classifier, queries[test], evidence[test], labels[test],
+              keyword_labels, args.target_accuracy)
+    classifier.save()
+    print(f"✓ Saved {classifier.path}")
+    if not Config.STANCE_CLASSIFIER:
+        print("⚠️  Set STANCE_CLASSIFIER=true to use it at query time")
+
+    if not check_latency(classifier, evidence.shape[1], args.repeats):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+REST vs gRPC upsert and search throughput against Qdrant.
+
+    docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+    python -m benchmarks.transport_bench [--points 20000] [--searches 2000] [--threads 8]
+
+Both transports use the shared-client settings from Config (pool size,
+keep-alive, timeout). `--local` adds qdrant-client's embedded in-memory
+mode as a no-network floor; `--local-only` runs just that, without a server.
+
+    python -m benchmarks.transport_bench --check
+
+`--check` needs no server: it builds the REST and gRPC clients with the
+installed qdrant-client, compares its version with the requirements.txt pin
+and exits with status 1 if either client cannot be constructed.
+"""
+import argparse
+import importlib.metadata
+import re
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from qdrant_client.models import Batch, Distance, VectorParams
+from config import Config
+from storage.client import create_qdrant_client
+
+COLLECTION = "transport_bench"
+
+
+def run(name, client, vectors, queries, batch_size, threads):
+    client.recreate_collection(
+        collection_name=COLLECTION,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE)
+    )
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch_size):
+        chunk = vectors[offset:offset + batch_size]
+        client.upsert(
+            collection_name=COLLECTION,
+            points=Batch(
+                ids=list(range(offset, offset + len(chunk))),
+                vectors=chunk.tolist(),
+                payloads=[{"paper_id": f"paper_{i % 500}", "year": 2000 + i % 25,
+                           "section": "results"} for i in range(offset, offset + len(chunk))]
+            ),
+            wait=True
+        )
+    upsert_time = time.perf_counter() - start
+
+    def search(query):
+        t0 = time.perf_counter()
+        client.search(collection_name=COLLECTION, query_vector=query.tolist(),
+                      limit=Config.TOP_K_EVIDENCE, with_payload=True)
+        return time.perf_counter() - t0
+
+    search(queries[0])  # warm up
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = np.asarray(list(pool.map(search, queries))) * 1000
+    search_time = time.perf_counter() - start
+    client.delete_collection(COLLECTION)
+
+    print(f"{name:6s} upsert {len(vectors) / upsert_time:9.0f} points/s   "
+          f"search {len(queries) / search_time:7.0f} qps   "
+          f"p50 {np.percentile(latencies, 50):6.2f} ms   p99 {np.percentile(latencies, 99):6.2f} ms")
+
+
+def check_clients() -> bool:
+    """Construct both server clients from Config, without connecting."""
+    installed = importlib.metadata.version("qdrant-client")
+    requirements = Path(__file__).resolve().parent.parent / "requirements.txt"
+    pin = re.search(r"^qdrant-client==(\S+)", requirements.read_text(), re.MULTILINE)
+    pinned = pin.group(1) if pin else None
+    print(f"qdrant-client {installed} (requirements.txt pins {pinned or 'nothing'})")
+    if pinned and installed != pinned:
+        print(f"⚠️  Installed version differs from the pin; install qdrant-client=={pinned}")
+    ok = True
+    for name, prefer_grpc in (("rest", False), ("grpc", True)):
+        try:
+            create_qdrant_client(prefer_grpc=prefer_grpc, location="")
+            print(f"✓ {name} client built")
+        except Exception as exc:
+            print(f"⚠️  {name} client failed: {exc!r}")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=256, help='Points per upsert request')
+    parser.add_argument('--searches', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent searches')
+    parser.add_argument('--local', action='store_true', help='Also run embedded in-memory mode')
+    parser.add_argument('--local-only', action='store_true', help='Run only embedded in-memory mode')
+    parser.add_argument('--check', action='store_true',
+                        help='Only check that the server clients can be built')
+    args = parser.parse_args()
+
+    if args.check:
+        raise SystemExit(0 if check_clients() else 1)
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.points, Config.EMBEDDING_DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.integers(0, args.points, args.searches)]
+
+    print(f"{args.points} points x {Config.EMBEDDING_DIM}d, batches of {args.batch}; "
+          f"{args.searches} searches on {args.threads} threads\n")
+    if not args.local_only:
+        run("rest", create_qdrant_client(prefer_grpc=False, location=""), vectors, queries,
+            args.batch, args.threads)
+        run("grpc", create_qdrant_client(prefer_grpc=True, location=""), vectors, queries,
+            args.batch, args.threads)
+    if args.local or args.local_only:
+        run("local", create_qdrant_client(location=":memory:"), vectors, queries,
+            args.batch, args.threads)
+
+
+if __name__ == "__main__":
+    main()
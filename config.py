@@ -9,24 +9,91 @@ class Config:
     QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
     QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
     QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", None)
+    QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+    QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+    QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 30))  # seconds
+    QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", 16))  # REST keep-alive connections
+    QDRANT_KEEPALIVE_MS = int(os.getenv("QDRANT_KEEPALIVE_MS", 30000))
+    QDRANT_LOCATION = os.getenv("QDRANT_LOCATION", None)  # ":memory:" or a path = embedded local mode
     
     CLAIMS_COLLECTION = "scientific_claims"
     EVIDENCE_COLLECTION = "scientific_evidence"
+    EVIDENCE_SHARDING = os.getenv("EVIDENCE_SHARDING", "none")  # none | year | category
+    EVIDENCE_SHARD_YEARS = int(os.getenv("EVIDENCE_SHARD_YEARS", 5))  # years per year shard
+    SHARD_SEARCH_THREADS = int(os.getenv("SHARD_SEARCH_THREADS", 8))
 
-    EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
-    EMBEDDING_DIM = 384
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 384))
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")  # torch | onnx
+    MODEL_CHECK_INTERVAL = float(os.getenv("MODEL_CHECK_INTERVAL", 30))  # seconds between alias checks
+    EMBEDDING_SERVER_URL = os.getenv("EMBEDDING_SERVER_URL", None)  # e.g. http://127.0.0.1:8765
+    EMBEDDING_SERVER_HOST = os.getenv("EMBEDDING_SERVER_HOST", "127.0.0.1")
+    EMBEDDING_SERVER_PORT = int(os.getenv("EMBEDDING_SERVER_PORT", 8765))
+    EMBEDDING_COALESCE_MS = float(os.getenv("EMBEDDING_COALESCE_MS", 5))
+    EMBEDDING_COALESCE_MAX_TEXTS = int(os.getenv("EMBEDDING_COALESCE_MAX_TEXTS", 512))
+    EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0))  # 0 = runtime default
+    EMBEDDING_MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", 8192))  # 0 = fixed-size batches
+    EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", 256))
+    EMBEDDING_POOL_WORKERS = int(os.getenv("EMBEDDING_POOL_WORKERS", 0))  # 0 = disabled
+    EMBEDDING_POOL_THREADS = int(os.getenv("EMBEDDING_POOL_THREADS", 0))  # 0 = cores / workers
+    EMBEDDING_POOL_MIN_TEXTS = int(os.getenv("EMBEDDING_POOL_MIN_TEXTS", 512))
+    ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "true").lower() == "true"
   
     MIN_CLAIM_LENGTH = 20
     MAX_CLAIM_LENGTH = 300
     MIN_EVIDENCE_LENGTH = 15
     
+    DEDUP_MODE = os.getenv("DEDUP_MODE", "off")  # off | skip | merge
+    DEDUP_COSINE_THRESHOLD = float(os.getenv("DEDUP_COSINE_THRESHOLD", 0.95))
+    DEDUP_JACCARD_THRESHOLD = float(os.getenv("DEDUP_JACCARD_THRESHOLD", 0.8))
+    
     TOP_K_CLAIMS = 10
     TOP_K_EVIDENCE = 20
     SIMILARITY_THRESHOLD = 0.5
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    RRF_K = 60
+    TOP_K_PAPERS = 5
+    CLAIMS_PER_PAPER = 3
+    EVIDENCE_PER_PAPER = 3
+    STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 5))  # evidence items per streamed chunk
+    ARXIV_PAGE_SIZE = int(os.getenv("ARXIV_PAGE_SIZE", 100))  # papers per API page / ingest batch
+    ARXIV_PREFETCH_PAGES = int(os.getenv("ARXIV_PREFETCH_PAGES", 2))  # pages fetched ahead
+    ARXIV_DELAY_SECONDS = float(os.getenv("ARXIV_DELAY_SECONDS", 3.0))  # arXiv API politeness
+    QUERY_LOG = os.getenv("QUERY_LOG", "false").lower() == "true"
+    QUERY_LOG_MAX_BYTES = int(os.getenv("QUERY_LOG_MAX_BYTES", 5_000_000))
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))  # cached query embeddings
+    WARMUP_QUERIES = int(os.getenv("WARMUP_QUERIES", 50))  # replayed at startup; 0 = model only
+    WARMUP_WINDOW_DAYS = float(os.getenv("WARMUP_WINDOW_DAYS", 7))
+    TWO_STAGE_SEARCH = os.getenv("TWO_STAGE_SEARCH", "false").lower() == "true"
+    PROJECTION_DIM = int(os.getenv("PROJECTION_DIM", 96))
+    PROJECTION_METHOD = os.getenv("PROJECTION_METHOD", "pca")  # pca | random
+    PROJECTION_SAMPLE = int(os.getenv("PROJECTION_SAMPLE", 50000))  # vectors used to fit
+    RESCORE_OVERSAMPLE = int(os.getenv("RESCORE_OVERSAMPLE", 8))  # candidates = top_k * this
+    STANCE_CLASSIFIER = os.getenv("STANCE_CLASSIFIER", "false").lower() == "true"
+    STANCE_MIN_CONFIDENCE = float(os.getenv("STANCE_MIN_CONFIDENCE", 0))  # 0 = calibrated threshold
+    STANCE_BUDGET_MS = float(os.getenv("STANCE_BUDGET_MS", 2.0))  # p95 per query, TOP_K_EVIDENCE hits
+    NUMERIC_INDEX = os.getenv("NUMERIC_INDEX", "true").lower() == "true"
+    NUMERIC_TOLERANCE = float(os.getenv("NUMERIC_TOLERANCE", 0.01))  # relative, for claim checks
+    KNN_GRAPH = os.getenv("KNN_GRAPH", "true").lower() == "true"
+    KNN_GRAPH_K = int(os.getenv("KNN_GRAPH_K", 20))
+    KNN_BLOCK_SIZE = int(os.getenv("KNN_BLOCK_SIZE", 4096))  # rows per matmul block
     
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 9464))
+    METRICS_FILE = os.getenv("METRICS_FILE", None)
     
     DATA_DIR = Path("data")
     PAPERS_DIR = DATA_DIR / "papers"
+    ONNX_MODEL_DIR = DATA_DIR / "onnx"
+    BM25_INDEX_PATH = DATA_DIR / "bm25.sqlite"
+    SIDECAR_PATH = DATA_DIR / "sidecar.sqlite"
+    NUMERIC_INDEX_PATH = DATA_DIR / "numeric.npz"
+    QUERY_LOG_PATH = DATA_DIR / "query_log.jsonl"
+    PROJECTION_PATH = DATA_DIR / "projection.npz"
+    STANCE_MODEL_PATH = DATA_DIR / "stance_classifier.npz"
+    KNN_GRAPH_PATH = DATA_DIR / "knn_graph.npz"
     
     @classmethod
     def ensure_directories(cls):
@@ -0,0 +1,37 @@
+from typing import List
+import numpy as np
+
+
+def token_lengths(tokenizer, texts: List[str], max_length: int) -> np.ndarray:
+    """Token count per text (including special tokens), capped at `max_length`."""
+    encoded = tokenizer(texts, add_special_tokens=True, truncation=True,
+                        max_length=max_length)
+    return np.fromiter((len(ids) for ids in encoded["input_ids"]),
+                       dtype=np.int64, count=len(texts))
+
+
+def plan_batches(lengths: np.ndarray, max_tokens: int,
+                 max_batch_size: int) -> List[np.ndarray]:
+    """
+    Group text indices into batches under a padded-token budget.
+
+    Texts are sorted longest first, so every batch holds texts of similar
+    length and its padded size is `len(batch) * len(first text)`. A batch
+    is closed when adding one more text would exceed `max_tokens` or
+    `max_batch_size`. Returns index arrays into the original order.
+    """
+    order = np.argsort(-lengths, kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch_size, max_tokens // longest))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+def padding_ratio(lengths: np.ndarray, batches: List[np.ndarray]) -> float:
+    """Padded tokens computed per real token for a batch plan (1.0 = no padding)."""
+    padded = sum(len(idx) * int(lengths[idx].max()) for idx in batches if len(idx))
+    return padded / max(int(lengths.sum()), 1)
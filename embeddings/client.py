@@ -0,0 +1,43 @@
+from typing import List, Union
+import numpy as np
+import requests
+from config import Config
+
+
+class RemoteEmbeddingModel:
+    """
+    Client for the shared embedding server (`python main.py --serve-embeddings`).
+
+    Implements the parts of the SentenceTransformer interface that
+    EmbeddingService uses, so it can be swapped in as `self.model`.
+    """
+
+    def __init__(self, url: str = None, timeout: float = 60.0):
+        self.url = (url or Config.EMBEDDING_SERVER_URL).rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        response = self.session.get(f"{self.url}/health", timeout=timeout)
+        response.raise_for_status()
+        info = response.json()
+        if info["model"] != Config.EMBEDDING_MODEL:
+            raise ValueError(
+                f"Embedding server runs {info['model']}, "
+                f"but Config.EMBEDDING_MODEL is {Config.EMBEDDING_MODEL}"
+            )
+        self.dimension = info["dimension"]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, convert_to_numpy: bool = True,
+               **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        response = self.session.post(f"{self.url}/encode",
+                                     json={"texts": texts},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        rows, dim = (int(x) for x in response.headers["X-Embedding-Shape"].split(","))
+        return np.frombuffer(response.content, dtype="<f4").reshape(rows, dim).astype(np.float32)
@@ -1,34 +1,107 @@
+import os
+import torch
 from sentence_transformers import SentenceTransformer
 from typing import List, Union
 import numpy as np
+from tqdm import tqdm
 from config import Config
 from models.paper import Claim, Evidence
+from models.batch import SentenceBatch
+from embeddings.onnx_backend import OnnxEmbeddingModel
+from embeddings.batching import plan_batches, token_lengths
+from embeddings.worker_pool import EmbeddingWorkerPool
+from embeddings.client import RemoteEmbeddingModel
+from monitoring.metrics import TEXTS_EMBEDDED
 
 class EmbeddingService:
-    def __init__(self, model_name: str = None):
-        """Initialize the embedding model."""
+    def __init__(self, model_name: str = None, backend: str = None,
+                 pool_workers: int = 0):
+        """Initialize the embedding model.
+        
+        If Config.EMBEDDING_SERVER_URL is set and no backend is given, the
+        service talks to the shared embedding server instead of loading a
+        model. With `pool_workers > 0`, calls with at least
+        Config.EMBEDDING_POOL_MIN_TEXTS texts are sharded across a
+        long-lived pool of worker processes (started on first use).
+        """
         if model_name is None:
             model_name = Config.EMBEDDING_MODEL
-        print(f"Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        if backend is None:
+            backend = "remote" if Config.EMBEDDING_SERVER_URL else Config.EMBEDDING_BACKEND
+        print(f"Loading embedding model: {model_name} ({backend})")
+        self.model_name = model_name
+        self.backend = backend
+        if backend == "remote":
+            self.model = RemoteEmbeddingModel(Config.EMBEDDING_SERVER_URL)
+        elif backend == "onnx":
+            self.model = OnnxEmbeddingModel(
+                model_name,
+                quantized=Config.ONNX_QUANTIZED,
+                num_threads=Config.EMBEDDING_THREADS
+            )
+        elif backend == "torch":
+            if Config.EMBEDDING_THREADS:
+                torch.set_num_threads(Config.EMBEDDING_THREADS)
+            self.model = SentenceTransformer(model_name)
+        else:
+            raise ValueError(f"Unknown embedding backend: {backend}")
         self.dimension = self.model.get_sentence_embedding_dimension()
         print(f"Model loaded. Embedding dimension: {self.dimension}")
+        
+        self.pool = None
+        if pool_workers > 0 and backend != "remote":
+            threads = Config.EMBEDDING_POOL_THREADS or max(1, (os.cpu_count() or 1) // pool_workers)
+            self.pool = EmbeddingWorkerPool(pool_workers, threads, model_name,
+                                            backend, self.dimension)
     
     def encode(self, texts: Union[str, List[str]], 
-               batch_size: int = 32) -> np.ndarray:
-        """Generate embeddings for text(s)."""
+               batch_size: int = None) -> np.ndarray:
+        """
+        Generate embeddings for text(s). `batch_size` caps the texts per
+        batch: EMBEDDING_MAX_BATCH_SIZE by default under token budgeting,
+        32 for fixed-size batches.
+        """
         if isinstance(texts, str):
             texts = [texts]
         
-        embeddings = self.model.encode(
-            texts,
-            batch_size=batch_size,
-            show_progress_bar=len(texts) > 10,
-            convert_to_numpy=True
-        )
+        if self.pool is not None and len(texts) >= Config.EMBEDDING_POOL_MIN_TEXTS:
+            embeddings = self.pool.encode(texts)
+        elif self.backend != "remote" and Config.EMBEDDING_MAX_BATCH_TOKENS and len(texts) > 1:
+            embeddings = self._encode_token_budget(
+                texts, batch_size or Config.EMBEDDING_MAX_BATCH_SIZE
+            )
+        else:
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size or 32,
+                show_progress_bar=len(texts) > 10,
+                convert_to_numpy=True
+            )
+        TEXTS_EMBEDDED.inc(len(texts))
+        
+        return embeddings
+    
+    def _encode_token_budget(self, texts: List[str], max_batch_size: int) -> np.ndarray:
+        """Encode length-sorted batches sized by token budget, in original order."""
+        lengths = token_lengths(self.model.tokenizer, texts, self.model.max_seq_length)
+        batches = plan_batches(lengths, Config.EMBEDDING_MAX_BATCH_TOKENS, max_batch_size)
         
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for indices in tqdm(batches, desc="Batches", disable=len(texts) <= 10):
+            embeddings[indices] = self.model.encode(
+                [texts[i] for i in indices],
+                batch_size=len(indices),
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
         return embeddings
     
+    def encode_batch(self, batch: SentenceBatch) -> SentenceBatch:
+        """Embed all rows of a columnar batch into its float32 matrix."""
+        if len(batch):
+            batch.set_embeddings(self.encode(batch.texts))
+        return batch
+    
     def encode_claims(self, claims: List[Claim]) -> List[Claim]:
         """Add embeddings to claim objects."""
         texts = [claim.text for claim in claims]
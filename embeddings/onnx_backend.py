@@ -0,0 +1,152 @@
+import json
+from pathlib import Path
+from typing import List, Union
+import numpy as np
+from config import Config
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+META_FILE = "export.json"
+
+
+def _require_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "EMBEDDING_BACKEND=onnx requires onnx and onnxruntime: "
+            "pip install onnx onnxruntime"
+        ) from e
+    return onnxruntime
+
+
+def default_model_dir(model_name: str) -> Path:
+    return Config.ONNX_MODEL_DIR / model_name.replace("/", "__")
+
+
+def export_onnx(model_name: str, output_dir: Path, quantize: bool = True) -> Path:
+    """
+    Export a SentenceTransformer's transformer module to ONNX and optionally
+    apply dynamic int8 quantization. Pooling and normalization are applied
+    in NumPy at inference time, so the exported graph only covers the encoder.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Exporting {model_name} to ONNX in {output_dir}")
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    encoder = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    pooling = next((m for m in st_model if isinstance(m, Pooling)), None)
+    if pooling is not None and not pooling.pooling_mode_mean_tokens:
+        raise ValueError(f"{model_name} does not use mean pooling; ONNX export unsupported")
+
+    dummy = tokenizer(["a sample sentence"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                   if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = output_dir / FP32_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            encoder,
+            tuple(dummy[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    tokenizer.save_pretrained(str(output_dir))
+
+    model_path = fp32_path
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        model_path = output_dir / INT8_FILE
+        quantize_dynamic(str(fp32_path), str(model_path), weight_type=QuantType.QInt8)
+
+    meta = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "normalize": any(isinstance(m, Normalize) for m in st_model),
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "input_names": input_names,
+    }
+    (output_dir / META_FILE).write_text(json.dumps(meta, indent=2))
+    print(f"✓ Exported {model_path.name}")
+    return model_path
+
+
+class OnnxEmbeddingModel:
+    """
+    CPU inference for a SentenceTransformer exported with `export_onnx`.
+
+    Mirrors the parts of the SentenceTransformer interface that
+    EmbeddingService uses, so it can be swapped in as `self.model`.
+    """
+
+    def __init__(self, model_name: str, model_dir: Path = None,
+                 quantized: bool = True, num_threads: int = 0):
+        ort = _require_onnxruntime()
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir or default_model_dir(model_name))
+        model_path = model_dir / (INT8_FILE if quantized else FP32_FILE)
+        if not model_path.exists():
+            export_onnx(model_name, model_dir, quantize=quantized)
+
+        meta = json.loads((model_dir / META_FILE).read_text())
+        self.max_seq_length = meta["max_seq_length"]
+        self.normalize = meta["normalize"]
+        self.input_names = meta["input_names"]
+        self.dimension = meta["dimension"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, convert_to_numpy: bool = True,
+               **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        output = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            output[start:start + len(batch)] = self._encode_batch(batch)
+        return output
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        summed = (hidden * mask).sum(axis=1)
+        embeddings = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings.astype(np.float32)
@@ -0,0 +1,161 @@
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+import numpy as np
+from config import Config
+
+STREAM_CHUNK_ROWS = 256
+
+
+class _PendingRequest:
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent encode requests into shared model calls.
+
+    The first request in an empty queue opens a window of `max_wait_ms`;
+    every request arriving within it (up to `max_texts` texts) is encoded
+    in the same call and each caller gets back its own rows.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray],
+                 max_texts: int, max_wait_ms: float):
+        self.encode_fn = encode_fn
+        self.max_texts = max_texts
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[_PendingRequest]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> np.ndarray:
+        request = _PendingRequest(texts)
+        self._queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            count = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_texts:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                count += len(request.texts)
+            self._encode(batch)
+
+    def _encode(self, batch: List[_PendingRequest]):
+        texts = [text for request in batch for text in request.texts]
+        try:
+            embeddings = np.asarray(self.encode_fn(texts), dtype=np.float32)
+        except Exception as e:
+            for request in batch:
+                request.error = e
+                request.done.set()
+            return
+        offset = 0
+        for request in batch:
+            request.result = embeddings[offset:offset + len(request.texts)]
+            offset += len(request.texts)
+            request.done.set()
+
+
+class _EmbeddingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "EmbeddingServer"
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        body = json.dumps({
+            "model": self.server.model_name,
+            "dimension": self.server.dimension
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/encode":
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length))["texts"]
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("'texts' must be a list of strings")
+        except (ValueError, KeyError) as e:
+            self.send_error(400, str(e))
+            return
+
+        try:
+            embeddings = self.server.batcher.submit(texts) if texts else \
+                np.empty((0, self.server.dimension), dtype=np.float32)
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        embeddings = np.ascontiguousarray(embeddings, dtype="<f4")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(embeddings.nbytes))
+        self.send_header("X-Embedding-Shape", f"{embeddings.shape[0]},{embeddings.shape[1]}")
+        self.end_headers()
+        for start in range(0, len(embeddings), STREAM_CHUNK_ROWS):
+            self.wfile.write(embeddings[start:start + STREAM_CHUNK_ROWS].tobytes())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EmbeddingServer(ThreadingHTTPServer):
+    """Localhost HTTP daemon that holds one embedding model for many clients."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = None, port: int = None):
+        from embeddings.embedding_service import EmbeddingService
+
+        self.service = EmbeddingService(backend=Config.EMBEDDING_BACKEND)
+        self.model_name = Config.EMBEDDING_MODEL
+        self.dimension = self.service.dimension
+        self.batcher = MicroBatcher(
+            self.service.encode,
+            max_texts=Config.EMBEDDING_COALESCE_MAX_TEXTS,
+            max_wait_ms=Config.EMBEDDING_COALESCE_MS
+        )
+        super().__init__((host or Config.EMBEDDING_SERVER_HOST,
+                          port or Config.EMBEDDING_SERVER_PORT), _EmbeddingHandler)
+
+
+def serve_forever(host: str = None, port: int = None):
+    server = EmbeddingServer(host, port)
+    host, port = server.server_address[:2]
+    print(f"✓ Embedding server listening on http://{host}:{port} "
+          f"(coalescing window {Config.EMBEDDING_COALESCE_MS} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
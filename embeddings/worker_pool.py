@@ -0,0 +1,167 @@
+import atexit
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import List, Optional
+import numpy as np
+
+_READY = -1
+
+
+def _worker_main(worker_idx: int, model_name: str, backend: str,
+                 num_threads: int, cores: Optional[List[int]],
+                 tasks, results):
+    """Worker process: load the model once, then serve encode shards."""
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    from config import Config
+    from embeddings.embedding_service import EmbeddingService
+
+    Config.EMBEDDING_THREADS = num_threads
+    try:
+        service = EmbeddingService(model_name, backend=backend)
+    except Exception as e:
+        results.put((_READY, worker_idx, repr(e)))
+        return
+    results.put((_READY, worker_idx, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, shm_name, shape, start, texts = task
+        try:
+            embeddings = service.encode(texts)
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                output = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+                output[start:start + len(texts)] = embeddings
+                del output
+            finally:
+                shm.close()
+            results.put((task_id, worker_idx, None))
+        except Exception as e:
+            results.put((task_id, worker_idx, repr(e)))
+
+
+class EmbeddingWorkerPool:
+    """
+    Long-lived pool of embedding processes.
+
+    Each worker loads the model once with a fixed thread count. `encode`
+    shards the input across workers, which write their rows directly into
+    a shared-memory float32 matrix instead of pickling results back.
+    """
+
+    def __init__(self, num_workers: int, threads_per_worker: int,
+                 model_name: str, backend: str, dimension: int):
+        self.num_workers = num_workers
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.model_name = model_name
+        self.backend = backend
+        self.dimension = dimension
+        self._processes = []
+        self._lock = threading.Lock()
+        self._next_task = 0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._processes)
+
+    def start(self):
+        """Spawn workers and block until every model is loaded."""
+        if self.started:
+            return
+        ctx = mp.get_context("spawn")
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        print(f"Starting {self.num_workers} embedding workers "
+              f"({self.threads_per_worker} threads each)...")
+        for i in range(self.num_workers):
+            cores = available[i * self.threads_per_worker:(i + 1) * self.threads_per_worker]
+            if len(cores) < self.threads_per_worker:
+                cores = None
+            process = ctx.Process(
+                target=_worker_main,
+                args=(i, self.model_name, self.backend, self.threads_per_worker,
+                      cores, self._tasks, self._results),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+        for _ in range(self.num_workers):
+            _, worker_idx, error = self._get_result()
+            if error:
+                self.close()
+                raise RuntimeError(f"Embedding worker {worker_idx} failed to start: {error}")
+        atexit.register(self.close)
+        print("✓ Embedding workers ready")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode `texts` across all workers; rows come back in input order."""
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        with self._lock:
+            self.start()
+            shape = (len(texts), self.dimension)
+            shm = shared_memory.SharedMemory(create=True, size=len(texts) * self.dimension * 4)
+            try:
+                shard_size = -(-len(texts) // self.num_workers)
+                pending = set()
+                for start in range(0, len(texts), shard_size):
+                    task_id = self._next_task
+                    self._next_task += 1
+                    pending.add(task_id)
+                    self._tasks.put((task_id, shm.name, shape, start,
+                                     texts[start:start + shard_size]))
+
+                while pending:
+                    task_id, worker_idx, error = self._get_result()
+                    if task_id not in pending:
+                        continue  # late reply from an earlier, failed call
+                    if error:
+                        raise RuntimeError(f"Embedding worker {worker_idx} failed: {error}")
+                    pending.discard(task_id)
+
+                return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+            finally:
+                shm.close()
+                shm.unlink()
+
+    def _get_result(self):
+        while True:
+            try:
+                return self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p.pid for p in self._processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Embedding worker(s) exited unexpectedly: {dead}")
+
+    def close(self):
+        """Stop all workers."""
+        if not self._processes:
+            return
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
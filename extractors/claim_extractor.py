@@ -2,9 +2,28 @@ import re
 import spacy
 from typing import List
 from config import Config
+from monitoring.metrics import SENTENCES_SEGMENTED
 from models.paper import Paper, Claim
+from models.batch import SentenceBatch
+from extractors.ruleset import ruleset_version
+
+CLAIM_PATTERNS = [
+    r'\bwe (show|demonstrate|present|propose|introduce|achieve|improve)\b',
+    r'\bour (method|approach|model|system|framework) (achieves|outperforms|improves)\b',
+    r'\bresults (show|demonstrate|indicate|suggest)\b',
+    r'\b(significantly|substantially) (better|higher|lower|faster) than\b',
+    r'\bstate-of-the-art\b',
+    r'\bF1 score|accuracy|precision|recall|BLEU|ROUGE\b',
+]
+CLAIM_KEYWORDS = ['we show', 'we demonstrate', 'outperforms', 'achieves']
 
 class ClaimExtractor:
+    # Paper sections claims are extracted from.
+    SECTIONS = ("abstract", "conclusion")
+    # Changes whenever a pattern, keyword or length limit changes.
+    RULES_VERSION = ruleset_version(CLAIM_PATTERNS, CLAIM_KEYWORDS,
+                                    Config.MIN_CLAIM_LENGTH, Config.MAX_CLAIM_LENGTH)
+    
     def __init__(self):
        
         try:
@@ -13,64 +32,58 @@ class ClaimExtractor:
             print("Warning: spaCy model not found. Using basic extraction.")
             self.nlp = None
     
+    @property
+    def rules_version(self) -> str:
+        """Rule-set version including the sentence splitter, which fixes sentence ids."""
+        return f"{self.RULES_VERSION}-{'spacy' if self.nlp else 'regex'}"
+    
     def extract_claims(self, paper: Paper) -> List[Claim]:
         """Extract claim sentences from abstract and conclusion."""
-        claims = []
-        
+        batch = SentenceBatch('claim')
+        self.extract_claims_into(paper, batch)
+        return batch.to_models()
     
-        claim_patterns = [
-            r'\bwe (show|demonstrate|present|propose|introduce|achieve|improve)\b',
-            r'\bour (method|approach|model|system|framework) (achieves|outperforms|improves)\b',
-            r'\bresults (show|demonstrate|indicate|suggest)\b',
-            r'\b(significantly|substantially) (better|higher|lower|faster) than\b',
-            r'\bstate-of-the-art\b',
-            r'\bF1 score|accuracy|precision|recall|BLEU|ROUGE\b',
-        ]
+    def extract_claims_into(self, paper: Paper, batch: SentenceBatch) -> int:
+        """Append claim sentences of `paper` to a columnar batch; returns the count added."""
+        start = len(batch)
+        paper_idx = batch.add_paper(paper)
+        batch.rules_version = self.rules_version
         
-     
-        claims.extend(self._extract_from_text(
-            paper.abstract, paper, "abstract", claim_patterns
-        ))
-        
-       
-        claims.extend(self._extract_from_text(
-            paper.conclusion, paper, "conclusion", claim_patterns
-        ))
+        for section in self.SECTIONS:
+            self._extract_from_text(
+                getattr(paper, section), paper, paper_idx, section, CLAIM_PATTERNS, batch
+            )
         
-        return claims
+        return len(batch) - start
     
-    def _extract_from_text(self, text: str, paper: Paper, 
-                          section: str, patterns: List[str]) -> List[Claim]:
-        """Extract claims from a text section."""
+    def _extract_from_text(self, text: str, paper: Paper, paper_idx: int,
+                          section: str, patterns: List[str],
+                          batch: SentenceBatch):
+        """Extract claims from a text section into the batch."""
         if not text:
-            return []
+            return
         
-        claims = []
         sentences = self._split_sentences(text)
         
         for i, sentence in enumerate(sentences):
             if self._is_claim(sentence, patterns):
-                claim = Claim(
-                    claim_id=f"{paper.paper_id}_{section}_{i}",
-                    text=sentence.strip(),
-                    paper_id=paper.paper_id,
-                    paper_title=paper.title,
-                    year=paper.year,
-                    venue=paper.venue,
-                    section=section
+                batch.append(
+                    f"{paper.paper_id}_{section}_{i}",
+                    sentence.strip(),
+                    paper_idx,
+                    section
                 )
-                claims.append(claim)
-        
-        return claims
     
     def _split_sentences(self, text: str) -> List[str]:
         """Split text into sentences."""
         if self.nlp:
             doc = self.nlp(text)
-            return [sent.text for sent in doc.sents]
+            sentences = [sent.text for sent in doc.sents]
         else:
        
-            return re.split(r'(?<=[.!?])\s+', text)
+            sentences = re.split(r'(?<=[.!?])\s+', text)
+        SENTENCES_SEGMENTED.inc(len(sentences), extractor="claim")
+        return sentences
     
     def _is_claim(self, sentence: str, patterns: List[str]) -> bool:
         """Determine if a sentence is a claim."""
@@ -85,8 +98,7 @@ class ClaimExtractor:
                 return True
         
       
-        if any(keyword in sentence_lower for keyword in 
-               ['we show', 'we demonstrate', 'outperforms', 'achieves']):
+        if any(keyword in sentence_lower for keyword in CLAIM_KEYWORDS):
             return True
         
         return False
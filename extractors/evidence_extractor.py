@@ -2,72 +2,86 @@ import re
 import spacy
 from typing import List
 from config import Config
+from monitoring.metrics import SENTENCES_SEGMENTED
 from models.paper import Paper, Evidence
+from models.batch import SentenceBatch
+from extractors.ruleset import ruleset_version
+
+EVIDENCE_PATTERNS = [
+    r'\b(achieved|obtained|reached|measured|observed|found)\b',
+    r'\b\d+(\.\d+)?%\b',
+    r'\b(improved|increased|decreased|reduced) by\b',
+    r'\b(BLEU|ROUGE|F1|accuracy|precision|recall) (score )?(of |is )\d+',
+    r'\b(training|inference) time\b',
+    r'\bexperiment(s)? (show|showed|demonstrate)\b',
+    r'\b(table|figure) \d+ shows\b',
+]
+EVIDENCE_KEYWORDS = ['score', 'accuracy', 'performance', 'result']
 
 class EvidenceExtractor:
+    # Paper sections evidence is extracted from.
+    SECTIONS = ("results", "discussion")
+    # Changes whenever a pattern, keyword or length limit changes.
+    RULES_VERSION = ruleset_version(EVIDENCE_PATTERNS, EVIDENCE_KEYWORDS,
+                                    Config.MIN_EVIDENCE_LENGTH)
+    
     def __init__(self):
         try:
             self.nlp = spacy.load("en_core_web_sm")
         except:
             self.nlp = None
     
+    @property
+    def rules_version(self) -> str:
+        """Rule-set version including the sentence splitter, which fixes sentence ids."""
+        return f"{self.RULES_VERSION}-{'spacy' if self.nlp else 'regex'}"
+    
     def extract_evidence(self, paper: Paper) -> List[Evidence]:
         """Extract evidence statements from results and discussion."""
-        evidence_list = []
-        
+        batch = SentenceBatch('evidence')
+        self.extract_evidence_into(paper, batch)
+        return batch.to_models()
     
-        evidence_patterns = [
-            r'\b(achieved|obtained|reached|measured|observed|found)\b',
-            r'\b\d+(\.\d+)?%\b',
-            r'\b(improved|increased|decreased|reduced) by\b',
-            r'\b(BLEU|ROUGE|F1|accuracy|precision|recall) (score )?(of |is )\d+',
-            r'\b(training|inference) time\b',
-            r'\bexperiment(s)? (show|showed|demonstrate)\b',
-            r'\b(table|figure) \d+ shows\b',
-        ]
-       
-        evidence_list.extend(self._extract_from_text(
-            paper.results, paper, "results", evidence_patterns
-        ))
+    def extract_evidence_into(self, paper: Paper, batch: SentenceBatch) -> int:
+        """Append evidence sentences of `paper` to a columnar batch; returns the count added."""
+        start = len(batch)
+        paper_idx = batch.add_paper(paper)
+        batch.rules_version = self.rules_version
         
-      
-        evidence_list.extend(self._extract_from_text(
-            paper.discussion, paper, "discussion", evidence_patterns
-        ))
+        for section in self.SECTIONS:
+            self._extract_from_text(
+                getattr(paper, section), paper, paper_idx, section, EVIDENCE_PATTERNS, batch
+            )
         
-        return evidence_list
+        return len(batch) - start
     
-    def _extract_from_text(self, text: str, paper: Paper,
-                          section: str, patterns: List[str]) -> List[Evidence]:
-        """Extract evidence from a text section."""
+    def _extract_from_text(self, text: str, paper: Paper, paper_idx: int,
+                          section: str, patterns: List[str],
+                          batch: SentenceBatch):
+        """Extract evidence from a text section into the batch."""
         if not text:
-            return []
+            return
         
-        evidence_list = []
         sentences = self._split_sentences(text)
         
         for i, sentence in enumerate(sentences):
             if self._is_evidence(sentence, patterns):
-                evidence = Evidence(
-                    evidence_id=f"{paper.paper_id}_{section}_{i}",
-                    text=sentence.strip(),
-                    paper_id=paper.paper_id,
-                    paper_title=paper.title,
-                    year=paper.year,
-                    venue=paper.venue,
-                    section=section
+                batch.append(
+                    f"{paper.paper_id}_{section}_{i}",
+                    sentence.strip(),
+                    paper_idx,
+                    section
                 )
-                evidence_list.append(evidence)
-        
-        return evidence_list
     
     def _split_sentences(self, text: str) -> List[str]:
         """Split text into sentences."""
         if self.nlp:
             doc = self.nlp(text)
-            return [sent.text for sent in doc.sents]
+            sentences = [sent.text for sent in doc.sents]
         else:
-            return re.split(r'(?<=[.!?])\s+', text)
+            sentences = re.split(r'(?<=[.!?])\s+', text)
+        SENTENCES_SEGMENTED.inc(len(sentences), extractor="evidence")
+        return sentences
     
     def _is_evidence(self, sentence: str, patterns: List[str]) -> bool:
         """Determine if a sentence contains evidence."""
@@ -81,8 +95,7 @@ class EvidenceExtractor:
         
         
         if re.search(r'\d+(\.\d+)?', sentence):
-            if any(keyword in sentence_lower for keyword in 
-                   ['score', 'accuracy', 'performance', 'result']):
+            if any(keyword in sentence_lower for keyword in EVIDENCE_KEYWORDS):
                 return True
         
         return False
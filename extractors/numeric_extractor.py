@@ -0,0 +1,117 @@
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+
+class NumericResult(NamedTuple):
+    metric: str
+    value: float
+    unit: str
+    dataset: str  # "" when the sentence names no known dataset
+
+
+# Canonical metric name -> pattern (matched case-insensitively, except the
+# abbreviations that are also English words: EM, mAP).
+METRICS = {
+    'bleu': r'bleu',
+    'rouge-1': r'rouge-?1',
+    'rouge-2': r'rouge-?2',
+    'rouge-l': r'rouge-?l',
+    'rouge': r'rouge',
+    'f1': r'f1|f-1|f-score|f-measure',
+    'accuracy': r'accuracy|acc\.',
+    'precision': r'precision',
+    'recall': r'recall',
+    'exact match': r'exact match|(?-i:EM)',
+    'perplexity': r'perplexity|ppl',
+    'wer': r'wer|word error rate',
+    'map': r'(?-i:mAP|MAP)|mean average precision',
+    'auc': r'auc|auroc',
+    'top-1': r'top-1(?: accuracy)?',
+    'top-5': r'top-5(?: accuracy)?',
+}
+
+# Metrics where a smaller value is better.
+LOWER_IS_BETTER = {'perplexity', 'wer'}
+
+_DATASETS = [
+    (r'wmt\s?[\'’]?(?:20)?(\d{2})', lambda m: f"WMT{m.group(1)}"),
+    (r'squad\s?(?:v?(\d(?:\.\d)?))?', lambda m: f"SQuAD{m.group(1) or ''}"),
+    (r'superglue', lambda m: "SuperGLUE"),
+    (r'glue', lambda m: "GLUE"),
+    (r'imagenet', lambda m: "ImageNet"),
+    (r'cifar-?(10|100)', lambda m: f"CIFAR-{m.group(1)}"),
+    (r'(?:ms\s?)?coco', lambda m: "COCO"),
+    (r'conll-?(\d{4})?', lambda m: f"CoNLL{m.group(1) or ''}"),
+    (r'mnli', lambda m: "MNLI"),
+    (r'sst-?2', lambda m: "SST-2"),
+    (r'ms\s?marco', lambda m: "MS MARCO"),
+    (r'penn treebank|ptb', lambda m: "PTB"),
+    (r'wikitext-?(103|2)', lambda m: f"WikiText-{m.group(1)}"),
+    (r'librispeech', lambda m: "LibriSpeech"),
+    (r'cnn\s?/\s?daily\s?mail|cnn/dm', lambda m: "CNN/DailyMail"),
+]
+_DATASET_RE = [(re.compile(r'\b(?:' + pattern + r')\b', re.IGNORECASE), name)
+               for pattern, name in _DATASETS]
+
+_METRIC_ALT = "|".join(f"(?P<m{i}>{pattern})" for i, pattern in enumerate(METRICS.values()))
+# Not preceded by a word character, "." or "-", so the digits in "WMT14",
+# "ResNet50", "GPT2" or "Top-1" are not read as values.
+_NUMBER = r'(?<![\w.\-])(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>%|points?|pp)?'
+# "BLEU score of 28.4", "accuracy: 93.2%", "F1 is 88"
+_METRIC_FIRST = re.compile(
+    r'\b(?:' + _METRIC_ALT + r')\b(?:\s+scores?)?\s*(?:of|is|was|=|:|reaches|reached|at)?\s*'
+    + _NUMBER, re.IGNORECASE
+)
+# "28.4 BLEU", "93.2% accuracy", "88 F1 points"
+_VALUE_FIRST = re.compile(
+    _NUMBER + r'\s+\b(?:' + _METRIC_ALT + r')\b', re.IGNORECASE
+)
+_METRIC_NAMES = list(METRICS)
+
+
+def normalize_metric(name: str) -> Optional[str]:
+    name = name.strip()
+    for canonical, pattern in METRICS.items():
+        if name.lower() == canonical or re.fullmatch(pattern, name, re.IGNORECASE):
+            return canonical
+    return None
+
+
+def dataset_mentions(text: str) -> List[Tuple[int, str]]:
+    """(position, canonical name) of every known dataset mentioned in `text`."""
+    mentions = []
+    for pattern, name in _DATASET_RE:
+        mentions.extend((match.start(), name(match)) for match in pattern.finditer(text))
+    return sorted(mentions)
+
+
+def normalize_dataset(text: str) -> str:
+    """Canonical name of the first known dataset mentioned in `text`, or ""."""
+    mentions = dataset_mentions(text)
+    return mentions[0][1] if mentions else ""
+
+
+class NumericExtractor:
+    """Parses (metric, value, unit, dataset) tuples out of result sentences."""
+
+    def extract(self, text: str) -> List[NumericResult]:
+        mentions = dataset_mentions(text)
+        results = []
+        seen = set()
+        for regex in (_METRIC_FIRST, _VALUE_FIRST):
+            for match in regex.finditer(text):
+                metric = next(_METRIC_NAMES[i] for i in range(len(_METRIC_NAMES))
+                              if match.group(f"m{i}"))
+                value = float(match.group('value'))
+                unit = (match.group('unit') or '').lower()
+                if unit.startswith('point') or unit == 'pp':
+                    unit = 'points'
+                if (metric, value) in seen or (metric == 'accuracy' and value > 100):
+                    continue
+                seen.add((metric, value))
+                # Attribute the number to the closest dataset mention in the sentence.
+                dataset = min(mentions, key=lambda mention: min(abs(mention[0] - match.start()),
+                                                                abs(mention[0] - match.end())),
+                              default=(0, ""))[1]
+                results.append(NumericResult(metric, value, unit, dataset))
+        return results
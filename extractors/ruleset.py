@@ -0,0 +1,13 @@
+import hashlib
+import json
+
+
+def ruleset_version(*rules) -> str:
+    """Short stable hash of an extractor's patterns, keywords and thresholds."""
+    encoded = json.dumps(rules, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def sentence_hash(text: str) -> str:
+    """Hash of a stored sentence's exact text, used to diff re-extractions."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
@@ -6,6 +6,7 @@ from pipeline.ingestion_pipeline import IngestionPipeline
 from retrieval.retriever import ClaimEvidenceRetriever
 from pipeline.auto_ingestion_pipeline import AutoIngestionPipeline 
 from config import Config
+from monitoring.metrics import write_textfile
 import json
 
 def create_sample_papers():
@@ -52,12 +53,149 @@ def main():
                        help='Fetch papers on a specific topic from arXiv')
     parser.add_argument('--category', type=str,
                        help='Fetch papers from arXiv category (e.g., cs.CL, cs.AI)')
+    parser.add_argument('--group-by-paper', action='store_true',
+                       help='With --query: show top papers with their best claims and evidence')
+    parser.add_argument('--year-from', type=int,
+                       help='With --query: only papers published in or after this year')
+    parser.add_argument('--year-to', type=int,
+                       help='With --query: only papers published in or before this year')
+    parser.add_argument('--in-category', type=str, nargs='+', metavar='CATEGORY',
+                       help='With --query: only papers in these arXiv categories (e.g. cs.CL)')
+    parser.add_argument('--list-shards', action='store_true',
+                       help='List evidence shards and their point counts')
+    parser.add_argument('--freeze-shard', type=str, metavar='NAME',
+                       help='Stop writing to an evidence shard and compact it')
+    parser.add_argument('--export', type=str, metavar='PATH',
+                       help='Export claims and evidence to a binary snapshot')
+    parser.add_argument('--import', dest='import_path', type=str, metavar='PATH',
+                       help='Restore claims and evidence from a binary snapshot')
+    parser.add_argument('--force', action='store_true',
+                       help='With --import: replace non-empty collections')
+    parser.add_argument('--serve-embeddings', action='store_true',
+                       help='Run the shared local embedding server')
+    parser.add_argument('--build-knn-graph', action='store_true',
+                       help='Precompute every stored claim\'s nearest evidence and claims')
+    parser.add_argument('--numeric-query', type=str, metavar='QUERY',
+                       help='Query reported numbers, e.g. "WMT14 BLEU > 28" or "BLEU top 5"')
+    parser.add_argument('--check-numbers', type=str, metavar='CLAIM',
+                       help='Check the numbers in a claim against indexed evidence')
+    parser.add_argument('--build-numeric-index', action='store_true',
+                       help='Rebuild the numeric results index from stored evidence')
+    parser.add_argument('--warmup', action='store_true',
+                       help='Replay frequent logged queries to prime caches, then report readiness')
+    parser.add_argument('--build-projection', action='store_true',
+                       help='Fit the first-stage projection and build reduced evidence collections')
+    parser.add_argument('--projection-dim', type=int,
+                       help='With --build-projection: target dimension (default PROJECTION_DIM)')
+    parser.add_argument('--reextract', action='store_true',
+                       help='Re-apply changed extractor rules to stored papers')
+    parser.add_argument('--migrate-model', type=str, metavar='MODEL',
+                       help='Re-embed both collections with MODEL and swap them in')
+    parser.add_argument('--no-cutover', action='store_true',
+                       help='With --migrate-model: fill the shadow collections but keep serving the old ones')
     
     args = parser.parse_args()
+    filters = {'year_from': args.year_from, 'year_to': args.year_to,
+               'categories': args.in_category}
     
     Config.ensure_directories()
     
-    if args.auto_query:
+    if args.serve_embeddings:
+        from embeddings.server import serve_forever
+        serve_forever()
+    
+    elif args.export:
+        from storage.snapshot import export_snapshot
+        from storage.qdrant_manager import QdrantManager
+        print(f"\nExporting snapshot to {args.export}...")
+        counts = export_snapshot(QdrantManager(), args.export)
+        print(f"\n✓ Exported {sum(counts.values())} points")
+    
+    elif args.import_path:
+        from storage.snapshot import restore_snapshot
+        from storage.qdrant_manager import QdrantManager
+        from storage.bm25_index import BM25Index
+        print(f"\nRestoring snapshot from {args.import_path}...")
+        counts = restore_snapshot(
+            QdrantManager(), args.import_path, recreate=args.force,
+            bm25=BM25Index() if Config.HYBRID_SEARCH else None
+        )
+        print(f"\n✓ Restored and verified {sum(counts.values())} points")
+    
+    elif args.list_shards:
+        from storage.qdrant_manager import QdrantManager
+        qdrant = QdrantManager()
+        frozen = qdrant.sidecar.frozen()
+        for name in qdrant.collections_for('evidence'):
+            count = qdrant.client.count(name, exact=True).count
+            print(f"{name:40s} {count:>10}{'  (frozen)' if name in frozen else ''}")
+    
+    elif args.freeze_shard:
+        from storage.qdrant_manager import QdrantManager
+        QdrantManager().freeze_shard(args.freeze_shard)
+    
+    elif args.build_knn_graph:
+        from retrieval.knn_graph import ClaimEvidenceGraph
+        from storage.qdrant_manager import QdrantManager
+        print("\nBuilding claim-evidence graph...")
+        ClaimEvidenceGraph().build(QdrantManager())
+    
+    elif args.build_numeric_index:
+        from storage.numeric_index import NumericIndex
+        from storage.sidecar import SidecarStore
+        print("\nParsing numeric results from stored evidence...")
+        count = NumericIndex().rebuild(SidecarStore().scan('evidence'))
+        print(f"\n✓ Indexed {count} numeric results")
+    
+    elif args.numeric_query:
+        from storage.numeric_index import NumericIndex, run_numeric_query
+        from storage.sidecar import SidecarStore
+        rows = run_numeric_query(NumericIndex(), args.numeric_query)
+        texts = SidecarStore().fetch('evidence', [row['evidence_point_id'] for row in rows])
+        print(f"\n{len(rows)} results for: {args.numeric_query}")
+        for row in rows:
+            evidence = texts.get(row['evidence_point_id'], {})
+            print(f"\n📊 {row['metric']} {row['value']:g}{row['unit']} on {row['dataset'] or '?'}")
+            print(f"   {evidence.get('text', '')}")
+            print(f"   📄 {evidence.get('paper_title', '')} ({row['year']})")
+    
+    elif args.check_numbers:
+        from storage.numeric_index import NumericIndex
+        checks = NumericIndex().check_claim(args.check_numbers)
+        if not checks:
+            print("\n⚠️  No numeric results found in the claim")
+        for check in checks:
+            print(f"\n{check['metric']} {check['value']:g}{check['unit']} on "
+                  f"{check['dataset'] or 'any dataset'}: "
+                  f"✅ {len(check['consistent'])} consistent, "
+                  f"❌ {len(check['conflicting'])} conflicting")
+    
+    elif args.warmup:
+        from retrieval.warmup import Warmup
+        Warmup(ClaimEvidenceRetriever()).run()
+    
+    elif args.build_projection:
+        from storage.projection import build_two_stage
+        from storage.qdrant_manager import QdrantManager
+        print("\nBuilding two-stage evidence search...")
+        build_two_stage(QdrantManager(), dim=args.projection_dim)
+        if not Config.TWO_STAGE_SEARCH:
+            print("⚠️  Set TWO_STAGE_SEARCH=true to search the reduced collections")
+    
+    elif args.reextract:
+        from pipeline.reextraction import ReExtraction
+        stats = ReExtraction().run()
+        print(f"\n✓ Re-extraction complete: "
+              f"{sum(s['embedded'] for s in stats.values())} sentences embedded, "
+              f"{sum(s['removed'] for s in stats.values())} removed")
+    
+    elif args.migrate_model:
+        from pipeline.migration import EmbeddingMigration
+        print(f"\nMigrating collections to {args.migrate_model}...")
+        counts = EmbeddingMigration(args.migrate_model).run(cutover=not args.no_cutover)
+        print(f"\n✓ Re-embedded {sum(counts.values())} points")
+    
+    elif args.auto_query:
         print(f"\n{'='*70}")
         print(f"AUTO-QUERY MODE: {args.auto_query}")
         print(f"{'='*70}")
@@ -122,30 +260,47 @@ def main():
         papers = create_sample_papers()
         results = pipeline.process_papers(papers)
         print(f"\n✓ Ingested {results['claims_count']} claims and {results['evidence_count']} evidence")
+        print(f"✓ Dedup ratio: {results['dedup_ratio']:.1%}")
  
+    elif args.query and args.group_by_paper:
+        print(f"\nQuerying (grouped by paper): {args.query}\n")
+        retriever = ClaimEvidenceRetriever()
+        results = retriever.retrieve_grouped(args.query, **filters)
+        
+        for i, paper in enumerate(results['papers'], 1):
+            print(f"\n=== {i}. {paper['paper_title']} ({paper['year']}) ===")
+            print(f"  {paper['venue']} | Best match: {paper['score']:.3f}")
+            for claim in paper['claims']:
+                print(f"\n  • {claim['text']}")
+                print(f"    Similarity: {claim['similarity_score']:.3f}")
+            for category, marker in (('supporting', '✅'), ('contradicting', '❌'), ('neutral', '⚪')):
+                for ev in paper['evidence'][category]:
+                    print(f"\n  {marker} {ev['text']}")
+    
     elif args.query:
         print(f"\nQuerying: {args.query}\n")
         retriever = ClaimEvidenceRetriever()
-        results = retriever.retrieve(args.query)
-        
-        print("\n=== RELATED CLAIMS ===")
-        for claim in results['related_claims'][:5]:
-            print(f"\n• {claim['text']}")
-            print(f"  [{claim['paper_title']}, {claim['year']}]")
-            print(f"  Similarity: {claim['similarity_score']:.3f}")
         
-        print("\n=== SUPPORTING EVIDENCE ===")
-        for ev in results['evidence']['supporting']:
-            print(f"\n• {ev['text']}")
-            print(f"  [{ev['paper_title']}, {ev['year']}]")
-        
-        print("\n=== CONTRADICTING EVIDENCE ===")
-        for ev in results['evidence']['contradicting']:
-            print(f"\n• {ev['text']}")
-            print(f"  [{ev['paper_title']}, {ev['year']}]")
+        # Claims print as soon as their search returns; evidence follows in chunks.
+        for event, data in retriever.retrieve_stream(args.query, **filters):
+            if event == 'claims':
+                print("\n=== RELATED CLAIMS ===")
+                for claim in data[:5]:
+                    print(f"\n• {claim['text']}")
+                    print(f"  [{claim['paper_title']}, {claim['year']}]")
+                    print(f"  Similarity: {claim['similarity_score']:.3f}")
+                print("\n=== EVIDENCE ===")
+                continue
+            for category, marker in (('supporting', '✅ SUPPORTING'),
+                                     ('contradicting', '❌ CONTRADICTING')):
+                for ev in data[category]:
+                    print(f"\n{marker}: {ev['text']}", flush=True)
+                    print(f"  [{ev['paper_title']}, {ev['year']}]", flush=True)
     
     else:
         parser.print_help()
+    
+    write_textfile()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
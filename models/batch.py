@@ -0,0 +1,156 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+import numpy as np
+from models.paper import Paper, Claim, Evidence
+from extractors.ruleset import sentence_hash
+
+KINDS = ('claim', 'evidence')
+
+
+class SentenceBatch:
+    """
+    Columnar batch of extracted claim or evidence sentences.
+
+    Ids and texts are parallel lists, paper metadata and section names are
+    interned into small tables referenced by integer index, and embeddings
+    live in one contiguous float32 matrix. Pydantic `Claim`/`Evidence`
+    objects are only built on demand via `to_models()`.
+    """
+
+    def __init__(self, kind: str):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown batch kind: {kind}")
+        self.kind = kind
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.paper_index = array('I')
+        self.section_index = array('B')
+        self.papers: List[Paper] = []
+        self.sections: List[str] = []
+        self.embeddings: Optional[np.ndarray] = None
+        self.merged_sources: Dict[int, List[str]] = {}
+        self.rules_version = ""  # extractor rule set that produced the rows
+        self._paper_lookup: Dict[str, int] = {}
+        self._section_lookup: Dict[str, int] = {}
+
+    @property
+    def id_field(self) -> str:
+        return f"{self.kind}_id"
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add_paper(self, paper: Paper) -> int:
+        """Intern a paper and return its index in the paper table."""
+        idx = self._paper_lookup.get(paper.paper_id)
+        if idx is None:
+            idx = len(self.papers)
+            self.papers.append(paper)
+            self._paper_lookup[paper.paper_id] = idx
+        return idx
+
+    def append(self, item_id: str, text: str, paper_idx: int, section: str):
+        """Append one sentence row."""
+        section_idx = self._section_lookup.get(section)
+        if section_idx is None:
+            section_idx = len(self.sections)
+            self.sections.append(section)
+            self._section_lookup[section] = section_idx
+        self.ids.append(item_id)
+        self.texts.append(text)
+        self.paper_index.append(paper_idx)
+        self.section_index.append(section_idx)
+
+    def paper_id(self, i: int) -> str:
+        return self.papers[self.paper_index[i]].paper_id
+
+    def source_papers(self, i: int) -> List[str]:
+        """Paper ids this row stands for: its own plus any merged duplicates."""
+        return [self.paper_id(i)] + self.merged_sources.get(i, [])
+
+    def add_source(self, i: int, paper_id: str):
+        """Record that row `i` also represents a duplicate sentence from `paper_id`."""
+        if paper_id not in self.source_papers(i):
+            self.merged_sources.setdefault(i, []).append(paper_id)
+
+    def set_embeddings(self, embeddings: np.ndarray):
+        """Attach the (n, dim) embedding matrix for all rows."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(self):
+            raise ValueError(
+                f"Expected ({len(self)}, dim) embeddings, got {embeddings.shape}"
+            )
+        self.embeddings = embeddings
+
+    def payload(self, i: int) -> Dict:
+        """Qdrant payload for row `i`."""
+        paper = self.papers[self.paper_index[i]]
+        return {
+            self.id_field: self.ids[i],
+            "text": self.texts[i],
+            "paper_id": paper.paper_id,
+            "paper_title": paper.title,
+            "year": paper.year,
+            "venue": paper.venue,
+            "section": self.sections[self.section_index[i]],
+            "category": paper.category,
+            "source_papers": self.source_papers(i),
+            "rules_version": self.rules_version,
+            "sentence_hash": sentence_hash(self.texts[i])
+        }
+
+    def payloads(self, start: int = 0, end: Optional[int] = None) -> Iterator[Dict]:
+        end = len(self) if end is None else end
+        for i in range(start, end):
+            yield self.payload(i)
+
+    def select(self, indices: Sequence[int]) -> 'SentenceBatch':
+        """Return a new batch containing only the given rows, in order."""
+        subset = SentenceBatch(self.kind)
+        subset.rules_version = self.rules_version
+        for new_i, i in enumerate(indices):
+            paper_idx = subset.add_paper(self.papers[self.paper_index[i]])
+            subset.append(self.ids[i], self.texts[i], paper_idx,
+                          self.sections[self.section_index[i]])
+            if i in self.merged_sources:
+                subset.merged_sources[new_i] = list(self.merged_sources[i])
+        if self.embeddings is not None:
+            subset.embeddings = self.embeddings[np.asarray(indices, dtype=np.int64)]
+        return subset
+
+    def to_models(self, include_embeddings: bool = False) -> List[Union[Claim, Evidence]]:
+        """Materialise rows as pydantic `Claim`/`Evidence` objects."""
+        model = Claim if self.kind == 'claim' else Evidence
+        items = []
+        for i in range(len(self)):
+            fields = self.payload(i)
+            fields.pop("source_papers")
+            fields.pop("category")
+            fields.pop("rules_version")
+            fields.pop("sentence_hash")
+            if include_embeddings and self.embeddings is not None:
+                fields["embedding"] = self.embeddings[i].tolist()
+            items.append(model(**fields))
+        return items
+
+    @classmethod
+    def from_models(cls, kind: str,
+                    items: List[Union[Claim, Evidence]]) -> 'SentenceBatch':
+        """Build a batch from pydantic objects (embeddings included if present)."""
+        batch = cls(kind)
+        for item in items:
+            paper_idx = batch._paper_lookup.get(item.paper_id)
+            if paper_idx is None:
+                paper_idx = batch.add_paper(Paper(
+                    paper_id=item.paper_id,
+                    title=item.paper_title,
+                    authors=[],
+                    year=item.year,
+                    venue=item.venue
+                ))
+            batch.append(getattr(item, batch.id_field), item.text,
+                         paper_idx, item.section)
+        if items and all(item.embedding is not None for item in items):
+            batch.set_embeddings(np.asarray([item.embedding for item in items],
+                                            dtype=np.float32))
+        return batch
@@ -15,6 +15,7 @@ class Paper(BaseModel):
     conclusion: str = ""
     doi: Optional[str] = None
     arxiv_id: Optional[str] = None
+    category: Optional[str] = None  # arXiv primary category, e.g. "cs.CL"
     
 class Claim(BaseModel):
     claim_id: str
@@ -0,0 +1,269 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from config import Config
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _NullTimer:
+    """Timer used when metrics are disabled; does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, histogram: 'Histogram', labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram._observe(self.labels, time.perf_counter() - self.start)
+        return False
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: 'MetricsRegistry', name: str,
+                 help_text: str, labelnames: List[str] = None):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames or ())
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _label_key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{name}="{_escape(value)}"'
+                 for name, value in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        """Increment the counter for the given label values."""
+        if not self.registry.enabled:
+            return
+        key = self._label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry: 'MetricsRegistry', name: str,
+                 help_text: str, labelnames: List[str] = None,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        """Record one observation (in seconds for latency histograms)."""
+        if not self.registry.enabled:
+            return
+        self._observe(self._label_key(labels), value)
+
+    def time(self, **labels):
+        """Context manager that observes the elapsed wall time of its block."""
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, self._label_key(labels))
+
+    def _observe(self, key: Tuple[str, ...], value: float):
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict]:
+        """Copy of the cumulative bucket counts, sum and count per label set."""
+        with self._lock:
+            return {key: dict(state, buckets=list(state['buckets']))
+                    for key, state in self._values.items()}
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, state in self.snapshot().items():
+            for bound, count in zip(self.buckets, state['buckets']):
+                labels = self._format_labels(key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = self._format_labels(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {state['count']}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} "
+                         f"{_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str,
+                labelnames: List[str] = None) -> Counter:
+        return self._register(Counter(self, name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: List[str] = None,
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labelnames, buckets))
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry(enabled=Config.METRICS_ENABLED)
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "claim_mapper_stage_seconds",
+    "Wall time spent in each pipeline or retrieval stage.",
+    ["stage"]
+)
+SENTENCES_SEGMENTED = REGISTRY.counter(
+    "claim_mapper_sentences_segmented_total",
+    "Sentences produced by section segmentation.",
+    ["extractor"]
+)
+TEXTS_EMBEDDED = REGISTRY.counter(
+    "claim_mapper_texts_embedded_total",
+    "Texts passed through the embedding model."
+)
+POINTS_UPSERTED = REGISTRY.counter(
+    "claim_mapper_points_upserted_total",
+    "Points upserted into Qdrant.",
+    ["collection"]
+)
+SEARCH_SECONDS = REGISTRY.histogram(
+    "claim_mapper_search_seconds",
+    "Vector search latency per collection.",
+    ["collection"]
+)
+QUERY_CACHE_LOOKUPS = REGISTRY.counter(
+    "claim_mapper_query_cache_lookups_total",
+    "Query-embedding cache lookups by result.",
+    ["result"]
+)
+STANCE_DECISIONS = REGISTRY.counter(
+    "claim_mapper_stance_decisions_total",
+    "Evidence stance decisions by source (model or keyword fallback).",
+    ["source"]
+)
+
+# Set once the process has finished warming up (retrieval/warmup.py); /ready
+# answers 503 until then.
+READY = threading.Event()
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+def write_textfile(path: Optional[str] = None):
+    """Write the current metrics to a file (node_exporter textfile format)."""
+    path = path or Config.METRICS_FILE
+    if not REGISTRY.enabled or not path:
+        return
+    path = Path(path)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/ready":
+            ready = READY.is_set()
+            body = b"ready\n" if ready else b"warming up\n"
+            self.send_response(200 if ready else 503)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+        elif path == "/metrics":
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self.send_error(404)
+            return
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port: Optional[int] = None, host: str = "127.0.0.1"):
+    """Serve /metrics and /ready from a daemon thread. Safe to call more than once."""
+    global _server
+    if not REGISTRY.enabled:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port or Config.METRICS_PORT),
+                                          _MetricsHandler)
+            thread = threading.Thread(target=_server.serve_forever, daemon=True)
+            thread.start()
+            print(f"Serving metrics on http://{host}:{_server.server_port}/metrics")
+    return _server
@@ -1,9 +1,9 @@
 
-from typing import List
+from typing import Iterable, List
 from models.paper import Paper
 from arxiv_fetcher.arxiv_client import SmartArxivFetcher
 from pipeline.ingestion_pipeline import IngestionPipeline
-from storage.qdrant_manager import QdrantManager
+from storage.qdrant_manager import MODEL_REGISTRY, QdrantManager
 
 class AutoIngestionPipeline:
     """
@@ -30,11 +30,9 @@ class AutoIngestionPipeline:
      
         if force_refetch or self._should_fetch_papers(query):
             print("\n📥 Fetching papers from arXiv...")
-            papers = self.arxiv_fetcher.fetch_relevant_papers(query, num_papers)
+            result = self.ingest_pages(self.arxiv_fetcher.iter_relevant_pages(query, num_papers))
             
-            if papers:
-                print(f"\n⚙️  Processing {len(papers)} papers...")
-                result = self.ingestion_pipeline.process_papers(papers)
+            if result['papers_count']:
                 print(f"\n✓ Added {result['claims_count']} claims and "
                       f"{result['evidence_count']} evidence to database")
             else:
@@ -56,6 +54,8 @@ class AutoIngestionPipeline:
         try:
             collections = self.qdrant.client.get_collections().collections
             for col in collections:
+                if col.name == MODEL_REGISTRY:
+                    continue
                 info = self.qdrant.client.get_collection(col.name)
                 if info.points_count > 0:
                     return False
@@ -63,9 +63,30 @@ class AutoIngestionPipeline:
         except:
             return True
     
-    def fetch_and_ingest_by_topic(self, topic: str, num_papers: int = 10):
-        """Fetch papers on a specific topic and ingest them."""
-        papers = self.arxiv_fetcher.fetch_relevant_papers(topic, num_papers)
-        if papers:
-            return self.ingestion_pipeline.process_papers(papers)
-        return None
\ No newline at end of file
+    def ingest_pages(self, pages: Iterable[List[Paper]]) -> dict:
+        """
+        Ingest pages of papers as they arrive. Each page goes through the
+        full pipeline while the fetcher downloads the next ones, and is
+        dropped afterwards, so memory stays bounded by the prefetch depth.
+        """
+        totals = {'papers_count': 0, 'claims_count': 0, 'evidence_count': 0, 'pages': 0}
+        for page in pages:
+            if not page:
+                continue
+            print(f"\n⚙️  Processing page {totals['pages'] + 1} ({len(page)} papers)...")
+            result = self.ingestion_pipeline.process_papers(page)
+            totals['pages'] += 1
+            totals['papers_count'] += len(page)
+            totals['claims_count'] += result['claims_count']
+            totals['evidence_count'] += result['evidence_count']
+        return totals
+    
+    def fetch_and_ingest_by_topic(self, topic: str, num_papers: int = 10) -> dict:
+        """Fetch papers on a specific topic and ingest them page by page."""
+        return self.ingest_pages(self.arxiv_fetcher.iter_relevant_pages(topic, num_papers))
+    
+    def fetch_by_arxiv_category(self, category: str, num_papers: int = 10) -> dict:
+        """Fetch the most recently updated papers of an arXiv category and ingest them."""
+        return self.ingest_pages(
+            self.arxiv_fetcher.client.iter_category_pages(category, num_papers)
+        )
\ No newline at end of file
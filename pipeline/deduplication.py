@@ -0,0 +1,145 @@
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import numpy as np
+from config import Config
+from models.batch import SentenceBatch
+from storage.qdrant_manager import QdrantManager, point_id
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _numbers(text: str) -> Tuple[str, ...]:
+    return tuple(sorted(_NUMBER.findall(text)))
+
+
+class MinHasher:
+    """MinHash signatures over word 3-shingles."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        tokens = re.findall(r'\w+', text.lower())
+        if len(tokens) >= 3:
+            shingles = {" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)}
+        else:
+            shingles = {" ".join(tokens)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        permuted = (hashes[:, None] * self.a + self.b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+
+class Deduplicator:
+    """
+    Near-duplicate suppression for freshly embedded batches.
+
+    Duplicates inside the batch are found with MinHash LSH, duplicates of
+    already indexed points with a batched cosine search against Qdrant. Either
+    way a pair only counts when cosine similarity, estimated Jaccard
+    similarity and the numbers in both sentences all agree, so results that
+    differ only in their figures are never collapsed. In "merge" mode the
+    duplicate's paper is added to the surviving point's `source_papers`; in
+    "skip" mode it is simply dropped.
+    """
+
+    def __init__(self, qdrant: QdrantManager, mode: str = None,
+                 cosine_threshold: float = None, jaccard_threshold: float = None,
+                 bands: int = 16):
+        self.qdrant = qdrant
+        self.mode = mode or Config.DEDUP_MODE
+        if self.mode not in ("off", "skip", "merge"):
+            raise ValueError(f"Unknown dedup mode: {self.mode}")
+        self.cosine_threshold = cosine_threshold or Config.DEDUP_COSINE_THRESHOLD
+        self.jaccard_threshold = jaccard_threshold or Config.DEDUP_JACCARD_THRESHOLD
+        self.hasher = MinHasher()
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+
+    def deduplicate(self, batch: SentenceBatch) -> Tuple[SentenceBatch, Dict]:
+        """Return the rows to store and dedup statistics."""
+        stats = {'input': len(batch), 'within_batch': 0, 'existing': 0}
+        if self.mode == "off" or not len(batch):
+            stats['kept'] = len(batch)
+            stats['ratio'] = 0.0
+            return batch, stats
+
+        signatures = np.stack([self.hasher.signature(text) for text in batch.texts])
+        duplicate_of = self._within_batch(batch, signatures)
+        survivors = [i for i in range(len(batch)) if i not in duplicate_of]
+        stats['within_batch'] = len(duplicate_of)
+        if self.mode == "merge":
+            for dup, canonical in duplicate_of.items():
+                batch.add_source(canonical, batch.paper_id(dup))
+
+        kept = self._against_existing(batch, signatures, survivors, stats)
+        stats['kept'] = len(kept)
+        stats['ratio'] = 1 - len(kept) / len(batch)
+        return batch.select(kept), stats
+
+    def _agree(self, text: str, signature: np.ndarray, other_text: str,
+               other_signature: np.ndarray, cosine: float) -> bool:
+        jaccard = float(np.mean(signature == other_signature))
+        return (cosine >= self.cosine_threshold and jaccard >= self.jaccard_threshold
+                and _numbers(text) == _numbers(other_text))
+
+    def _within_batch(self, batch: SentenceBatch, signatures: np.ndarray) -> Dict[int, int]:
+        vectors = batch.embeddings / np.clip(
+            np.linalg.norm(batch.embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        buckets = defaultdict(list)
+        duplicate_of: Dict[int, int] = {}
+        for i, signature in enumerate(signatures):
+            candidates = set()
+            for band in range(self.bands):
+                key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                candidates.update(buckets[key])
+                buckets[key].append(i)
+            for j in sorted(candidates):
+                if j in duplicate_of:
+                    continue
+                cosine = float(vectors[i] @ vectors[j])
+                if self._agree(batch.texts[i], signatures[i], batch.texts[j],
+                               signatures[j], cosine):
+                    duplicate_of[i] = j
+                    break
+        return duplicate_of
+
+    def _against_existing(self, batch: SentenceBatch, signatures: np.ndarray,
+                          rows: List[int], stats: Dict) -> List[int]:
+        if not rows:
+            return rows
+        matches = self.qdrant.find_near_duplicates(
+            batch.kind, batch.embeddings[rows], self.cosine_threshold
+        )
+        # Cosine alone is not enough: confirm against the stored sentence text.
+        existing = self.qdrant.sidecar.fetch(
+            batch.kind, list({match[0].id for match in matches if match is not None})
+        )
+        kept = []
+        merges = defaultdict(set)
+        for row, match in zip(rows, matches):
+            if match is None or match[0].id == point_id(batch.ids[row]):
+                kept.append(row)
+                continue
+            hit, collection = match
+            stored = existing.get(hit.id)
+            if stored is None or not self._agree(
+                    batch.texts[row], signatures[row], stored['text'],
+                    self.hasher.signature(stored['text']), hit.score):
+                kept.append(row)
+                continue
+            stats['existing'] += 1
+            if self.mode == "merge":
+                merges[(collection, hit.id)].update(batch.source_papers(row))
+                merges[(collection, hit.id)].update(hit.payload.get('source_papers')
+                                                    or [hit.payload['paper_id']])
+        for (collection, existing_id), papers in merges.items():
+            self.qdrant.set_source_papers(batch.kind, collection, existing_id, sorted(papers))
+        return kept
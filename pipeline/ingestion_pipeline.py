@@ -1,50 +1,111 @@
 from typing import List
 from models.paper import Paper
+from models.batch import SentenceBatch
 from extractors.claim_extractor import ClaimExtractor
 from extractors.evidence_extractor import EvidenceExtractor
 from embeddings.embedding_service import EmbeddingService
 from storage.qdrant_manager import QdrantManager
+from pipeline.deduplication import Deduplicator
+from storage.bm25_index import BM25Index
+from retrieval.knn_graph import ClaimEvidenceGraph
+from storage.numeric_index import NumericIndex
+from monitoring.metrics import STAGE_SECONDS
+from config import Config
 from tqdm import tqdm
 
 class IngestionPipeline:
     def __init__(self):
         self.claim_extractor = ClaimExtractor()
         self.evidence_extractor = EvidenceExtractor()
-        self.embedder = EmbeddingService()
+        self.embedder = EmbeddingService(pool_workers=Config.EMBEDDING_POOL_WORKERS)
         self.qdrant = QdrantManager()
+        self.deduplicator = Deduplicator(self.qdrant)
+        self.bm25 = BM25Index() if Config.HYBRID_SEARCH else None
+        self.knn_graph = ClaimEvidenceGraph() if Config.KNN_GRAPH else None
+        self.numeric_index = NumericIndex() if Config.NUMERIC_INDEX else None
     
     def process_papers(self, papers: List[Paper]):
         """Process a batch of papers end-to-end."""
         print(f"\nProcessing {len(papers)} papers...")
         
-        all_claims = []
-        all_evidence = []
+        all_claims = SentenceBatch('claim')
+        all_evidence = SentenceBatch('evidence')
         
-        for paper in tqdm(papers, desc="Extracting claims and evidence"):
-     
-            claims = self.claim_extractor.extract_claims(paper)
-            all_claims.extend(claims)
-            
-      
-            evidence = self.evidence_extractor.extract_evidence(paper)
-            all_evidence.extend(evidence)
+        with STAGE_SECONDS.time(stage="ingest_extract"):
+            for paper in tqdm(papers, desc="Extracting claims and evidence"):
+         
+                self.claim_extractor.extract_claims_into(paper, all_claims)
+                
+          
+                self.evidence_extractor.extract_evidence_into(paper, all_evidence)
         
+        # Section text and rule-set versions let a rule change be re-applied
+        # without re-ingesting (see pipeline/reextraction.py).
+        self.qdrant.sidecar.put_sections(
+            papers, self.claim_extractor.SECTIONS + self.evidence_extractor.SECTIONS
+        )
         print(f"\nExtracted {len(all_claims)} claims and {len(all_evidence)} evidence statements")
         
   
         print("\nGenerating embeddings...")
-        all_claims = self.embedder.encode_claims(all_claims)
-        all_evidence = self.embedder.encode_evidence(all_evidence)
+        self.check_model()
+        with STAGE_SECONDS.time(stage="ingest_embed"):
+            self.embedder.encode_batch(all_claims)
+            self.embedder.encode_batch(all_evidence)
         
     
-        print("\nStoring in Qdrant...")
-        if all_claims:
-            self.qdrant.store_claims(all_claims)
-        if all_evidence:
-            self.qdrant.store_evidence(all_evidence)
+        with STAGE_SECONDS.time(stage="ingest_dedup"):
+            all_claims, claim_stats = self.deduplicator.deduplicate(all_claims)
+            all_evidence, evidence_stats = self.deduplicator.deduplicate(all_evidence)
+        duplicates = (claim_stats['input'] - claim_stats['kept'] +
+                      evidence_stats['input'] - evidence_stats['kept'])
+        total = claim_stats['input'] + evidence_stats['input']
+        dedup_ratio = duplicates / total if total else 0.0
+        if self.deduplicator.mode != "off":
+            print(f"\nDeduplicated ({self.deduplicator.mode}): dropped "
+                  f"{claim_stats['input'] - claim_stats['kept']} claims and "
+                  f"{evidence_stats['input'] - evidence_stats['kept']} evidence "
+                  f"({dedup_ratio:.1%} of extracted sentences)")
+        
+        self.store(all_claims, all_evidence)
+        paper_ids = [paper.paper_id for paper in papers]
+        self.qdrant.sidecar.set_extracted('claim', paper_ids, self.claim_extractor.rules_version)
+        self.qdrant.sidecar.set_extracted('evidence', paper_ids,
+                                          self.evidence_extractor.rules_version)
         
         print("\n✓ Pipeline complete!")
         return {
             'claims_count': len(all_claims),
-            'evidence_count': len(all_evidence)
-        }
\ No newline at end of file
+            'evidence_count': len(all_evidence),
+            'dedup': {'claims': claim_stats, 'evidence': evidence_stats},
+            'dedup_ratio': dedup_ratio
+        }
+    
+    def check_model(self):
+        """Refuse to write vectors from a different model than the collections hold."""
+        model = self.qdrant.active_model(Config.CLAIMS_COLLECTION)
+        if model and model != self.embedder.model_name:
+            raise RuntimeError(
+                f"Collections were migrated to {model}; restart ingestion with "
+                f"EMBEDDING_MODEL={model}"
+            )
+    
+    def store(self, all_claims: SentenceBatch, all_evidence: SentenceBatch):
+        """Write embedded, deduplicated batches to Qdrant and every derived index."""
+        print("\nStoring in Qdrant...")
+        with STAGE_SECONDS.time(stage="ingest_store"):
+            if len(all_claims):
+                self.qdrant.store_batch(all_claims)
+            if len(all_evidence):
+                self.qdrant.store_batch(all_evidence)
+        if self.bm25 is not None:
+            with STAGE_SECONDS.time(stage="ingest_bm25"):
+                self.bm25.add_batch(all_claims)
+                self.bm25.add_batch(all_evidence)
+        if self.knn_graph is not None and self.knn_graph.built:
+            with STAGE_SECONDS.time(stage="ingest_knn_graph"):
+                self.knn_graph.add_batches(self.qdrant, all_claims, all_evidence)
+        if self.numeric_index is not None and len(all_evidence):
+            with STAGE_SECONDS.time(stage="ingest_numeric"):
+                count = self.numeric_index.add_batch(all_evidence)
+            print(f"✓ Indexed {count} numeric results")
\ No newline at end of file
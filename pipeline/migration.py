@@ -0,0 +1,173 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+from qdrant_client.models import Batch
+from config import Config
+from embeddings.embedding_service import EmbeddingService
+from storage.qdrant_manager import QdrantManager, physical_collection_name
+from storage.sidecar import slim_payload
+
+
+class EmbeddingMigration:
+    """
+    Re-embed both collections with a new model without taking queries offline.
+
+    Points are scrolled from the live collections (behind their aliases),
+    re-embedded in streaming batches and written with the same ids into
+    shadow collections. Progress is checkpointed after every batch so an
+    interrupted run resumes where it stopped. Queries keep hitting the old
+    collections until `cutover()` swaps both aliases.
+    """
+
+    def __init__(self, new_model: str, batch_size: int = 256,
+                 checkpoint_path: Path = None):
+        self.new_model = new_model
+        self.batch_size = batch_size
+        self.qdrant = QdrantManager()
+        self.embedder = EmbeddingService(new_model, backend=Config.EMBEDDING_BACKEND)
+        self.checkpoint_path = Path(
+            checkpoint_path or Config.DATA_DIR / f"migration_{self._slug()}.json"
+        )
+        self.checkpoint = self._load_checkpoint()
+
+    def _slug(self) -> str:
+        return physical_collection_name("", self.new_model).lstrip("_")
+
+    def shadow_name(self, alias: str) -> str:
+        return physical_collection_name(alias, self.new_model)
+
+    def run(self, cutover: bool = True) -> Dict[str, int]:
+        counts = {}
+        for kind, alias in self._aliases():
+            shadow = self.shadow_name(alias)
+            if self.qdrant.resolve(alias) == shadow:
+                print(f"✓ {alias} already served by {shadow}")
+                continue
+            self._ensure_shadow(shadow)
+            counts[alias] = self._copy(kind, alias, shadow)
+            counts[alias] += self._catch_up(kind, alias, shadow)
+        if cutover:
+            self.cutover()
+        return counts
+
+    def _aliases(self) -> List[Tuple[str, str]]:
+        """(kind, alias) for claims, the base evidence collection and every evidence shard."""
+        return [(kind, alias) for kind in ('claim', 'evidence')
+                for alias in self.qdrant.collections_for(kind)]
+
+    def _ensure_shadow(self, shadow: str):
+        existing = {c.name for c in self.qdrant.client.get_collections().collections}
+        if shadow not in existing:
+            self.qdrant.create_collection(shadow, self.embedder.dimension,
+                                          model_name=self.new_model)
+            print(f"Created shadow collection: {shadow}")
+
+    def _copy(self, kind: str, alias: str, shadow: str) -> int:
+        """Main pass: scroll the live collection from the last checkpoint."""
+        state = self.checkpoint.setdefault(alias, {"offset": None, "done": False, "count": 0})
+        if state["done"]:
+            return 0
+        print(f"\nRe-embedding {alias} into {shadow}...")
+        offset = state["offset"]
+        while True:
+            points, offset = self.qdrant.client.scroll(
+                collection_name=alias,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            skipped = self._reembed(kind, shadow, points)
+            state["count"] += len(points) - skipped
+            state["skipped"] = state.get("skipped", 0) + skipped
+            state["offset"] = offset
+            state["done"] = offset is None
+            self._save_checkpoint()
+            print(f"   {state['count']} points", end="\r")
+            if offset is None:
+                break
+        print(f"   ✓ {state['count']} points")
+        if state.get("skipped"):
+            print(f"⚠️  {state['skipped']} points have no sidecar text and were not re-embedded")
+        return state["count"]
+
+    def _catch_up(self, kind: str, alias: str, shadow: str) -> int:
+        """Copy points ingested into the live collection after the main pass passed them."""
+        added = skipped = 0
+        offset = None
+        while True:
+            points, offset = self.qdrant.client.scroll(
+                collection_name=alias,
+                limit=self.batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            present = {p.id for p in self.qdrant.client.retrieve(
+                shadow, ids=[p.id for p in points], with_payload=False, with_vectors=False
+            )}
+            missing = [p for p in points if p.id not in present]
+            missed = self._reembed(kind, shadow, missing)
+            added += len(missing) - missed
+            skipped += missed
+            if offset is None:
+                break
+        if added:
+            print(f"   ✓ caught up {added} points ingested during the migration")
+        if skipped:
+            print(f"⚠️  {skipped} late points have no sidecar text and were not re-embedded")
+        return added
+
+    def _reembed(self, kind: str, shadow: str, points: List) -> int:
+        """Re-embed points into the shadow collection; returns how many had no text."""
+        if not points:
+            return 0
+        hydrated = [(p, payload) for p, payload in zip(points, self.qdrant.hydrate(kind, points))
+                    if 'text' in payload]
+        skipped = len(points) - len(hydrated)
+        if not hydrated:
+            return skipped
+        points, payloads = [list(column) for column in zip(*hydrated)]
+        # Move any pre-sidecar payloads into the sidecar on the way through.
+        self.qdrant.sidecar.put(kind, [(p.id, payload) for p, payload in zip(points, payloads)
+                                       if 'paper_title' in p.payload])
+        vectors = self.embedder.encode([payload['text'] for payload in payloads])
+        self.qdrant.client.upsert(
+            collection_name=shadow,
+            points=Batch(
+                ids=[p.id for p in points],
+                vectors=vectors.tolist(),
+                payloads=[slim_payload(payload) for payload in payloads]
+            )
+        )
+        return skipped
+
+    def cutover(self):
+        """Point both aliases at the shadow collections in one atomic update."""
+        mapping = {}
+        for _, alias in self._aliases():
+            if not self.checkpoint.get(alias, {}).get("done") and \
+                    self.qdrant.resolve(alias) != self.shadow_name(alias):
+                raise RuntimeError(f"{alias} has not been fully re-embedded yet")
+            mapping[alias] = self.shadow_name(alias)
+        previous = {alias: self.qdrant.resolve(alias) for alias in mapping}
+        self.qdrant.swap_aliases(mapping)
+        for alias, shadow in mapping.items():
+            print(f"✓ {alias} -> {shadow} (previous: {previous[alias]})")
+        print(f"\nRunning retrievers switch to {self.new_model} on their next model check; "
+              f"set EMBEDDING_MODEL={self.new_model} EMBEDDING_DIM={self.embedder.dimension} "
+              f"for new processes.")
+
+    def _load_checkpoint(self) -> Dict:
+        if self.checkpoint_path.exists():
+            checkpoint = json.loads(self.checkpoint_path.read_text())
+            print(f"Resuming migration from {self.checkpoint_path}")
+            return checkpoint
+        return {}
+
+    def _save_checkpoint(self):
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.checkpoint))
+        os.replace(tmp_path, self.checkpoint_path)
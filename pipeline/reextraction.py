@@ -0,0 +1,105 @@
+from typing import Dict, List
+from models.batch import KINDS, SentenceBatch
+from models.paper import Paper
+from extractors.ruleset import sentence_hash
+from monitoring.metrics import STAGE_SECONDS
+from pipeline.ingestion_pipeline import IngestionPipeline
+from storage.qdrant_manager import point_id
+
+
+class ReExtraction:
+    """
+    Re-apply changed extractor rules to already-ingested papers.
+
+    Every stored sentence carries the rule-set version that produced it and
+    a hash of its text, and the sidecar keeps the section text of ingested
+    papers. For each kind whose rule set changed, the stored sections of
+    papers extracted with an older version are run through the current
+    extractor and diffed against what is stored: only new or changed
+    sentences are embedded and upserted, sentences that disappeared are
+    deleted from Qdrant and every derived index, and unchanged ones just
+    get the new version tag.
+    """
+
+    def __init__(self, pipeline: IngestionPipeline = None, papers_per_batch: int = 200):
+        self.pipeline = pipeline or IngestionPipeline()
+        self.qdrant = self.pipeline.qdrant
+        self.sidecar = self.qdrant.sidecar
+        self.papers_per_batch = papers_per_batch
+
+    def run(self, kinds=KINDS) -> Dict[str, Dict[str, int]]:
+        self.pipeline.check_model()
+        return {kind: self._run_kind(kind) for kind in kinds}
+
+    def _extractor(self, kind: str):
+        if kind == 'claim':
+            extractor = self.pipeline.claim_extractor
+            return extractor.rules_version, extractor.extract_claims_into
+        extractor = self.pipeline.evidence_extractor
+        return extractor.rules_version, extractor.extract_evidence_into
+
+    def _run_kind(self, kind: str) -> Dict[str, int]:
+        version, extract_into = self._extractor(kind)
+        papers = self.sidecar.stale_papers(kind, version)
+        unsectioned = self.sidecar.unsectioned_papers(kind)
+        if unsectioned:
+            print(f"⚠️  {unsectioned} papers with stored {kind}s have no section text "
+                  f"(ingested or restored from a snapshot before it was kept); "
+                  f"re-ingest them to re-extract")
+        stats = {'papers': len(papers), 'embedded': 0, 'removed': 0, 'unchanged': 0}
+        if not papers:
+            print(f"✓ {kind} rules unchanged ({version})")
+            return stats
+
+        print(f"\nRe-extracting {kind}s from {len(papers)} papers with rules {version}...")
+        for start in range(0, len(papers), self.papers_per_batch):
+            chunk = papers[start:start + self.papers_per_batch]
+            for key, count in self._apply(kind, chunk, extract_into, version).items():
+                stats[key] += count
+            self.sidecar.set_extracted(kind, [paper.paper_id for paper in chunk], version)
+        print(f"✓ {kind}: {stats['embedded']} embedded, {stats['removed']} removed, "
+              f"{stats['unchanged']} unchanged")
+        return stats
+
+    def _apply(self, kind: str, papers: List[Paper], extract_into, version: str) -> Dict[str, int]:
+        batch = SentenceBatch(kind)
+        with STAGE_SECONDS.time(stage="reextract_extract"):
+            for paper in papers:
+                extract_into(paper, batch)
+
+        stored = self.sidecar.sentence_hashes(kind, [paper.paper_id for paper in papers])
+        ids = [point_id(item_id) for item_id in batch.ids]
+        changed, unchanged = [], []
+        for i, (pid, text) in enumerate(zip(ids, batch.texts)):
+            (unchanged if stored.get(pid) == sentence_hash(text) else changed).append(i)
+        removed = sorted(set(stored) - set(ids))
+        replaced = {ids[i] for i in changed if ids[i] in stored}
+
+        self.sidecar.retag(kind, [ids[i] for i in unchanged], version)
+        new = batch.select(changed)
+        if len(new):
+            with STAGE_SECONDS.time(stage="reextract_embed"):
+                self.pipeline.embedder.encode_batch(new)
+            new, _ = self.pipeline.deduplicator.deduplicate(new)
+        # A changed sentence that now dedups into another point must not keep its old text.
+        kept = {point_id(item_id) for item_id in new.ids}
+        removed += sorted(replaced - kept)
+        self._remove(kind, removed, sorted(replaced & kept))
+
+        if len(new):
+            empty = SentenceBatch('evidence' if kind == 'claim' else 'claim')
+            self.pipeline.store(*((new, empty) if kind == 'claim' else (empty, new)))
+        return {'embedded': len(changed), 'removed': len(removed), 'unchanged': len(unchanged)}
+
+    def _remove(self, kind: str, removed: List[int], replaced: List[int]):
+        """Delete vanished sentences everywhere; drop graph edges of rewritten ones."""
+        if removed:
+            self.qdrant.delete_points(kind, removed)
+            if self.pipeline.bm25 is not None:
+                self.pipeline.bm25.delete_documents(kind, removed)
+            if kind == 'evidence' and self.pipeline.numeric_index is not None:
+                self.pipeline.numeric_index.delete_documents(removed)
+        graph = self.pipeline.knn_graph
+        if graph is not None and graph.built and (removed or replaced):
+            gone = removed + replaced
+            graph.remove(gone if kind == 'claim' else [], gone if kind == 'evidence' else [])
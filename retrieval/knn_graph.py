@@ -0,0 +1,398 @@
+"""
+Precomputed claim -> evidence and claim -> claim nearest-neighbour graph.
+
+Every stored claim gets a fixed-width row of its top-k evidence (point id,
+cosine score, category) and top-k related claims. Rows are addressed by
+claim point id or by a hash of the normalised claim text, so answering a
+query for an indexed claim is a dict lookup plus one sidecar read.
+
+The graph lives in a single .npz file. `build()` computes it from the
+stored vectors with blocked matrix multiplication. `add_batches()` folds
+newly ingested claims and evidence into an existing graph.
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import Config
+from models.batch import SentenceBatch
+from retrieval.categorizer import EvidenceCategorizer
+from storage.qdrant_manager import QdrantManager, point_id
+
+CATEGORIES = ('supporting', 'contradicting', 'neutral')
+_UNKNOWN = 255
+
+
+def text_hash(text: str) -> int:
+    """Hash of case- and whitespace-normalised text."""
+    normalised = " ".join(text.lower().split()).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(normalised, digest_size=8).digest(), "big") >> 1
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(k: int, ids: np.ndarray, scores: np.ndarray, *columns: np.ndarray,
+           unique: bool = False) -> Tuple[np.ndarray, ...]:
+    """
+    Best-first top-k per row over candidate columns; `columns` are gathered
+    alongside. Empty slots come back as id -1 / score -inf. With `unique`,
+    repeated ids in a row keep only their first occurrence.
+    """
+    scores = scores.copy()
+    if unique:
+        order = np.argsort(ids, axis=1, kind='stable')
+        sorted_ids = np.take_along_axis(ids, order, axis=1)
+        repeated = np.zeros(ids.shape, dtype=bool)
+        repeated[:, 1:] = (sorted_ids[:, 1:] == sorted_ids[:, :-1]) & (sorted_ids[:, 1:] >= 0)
+        mask = np.empty_like(repeated)
+        np.put_along_axis(mask, order, repeated, axis=1)
+        scores[mask] = -np.inf
+
+    if scores.shape[1] > k:
+        picks = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        picks = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    picked_scores = np.take_along_axis(scores, picks, axis=1)
+    order = np.argsort(-picked_scores, axis=1, kind='stable')
+    picks = np.take_along_axis(picks, order, axis=1)
+
+    top_scores = np.take_along_axis(scores, picks, axis=1)
+    top_ids = np.where(np.isfinite(top_scores), np.take_along_axis(ids, picks, axis=1), -1)
+    return (top_ids, top_scores) + tuple(np.take_along_axis(c, picks, axis=1) for c in columns)
+
+
+def blocked_top_k(queries: np.ndarray, corpus: np.ndarray, k: int, block_size: int,
+                  self_offset: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k inner products of each query row against the corpus, computed one
+    (block_size x block_size) tile at a time so memory stays bounded.
+
+    Returns (corpus row indices, scores), each (len(queries), k). With
+    `self_offset`, query i is corpus row i + self_offset and is skipped.
+    """
+    n = len(queries)
+    top_idx = np.full((n, k), -1, dtype=np.int64)
+    top_scores = np.full((n, k), -np.inf, dtype=np.float32)
+    for qs in range(0, n, block_size):
+        q = queries[qs:qs + block_size]
+        idx, scores = top_idx[qs:qs + len(q)], top_scores[qs:qs + len(q)]
+        for cs in range(0, len(corpus), block_size):
+            sims = q @ corpus[cs:cs + block_size].T
+            if self_offset is not None:
+                first = max(qs + self_offset, cs)
+                last = min(qs + self_offset + len(q), cs + sims.shape[1])
+                same = np.arange(first, last)
+                sims[same - qs - self_offset, same - cs] = -np.inf
+            candidates = np.broadcast_to(np.arange(cs, cs + sims.shape[1]), sims.shape)
+            idx, scores = _top_k(k, np.concatenate([idx, candidates], axis=1),
+                                 np.concatenate([scores, sims], axis=1))
+        top_idx[qs:qs + len(q)] = idx
+        top_scores[qs:qs + len(q)] = scores
+    return top_idx, top_scores
+
+
+def _gather(ids: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """Map row indices (-1 = empty) to point ids."""
+    if not len(ids):
+        return np.full(idx.shape, -1, dtype=np.int64)
+    return np.where(idx >= 0, ids[np.maximum(idx, 0)], -1)
+
+
+class ClaimEvidenceGraph:
+    """
+    Fixed-k adjacency arrays from stored claims to their nearest evidence
+    and claims, with keyword-categorised evidence edges.
+    """
+
+    def __init__(self, path: Path = None, k: int = None):
+        self.path = Path(path or Config.KNN_GRAPH_PATH)
+        self.k = k or Config.KNN_GRAPH_K
+        self.block_size = Config.KNN_BLOCK_SIZE
+        self.categorizer = EvidenceCategorizer()
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._reset(0)
+        self.reload()
+
+    def _reset(self, dim: int):
+        self.model: Optional[str] = None
+        self.claim_ids = np.empty(0, dtype=np.int64)
+        self.text_hashes = np.empty(0, dtype=np.int64)
+        self.claim_vectors = np.empty((0, dim), dtype=np.float32)
+        self.evidence_ids = np.empty((0, self.k), dtype=np.int64)
+        self.evidence_scores = np.empty((0, self.k), dtype=np.float32)
+        self.categories = np.empty((0, self.k), dtype=np.uint8)
+        self.neighbor_ids = np.empty((0, self.k), dtype=np.int64)
+        self.neighbor_scores = np.empty((0, self.k), dtype=np.float32)
+        self._rows: Dict[int, int] = {}
+        self._by_text: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.claim_ids)
+
+    @property
+    def built(self) -> bool:
+        return self._mtime is not None
+
+    def reload(self):
+        """Load the graph file if it changed on disk since the last load."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        with np.load(self.path) as data:
+            self.model = str(data["model"]) or None
+            self.claim_ids = data["claim_ids"]
+            self.text_hashes = data["text_hashes"]
+            self.claim_vectors = data["claim_vectors"]
+            self.evidence_ids = data["evidence_ids"]
+            self.evidence_scores = data["evidence_scores"]
+            self.categories = data["categories"]
+            self.neighbor_ids = data["neighbor_ids"]
+            self.neighbor_scores = data["neighbor_scores"]
+        self.k = self.evidence_ids.shape[1]
+        self._index()
+        self._mtime = mtime
+
+    def _index(self):
+        self._rows = {pid: row for row, pid in enumerate(self.claim_ids.tolist())}
+        self._by_text = {h: row for row, h in enumerate(self.text_hashes.tolist())}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            model=np.array(self.model or ""),
+            claim_ids=self.claim_ids,
+            text_hashes=self.text_hashes,
+            claim_vectors=self.claim_vectors,
+            evidence_ids=self.evidence_ids,
+            evidence_scores=self.evidence_scores,
+            categories=self.categories,
+            neighbor_ids=self.neighbor_ids,
+            neighbor_scores=self.neighbor_scores
+        )
+        os.replace(tmp_path, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def row_for_claim(self, claim_point_id: int) -> Optional[int]:
+        self.reload()
+        return self._rows.get(claim_point_id)
+
+    def row_for_text(self, text: str) -> Optional[int]:
+        self.reload()
+        return self._by_text.get(text_hash(text))
+
+    def neighbours(self, row: int) -> Tuple[List[Tuple[int, float, str]], List[Tuple[int, float]]]:
+        """([(evidence_id, score, category)], [(claim_id, score)]) for a row, best first."""
+        evidence = [
+            (pid, score, CATEGORIES[category])
+            for pid, score, category in zip(self.evidence_ids[row].tolist(),
+                                            self.evidence_scores[row].tolist(),
+                                            self.categories[row].tolist())
+            if pid >= 0
+        ]
+        claims = [
+            (pid, score)
+            for pid, score in zip(self.neighbor_ids[row].tolist(),
+                                  self.neighbor_scores[row].tolist())
+            if pid >= 0
+        ]
+        return evidence, claims
+
+    def build(self, qdrant: QdrantManager):
+        """Recompute the whole graph from the vectors stored in Qdrant."""
+        print("Loading claim vectors...")
+        claim_ids, claim_vectors = self._load_vectors(qdrant, 'claim')
+        print("Loading evidence vectors...")
+        evidence_ids, evidence_vectors = self._load_vectors(qdrant, 'evidence')
+
+        with self._lock:
+            self._reset(claim_vectors.shape[1])
+            self.model = qdrant.active_model(Config.CLAIMS_COLLECTION) or Config.EMBEDDING_MODEL
+            print(f"Computing top-{self.k} evidence for {len(claim_ids)} claims "
+                  f"against {len(evidence_ids)} evidence...")
+            idx, self.evidence_scores = blocked_top_k(claim_vectors, evidence_vectors,
+                                                      self.k, self.block_size)
+            self.evidence_ids = _gather(evidence_ids, idx)
+            self.categories = np.full(idx.shape, _UNKNOWN, dtype=np.uint8)
+
+            print("Computing related claims...")
+            idx, self.neighbor_scores = blocked_top_k(claim_vectors, claim_vectors,
+                                                      self.k, self.block_size, self_offset=0)
+            self.neighbor_ids = _gather(claim_ids, idx)
+
+            self.claim_ids = claim_ids
+            self.claim_vectors = claim_vectors
+            claim_text = qdrant.sidecar.fetch('claim', claim_ids.tolist())
+            self.text_hashes = np.array(
+                [text_hash(claim_text[pid]['text']) if pid in claim_text else -1
+                 for pid in claim_ids.tolist()],
+                dtype=np.int64
+            )
+            self._index()
+            print("Categorising evidence edges...")
+            self._fill_categories(qdrant, {}, claim_text)
+            self.save()
+        print(f"✓ Graph built: {len(self)} claims, k={self.k}")
+
+    def add_batches(self, qdrant: QdrantManager, claims: SentenceBatch,
+                    evidence: SentenceBatch):
+        """Fold freshly stored (embedded) claim and evidence batches into the graph."""
+        with self._lock:
+            self.reload()
+            evidence_text = {}
+            if len(evidence) and len(self):
+                evidence_text = self._add_evidence(evidence)
+            if len(claims):
+                self._add_claims(qdrant, claims)
+            self._fill_categories(qdrant, evidence_text, {})
+            self.save()
+
+    def remove(self, claim_ids: List[int], evidence_ids: List[int]):
+        """
+        Drop the rows of removed claims and the edges pointing at removed
+        claims or evidence. Rows are not refilled, so they can hold fewer
+        than k neighbours until the next build().
+        """
+        with self._lock:
+            self.reload()
+            if not len(self):
+                return
+            keep = ~np.isin(self.claim_ids, np.asarray(claim_ids, dtype=np.int64))
+            for name in ('claim_ids', 'text_hashes', 'claim_vectors', 'evidence_ids',
+                         'evidence_scores', 'categories', 'neighbor_ids', 'neighbor_scores'):
+                setattr(self, name, getattr(self, name)[keep])
+
+            scores = np.where(np.isin(self.evidence_ids, evidence_ids), -np.inf,
+                              self.evidence_scores).astype(np.float32)
+            self.evidence_ids, self.evidence_scores, self.categories = _top_k(
+                self.k, self.evidence_ids, scores, self.categories
+            )
+            scores = np.where(np.isin(self.neighbor_ids, claim_ids), -np.inf,
+                              self.neighbor_scores).astype(np.float32)
+            self.neighbor_ids, self.neighbor_scores = _top_k(self.k, self.neighbor_ids, scores)
+            self._index()
+            self.save()
+
+    def _add_evidence(self, batch: SentenceBatch) -> Dict[int, str]:
+        """Merge new evidence into every existing claim's row."""
+        new_ids = np.array([point_id(item_id) for item_id in batch.ids], dtype=np.int64)
+        idx, scores = blocked_top_k(self.claim_vectors, _normalize(batch.embeddings),
+                                    self.k, self.block_size)
+        self.evidence_ids, self.evidence_scores, self.categories = _top_k(
+            self.k,
+            np.concatenate([self.evidence_ids, _gather(new_ids, idx)], axis=1),
+            np.concatenate([self.evidence_scores, scores], axis=1),
+            np.concatenate([self.categories,
+                            np.full(idx.shape, _UNKNOWN, dtype=np.uint8)], axis=1),
+            unique=True
+        )
+        return dict(zip(new_ids.tolist(), batch.texts))
+
+    def _add_claims(self, qdrant: QdrantManager, batch: SentenceBatch):
+        """Add rows for new claims and merge them into existing related-claim rows."""
+        keep = [i for i, item_id in enumerate(batch.ids) if point_id(item_id) not in self._rows]
+        if not keep:
+            return
+        new_ids = np.array([point_id(batch.ids[i]) for i in keep], dtype=np.int64)
+        vectors = _normalize(batch.embeddings[keep])
+        if not len(self):
+            self._reset(vectors.shape[1])
+            self.model = qdrant.active_model(Config.CLAIMS_COLLECTION) or Config.EMBEDDING_MODEL
+
+        # Evidence rows for the new claims come straight from the index.
+        hits = qdrant.search_batch('evidence', vectors, self.k)
+        evidence_ids = np.full((len(keep), self.k), -1, dtype=np.int64)
+        evidence_scores = np.full((len(keep), self.k), -np.inf, dtype=np.float32)
+        for row, row_hits in enumerate(hits):
+            evidence_ids[row, :len(row_hits)] = [hit.id for hit in row_hits]
+            evidence_scores[row, :len(row_hits)] = [hit.score for hit in row_hits]
+
+        old_count = len(self)
+        if old_count:
+            idx, scores = blocked_top_k(self.claim_vectors, vectors, self.k, self.block_size)
+            self.neighbor_ids, self.neighbor_scores = _top_k(
+                self.k,
+                np.concatenate([self.neighbor_ids, _gather(new_ids, idx)], axis=1),
+                np.concatenate([self.neighbor_scores, scores], axis=1),
+                unique=True
+            )
+
+        self.claim_ids = np.concatenate([self.claim_ids, new_ids])
+        self.claim_vectors = np.concatenate([self.claim_vectors, vectors])
+        idx, neighbor_scores = blocked_top_k(vectors, self.claim_vectors, self.k,
+                                             self.block_size, self_offset=old_count)
+        self.neighbor_ids = np.concatenate([self.neighbor_ids, _gather(self.claim_ids, idx)])
+        self.neighbor_scores = np.concatenate([self.neighbor_scores, neighbor_scores])
+        self.evidence_ids = np.concatenate([self.evidence_ids, evidence_ids])
+        self.evidence_scores = np.concatenate([self.evidence_scores, evidence_scores])
+        self.categories = np.concatenate([
+            self.categories, np.full(evidence_ids.shape, _UNKNOWN, dtype=np.uint8)
+        ])
+        self.text_hashes = np.concatenate([
+            self.text_hashes,
+            np.array([text_hash(batch.texts[i]) for i in keep], dtype=np.int64)
+        ])
+        self._index()
+
+    def _fill_categories(self, qdrant: QdrantManager, evidence_text: Dict[int, str],
+                         claim_rows: Dict[int, Dict]):
+        """Categorise every evidence edge still marked unknown."""
+        rows = np.nonzero((self.categories == _UNKNOWN).any(axis=1))[0]
+        if not len(rows):
+            return
+        missing_claims = [pid for pid in self.claim_ids[rows].tolist() if pid not in claim_rows]
+        claim_rows = {**claim_rows, **qdrant.sidecar.fetch('claim', missing_claims)}
+
+        wanted = set(self.evidence_ids[rows][self.categories[rows] == _UNKNOWN].tolist())
+        wanted.discard(-1)
+        missing = [pid for pid in wanted if pid not in evidence_text]
+        evidence_text = {**evidence_text,
+                         **{pid: row['text'] for pid, row in
+                            qdrant.sidecar.fetch('evidence', missing).items()}}
+
+        neutral = CATEGORIES.index('neutral')
+        for row in rows.tolist():
+            claim = claim_rows.get(int(self.claim_ids[row]))
+            for col in np.nonzero(self.categories[row] == _UNKNOWN)[0].tolist():
+                pid = int(self.evidence_ids[row, col])
+                if claim is None or pid not in evidence_text:
+                    self.categories[row, col] = neutral
+                    continue
+                category = self.categorizer.categorize(claim['text'], evidence_text[pid])
+                self.categories[row, col] = CATEGORIES.index(category)
+
+    def _load_vectors(self, qdrant: QdrantManager, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+        ids: List[int] = []
+        vectors: List[List[float]] = []
+        seen = set()
+        for collection in qdrant.collections_for(kind):
+            offset = None
+            while True:
+                points, offset = qdrant.client.scroll(
+                    collection_name=collection,
+                    limit=1024,
+                    offset=offset,
+                    with_payload=False,
+                    with_vectors=True
+                )
+                for point in points:
+                    if point.id not in seen:
+                        seen.add(point.id)
+                        ids.append(point.id)
+                        vectors.append(point.vector)
+                if offset is None:
+                    break
+        dim = len(vectors[0]) if vectors else Config.EMBEDDING_DIM
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), dim))
+        return np.asarray(ids, dtype=np.int64), matrix
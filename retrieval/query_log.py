@@ -0,0 +1,86 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+from config import Config
+
+_EMAIL = re.compile(r'\b[\w.+-]+@[\w-]+\.[\w.-]+\b')
+_URL = re.compile(r'\bhttps?://\S+|\bwww\.\S+', re.IGNORECASE)
+# Long digit runs (phone numbers, account or ticket ids); metric values are kept.
+_LONG_NUMBER = re.compile(r'\b\d[\d\s-]{6,}\d\b')
+
+
+def anonymise(query: str) -> str:
+    """Strip e-mail addresses, URLs and long digit runs, and normalise whitespace."""
+    query = _EMAIL.sub("<email>", query)
+    query = _URL.sub("<url>", query)
+    query = _LONG_NUMBER.sub("<number>", query)
+    return " ".join(query.split())
+
+
+class QueryLog:
+    """
+    Rolling JSONL log of anonymised queries.
+
+    Lines hold the query, its filters and an hour-rounded timestamp; no user
+    or session data is written. When the file passes QUERY_LOG_MAX_BYTES it
+    is rotated to "<name>.1", replacing the previous rotation. The format is
+    what benchmarks/load_test.py replays.
+    """
+
+    def __init__(self, path: Path = None, max_bytes: int = None):
+        self.path = Path(path or Config.QUERY_LOG_PATH)
+        self.max_bytes = max_bytes or Config.QUERY_LOG_MAX_BYTES
+        self._lock = threading.Lock()
+
+    @property
+    def rotated_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".1")
+
+    def append(self, query: str, group_by_paper: bool = False, **filters):
+        entry = {"ts": int(time.time()) // 3600 * 3600, "query": anonymise(query)}
+        entry.update({key: value for key, value in filters.items() if value})
+        if group_by_paper:
+            entry["group_by_paper"] = True
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                size = f.tell()
+            if size > self.max_bytes:
+                os.replace(self.path, self.rotated_path)
+
+    def entries(self, since: float = 0) -> List[Dict]:
+        """Logged entries newer than `since` (epoch seconds), oldest first."""
+        entries = []
+        with self._lock:
+            for path in (self.rotated_path, self.path):
+                if not path.exists():
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # partial line from an interrupted write
+                        if entry.get("ts", 0) >= since:
+                            entries.append(entry)
+        return entries
+
+    def most_frequent(self, n: int, window_days: float = None) -> List[Dict]:
+        """The `n` most frequent distinct (query, filters) entries of the recent window."""
+        window_days = Config.WARMUP_WINDOW_DAYS if window_days is None else window_days
+        since = time.time() - window_days * 86400
+        counts = Counter()
+        latest = {}
+        for entry in self.entries(since):
+            entry = {key: value for key, value in entry.items() if key != "ts"}
+            key = json.dumps(entry, sort_keys=True)
+            counts[key] += 1
+            latest[key] = entry
+        return [latest[key] for key, _ in counts.most_common(n)]
@@ -1,63 +1,387 @@
-from typing import Dict, List
-from storage.qdrant_manager import QdrantManager
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+from storage.qdrant_manager import QdrantManager, payload_matches, point_id
+from storage.bm25_index import BM25Index, is_keyword_query, reciprocal_rank_fusion
 from embeddings.embedding_service import EmbeddingService
 from retrieval.categorizer import EvidenceCategorizer
+from retrieval.knn_graph import ClaimEvidenceGraph, CATEGORIES
+from retrieval.query_log import QueryLog
+from retrieval.stance_classifier import StanceClassifier
 from config import Config
+from monitoring.metrics import QUERY_CACHE_LOOKUPS, STAGE_SECONDS, STANCE_DECISIONS
 
 class ClaimEvidenceRetriever:
     def __init__(self):
         self.qdrant = QdrantManager()
         self.embedder = EmbeddingService()
         self.categorizer = EvidenceCategorizer()
+        self.stance = self._load_stance() if Config.STANCE_CLASSIFIER else None
+        self.bm25 = BM25Index() if Config.HYBRID_SEARCH else None
+        self.graph = ClaimEvidenceGraph() if Config.KNN_GRAPH else None
+        self.query_log = QueryLog() if Config.QUERY_LOG else None
+        self._model_checked_at = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
-    def retrieve(self, query: str) -> Dict:
-        """Retrieve related claims and categorized evidence."""
+    def _embed_query(self, query: str) -> List[float]:
+        """Query embedding, from a small LRU cache keyed by model and query text."""
+        self._check_model()
+        key = (self.embedder.model_name, query)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is not None:
+            QUERY_CACHE_LOOKUPS.inc(result="hit")
+            return cached
+        QUERY_CACHE_LOOKUPS.inc(result="miss")
+        with STAGE_SECONDS.time(stage="query_embed"):
+            vector = self.embedder.encode(query)[0].tolist()
+        if Config.QUERY_CACHE_SIZE > 0:
+            with self._cache_lock:
+                self._cache[key] = vector
+                while len(self._cache) > Config.QUERY_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return vector
     
-        query_embedding = self.embedder.encode(query)[0].tolist()
+    def _load_stance(self):
+        classifier = StanceClassifier.load()
+        if not classifier.fitted:
+            print("⚠️  No stance classifier calibrated; using keyword categorization")
+            return None
+        return classifier
+    
+    def _stance_ready(self) -> bool:
+        """Whether evidence vectors are worth fetching: a classifier for the current model."""
+        return self.stance is not None and self.stance.model == self.embedder.model_name
+    
+    def warm_model(self):
+        """Load the model and run one encode so the first real query does not pay for it."""
+        self._check_model()
+        with STAGE_SECONDS.time(stage="query_embed"):
+            self.embedder.encode("warmup")
+    
+    def replay(self, entry: Dict):
+        """Run a query-log entry without logging it again (used by warmup)."""
+        filters = {key: entry.get(key) for key in ('year_from', 'year_to', 'categories')}
+        if entry.get("group_by_paper"):
+            return self._retrieve_grouped(entry["query"], **filters)
+        for _ in self._stream(entry["query"], **filters):
+            pass
+    
+    def _record(self, query: str, group_by_paper: bool = False, **filters):
+        if self.query_log is not None:
+            try:
+                self.query_log.append(query, group_by_paper=group_by_paper, **filters)
+            except OSError as exc:
+                print(f"⚠️  Could not write query log: {exc}")
+    
+    def _check_model(self):
+        """Follow a model migration: reload the embedder once the aliases move."""
+        now = time.monotonic()
+        if now - self._model_checked_at < Config.MODEL_CHECK_INTERVAL:
+            return
+        self._model_checked_at = now
+        model = self.qdrant.active_model(Config.CLAIMS_COLLECTION)
+        if model and model != self.embedder.model_name:
+            print(f"Collections now use {model}; reloading query embedder")
+            # The embedding server still serves the old model; load the new one locally.
+            backend = Config.EMBEDDING_BACKEND if self.embedder.backend == "remote" \
+                else self.embedder.backend
+            self.embedder = EmbeddingService(model, backend=backend)
+    
+    def retrieve(self, query: str, **filters) -> Dict:
+        """
+        Retrieve related claims and categorized evidence.
+        
+        `filters` (year_from, year_to, categories) restrict results by paper
+        year and arXiv category, and let evidence search skip whole shards.
+        """
+        results = {
+            'query': query,
+            'related_claims': [],
+            'evidence': {category: [] for category in CATEGORIES}
+        }
+        for event, data in self.retrieve_stream(query, **filters):
+            if event == 'claims':
+                results['related_claims'] = data
+            else:
+                for category, items in data.items():
+                    results['evidence'][category].extend(items)
+        return results
+    
+    def retrieve_stream(self, query: str, **filters) -> Iterator[Tuple[str, object]]:
+        """
+        Incremental `retrieve`: yields ('claims', [...]) as soon as the claim
+        search returns, then ('evidence', {category: [...]}) chunks of
+        Config.STREAM_CHUNK_SIZE categorized items. The evidence search runs
+        in the background while claims are being rendered.
+        """
+        self._record(query, **filters)
+        return self._stream(query, **filters)
+    
+    def _stream(self, query: str, **filters) -> Iterator[Tuple[str, object]]:
+        filters = {key: value for key, value in filters.items() if value}
+        # The graph and the keyword fast path don't know about filters.
+        row = None if filters else self._graph_row(text=query)
+        if row is not None:
+            results = self._retrieve_from_graph(query, row)
+            yield 'claims', results['related_claims']
+            yield 'evidence', results['evidence']
+            return
+        
+        if self.bm25 is not None and not filters and is_keyword_query(query):
+            yield 'claims', self._sparse_items('claim', query, Config.TOP_K_CLAIMS)
+            evidence_items = self._sparse_items('evidence', query, Config.TOP_K_EVIDENCE)
+            yield from self._categorize_chunks(query, evidence_items)
+            return
+        
+        query_embedding = self._embed_query(query)
+        evidence_future = self._executor.submit(
+            self.qdrant.search_evidence, query_embedding, top_k=Config.TOP_K_EVIDENCE,
+            with_vectors=self._stance_ready(), **filters
+        )
         
-       
         claim_results = self.qdrant.search_claims(
             query_embedding,
-            top_k=Config.TOP_K_CLAIMS
+            top_k=Config.TOP_K_CLAIMS,
+            **filters
         )
+        if self.bm25 is not None:
+            yield 'claims', self._fuse('claim', query, query_embedding,
+                                       claim_results, Config.TOP_K_CLAIMS, filters)
+        else:
+            yield 'claims', self._to_items('claim', claim_results)
         
+        evidence_results = evidence_future.result()
+        if self.bm25 is not None:
+            evidence_items = self._fuse('evidence', query, query_embedding,
+                                        evidence_results, Config.TOP_K_EVIDENCE, filters)
+        else:
+            evidence_items = self._to_items('evidence', evidence_results)
+        yield from self._categorize_chunks(query, evidence_items, query_embedding)
     
-        evidence_results = self.qdrant.search_evidence(
-            query_embedding,
-            top_k=Config.TOP_K_EVIDENCE
+    def retrieve_for_claim(self, claim_id: str) -> Dict:
+        """Results for a stored claim: a graph lookup, or a live search if it is not in the graph."""
+        pid = point_id(claim_id)
+        row = self._graph_row(pid=pid)
+        claim = self.qdrant.sidecar.fetch('claim', [pid]).get(pid)
+        text = claim['text'] if claim else claim_id
+        if row is not None:
+            return self._retrieve_from_graph(text, row)
+        return self.retrieve(text)
+    
+    def _graph_row(self, pid: int = None, text: str = None):
+        if self.graph is None:
+            return None
+        row = self.graph.row_for_claim(pid) if pid is not None else self.graph.row_for_text(text)
+        if row is None or self.graph.model not in (None, self.embedder.model_name):
+            return None
+        return row
+    
+    def _retrieve_from_graph(self, query: str, row: int) -> Dict:
+        """Precomputed neighbours of an indexed claim; no embedding or search."""
+        with STAGE_SECONDS.time(stage="graph_lookup"):
+            evidence, claims = self.graph.neighbours(row)
+            evidence = [edge for edge in evidence
+                        if edge[1] >= Config.SIMILARITY_THRESHOLD][:Config.TOP_K_EVIDENCE]
+            claims = [edge for edge in claims
+                      if edge[1] >= Config.SIMILARITY_THRESHOLD][:Config.TOP_K_CLAIMS]
+            evidence_rows = self.qdrant.sidecar.fetch('evidence', [pid for pid, _, _ in evidence])
+            claim_rows = self.qdrant.sidecar.fetch('claim', [pid for pid, _ in claims])
+        
+        categorized_evidence = {category: [] for category in CATEGORIES}
+        for pid, score, category in evidence:
+            if pid in evidence_rows:
+                categorized_evidence[category].append(
+                    {**evidence_rows[pid], 'similarity_score': score}
+                )
+        return {
+            'query': query,
+            'related_claims': [{**claim_rows[pid], 'similarity_score': score}
+                               for pid, score in claims if pid in claim_rows],
+            'evidence': categorized_evidence
+        }
+    
+    def retrieve_grouped(self, query: str, num_papers: int = None,
+                         claims_per_paper: int = None,
+                         evidence_per_paper: int = None, **filters) -> Dict:
+        """Retrieve the top papers, each with its best claims and categorized evidence."""
+        self._record(query, group_by_paper=True, **filters)
+        return self._retrieve_grouped(query, num_papers, claims_per_paper,
+                                      evidence_per_paper, **filters)
+    
+    def _retrieve_grouped(self, query: str, num_papers: int = None,
+                          claims_per_paper: int = None,
+                          evidence_per_paper: int = None, **filters) -> Dict:
+        filters = {key: value for key, value in filters.items() if value}
+        num_papers = num_papers or Config.TOP_K_PAPERS
+        claims_per_paper = claims_per_paper or Config.CLAIMS_PER_PAPER
+        evidence_per_paper = evidence_per_paper or Config.EVIDENCE_PER_PAPER
+        
+        query_embedding = self._embed_query(query)
+        
+        claim_groups = self.qdrant.search_claims_grouped(
+            query_embedding, num_papers, claims_per_paper, **filters
+        )
+        evidence_groups = self.qdrant.search_evidence_grouped(
+            query_embedding, num_papers, evidence_per_paper,
+            with_vectors=self._stance_ready(), **filters
+        )
+        
+        papers = {}
+        
+        def paper_entry(paper_id, item):
+            if paper_id not in papers:
+                papers[paper_id] = {
+                    'paper_id': paper_id,
+                    'paper_title': item.get('paper_title'),
+                    'year': item.get('year'),
+                    'venue': item.get('venue'),
+                    'score': 0.0,
+                    'claims': [],
+                    'evidence': {'supporting': [], 'contradicting': [], 'neutral': []}
+                }
+            return papers[paper_id]
+        
+        for group in claim_groups:
+            items = self._to_items('claim', group.hits)
+            if not items:
+                continue
+            entry = paper_entry(group.id, items[0])
+            entry['claims'] = items
+            entry['score'] = max(entry['score'], items[0]['similarity_score'])
+        
+        for group in evidence_groups:
+            items = self._to_items('evidence', group.hits)
+            if not items:
+                continue
+            entry = paper_entry(group.id, items[0])
+            entry['evidence'] = self._categorize(query, items, query_embedding)
+            entry['score'] = max(entry['score'], items[0]['similarity_score'])
+        
+        ranked = sorted(papers.values(), key=lambda p: p['score'], reverse=True)
+        return {
+            'query': query,
+            'papers': ranked[:num_papers]
+        }
+    
+    def _sparse_items(self, kind: str, query: str, top_k: int) -> List[Dict]:
+        """Keyword-only fast path: BM25 hits hydrated from the sidecar, no embedding."""
+        with STAGE_SECONDS.time(stage="bm25_search"):
+            hits = self.bm25.search(kind, query, top_k)
+        rows = self.qdrant.sidecar.fetch(kind, [pid for pid, _ in hits])
+        best = hits[0][1] if hits else 1.0
+        return [
+            {**rows[pid], 'similarity_score': score / best, 'bm25_score': score}
+            for pid, score in hits if pid in rows
+        ]
+    
+    def _fuse(self, kind: str, query: str, query_vector: List[float],
+              dense_hits, top_k: int, filters: Dict = None) -> List[Dict]:
+        """Reciprocal-rank fusion of dense and BM25 hits, all held to the similarity threshold."""
+        dense_hits = [hit for hit in dense_hits if hit.score >= Config.SIMILARITY_THRESHOLD]
+        with STAGE_SECONDS.time(stage="bm25_search"):
+            sparse_hits = self.bm25.search(kind, query, top_k)
+        fused = reciprocal_rank_fusion(
+            [[hit.id for hit in dense_hits], [pid for pid, _ in sparse_hits]],
+            k=Config.RRF_K
         )
         
-      
+        fused_ids = {pid for pid, _ in fused}
+        scored = [(hit, hit.score) for hit in dense_hits if hit.id in fused_ids]
+        dense_ids = {hit.id for hit, _ in scored}
+        missing = [pid for pid in fused_ids if pid not in dense_ids]
+        if missing:
+            # Keyword-only matches: fetch their vectors and score them exactly.
+            query_vec = np.asarray(query_vector, dtype=np.float32)
+            query_vec /= max(np.linalg.norm(query_vec), 1e-12)
+            for point in self.qdrant.fetch_points(kind, missing, with_vectors=True):
+                if filters and not payload_matches(point.payload or {}, **filters):
+                    continue
+                vector = np.asarray(point.vector, dtype=np.float32)
+                score = float(vector @ query_vec / max(np.linalg.norm(vector), 1e-12))
+                if score >= Config.SIMILARITY_THRESHOLD:
+                    scored.append((point, score))
+        
+        scores = {point.id: score for point, score in scored}
+        items = {point.id: self._item(kind, point, payload, scores[point.id])
+                 for point, payload in self.qdrant.hydrate_hits(kind, [p for p, _ in scored])}
+        
+        bm25_scores = dict(sparse_hits)
+        fused_items = []
+        for pid, fusion_score in fused:
+            if pid not in items:
+                continue
+            item = items[pid]
+            item['bm25_score'] = bm25_scores.get(pid, 0.0)
+            item['fusion_score'] = fusion_score
+            fused_items.append(item)
+        return fused_items[:top_k]
+    
+    def _to_items(self, kind: str, hits) -> List[Dict]:
+        """Hits above the similarity threshold as hydrated result dicts."""
+        kept = [hit for hit in hits if hit.score >= Config.SIMILARITY_THRESHOLD]
+        return [
+            self._item(kind, hit, payload, hit.score)
+            for hit, payload in self.qdrant.hydrate_hits(kind, kept)
+        ]
+    
+    @staticmethod
+    def _item(kind: str, point, payload: Dict, score: float) -> Dict:
+        """Result dict; evidence keeps its vector under '_vector' until it is categorized."""
+        item = {**payload, 'similarity_score': score}
+        if kind == 'evidence' and getattr(point, 'vector', None) is not None:
+            item['_vector'] = point.vector
+        return item
+    
+    def _categorize_chunks(self, query: str, evidence_items: List[Dict],
+                           query_vector: List[float] = None) -> Iterator[Tuple[str, Dict]]:
+        chunk_size = max(1, Config.STREAM_CHUNK_SIZE)
+        for start in range(0, len(evidence_items), chunk_size):
+            yield 'evidence', self._categorize(query, evidence_items[start:start + chunk_size],
+                                               query_vector)
+    
+    def _categorize(self, query: str, evidence_items: List[Dict],
+                    query_vector: List[float] = None) -> Dict[str, List[Dict]]:
+        """
+        Split evidence items by category: the stance classifier for items
+        that came with their vector, the keyword rules for the rest and for
+        low-confidence predictions.
+        """
         categorized_evidence = {
             'supporting': [],
             'contradicting': [],
             'neutral': []
         }
         
-        for result in evidence_results:
-            if result.score < Config.SIMILARITY_THRESHOLD:
-                continue
-            
-            category = self.categorizer.categorize(
-                query,
-                result.payload['text']
-            )
-            
-            evidence_item = {
-                **result.payload,
-                'similarity_score': result.score
-            }
-            categorized_evidence[category].append(evidence_item)
-        
-       
-        related_claims = [
-            {**result.payload, 'similarity_score': result.score}
-            for result in claim_results
-            if result.score >= Config.SIMILARITY_THRESHOLD
-        ]
+        with STAGE_SECONDS.time(stage="categorize"):
+            stances = self._stances(query_vector, evidence_items)
+            for item, stance in zip(evidence_items, stances):
+                if stance is None:
+                    STANCE_DECISIONS.inc(source="keywords")
+                    stance = self.categorizer.categorize(query, item['text'])
+                else:
+                    STANCE_DECISIONS.inc(source="model")
+                categorized_evidence[stance].append(item)
         
-        return {
-            'query': query,
-            'related_claims': related_claims,
-            'evidence': categorized_evidence
-        }
+        return categorized_evidence
+    
+    def _stances(self, query_vector: List[float], evidence_items: List[Dict]) -> List:
+        """Classifier stance per item (None = use keywords); strips the fetched vectors."""
+        vectors = [item.pop('_vector', None) for item in evidence_items]
+        stances = [None] * len(evidence_items)
+        if query_vector is None or not self._stance_ready():
+            return stances
+        rows = [i for i, vector in enumerate(vectors) if vector is not None]
+        if rows:
+            predicted = self.stance.classify(query_vector, np.asarray([vectors[i] for i in rows],
+                                                                       dtype=np.float32))
+            for i, stance in zip(rows, predicted):
+                stances[i] = stance
+        return stances
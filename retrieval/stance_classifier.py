@@ -0,0 +1,109 @@
+"""
+Stance classification from stored evidence embeddings.
+
+A multinomial logistic model over two feature blocks of each (query,
+evidence) pair: the evidence embedding itself, scored against one learned
+prototype direction per stance, and the evidence-minus-query difference,
+scored against one learned difference direction per stance. Both blocks are
+linear, so for a query the logits of all retrieved evidence are a single
+(n x dim) @ (dim x 3) product plus a per-query offset. The vectors come back
+with the search results, so nothing is re-embedded. Predictions whose
+softmax confidence is below the calibrated threshold are left to the keyword
+rules (EvidenceCategorizer). Fitted and calibrated offline by
+benchmarks/stance_calibration.py.
+"""
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+from config import Config
+from retrieval.knn_graph import CATEGORIES
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+class StanceClassifier:
+    """Softmax over stance prototypes and difference directions, rows in CATEGORIES order."""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or Config.STANCE_MODEL_PATH)
+        self.model: Optional[str] = None
+        self.prototypes: Optional[np.ndarray] = None
+        self.directions: Optional[np.ndarray] = None
+        self.bias: Optional[np.ndarray] = None
+        self.temperature = 1.0
+        self.threshold = 0.5
+        self._combined: Optional[np.ndarray] = None
+
+    @classmethod
+    def load(cls, path: Path = None) -> 'StanceClassifier':
+        """The saved classifier, or an unfitted one if none was calibrated yet."""
+        classifier = cls(path)
+        if classifier.path.exists():
+            with np.load(classifier.path) as data:
+                classifier.set_weights(
+                    str(data["model"]), data["prototypes"], data["directions"], data["bias"],
+                    float(data["temperature"]), float(data["threshold"])
+                )
+        return classifier
+
+    @property
+    def fitted(self) -> bool:
+        return self.prototypes is not None
+
+    @property
+    def min_confidence(self) -> float:
+        return Config.STANCE_MIN_CONFIDENCE or self.threshold
+
+    def set_weights(self, model: str, prototypes: np.ndarray, directions: np.ndarray,
+                    bias: np.ndarray, temperature: float = 1.0,
+                    threshold: float = 0.5) -> 'StanceClassifier':
+        self.model = model
+        self.prototypes = np.asarray(prototypes, dtype=np.float32)
+        self.directions = np.asarray(directions, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.temperature = temperature
+        self.threshold = threshold
+        # e @ P.T + (e - q) @ D.T  ==  e @ (P + D).T - q @ D.T
+        self._combined = np.ascontiguousarray((self.prototypes + self.directions).T)
+        return self
+
+    def logits(self, query_vector, vectors: np.ndarray) -> np.ndarray:
+        """(n, 3) logits for n evidence vectors against one query."""
+        query = _normalize(query_vector).reshape(-1)
+        offset = self.bias - self.directions @ query
+        return _normalize(vectors) @ self._combined + offset
+
+    def pair_logits(self, queries: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        """(n, 3) logits for n row-aligned (query, evidence) pairs (offline calibration)."""
+        offsets = self.bias - _normalize(queries) @ self.directions.T
+        return _normalize(vectors) @ self._combined + offsets
+
+    def predict(self, query_vector, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(category index, confidence) per evidence vector."""
+        logits = self.logits(query_vector, vectors) / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        labels = probs.argmax(axis=1)
+        return labels, probs[np.arange(len(labels)), labels]
+
+    def classify(self, query_vector, vectors: np.ndarray) -> List[Optional[str]]:
+        """Stance per evidence vector, or None where the model is not confident enough."""
+        if not len(vectors):
+            return []
+        labels, confidence = self.predict(query_vector, vectors)
+        threshold = self.min_confidence
+        return [CATEGORIES[label] if conf >= threshold else None
+                for label, conf in zip(labels.tolist(), confidence.tolist())]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, model=np.array(self.model), prototypes=self.prototypes,
+                 directions=self.directions, bias=self.bias,
+                 temperature=np.array(self.temperature), threshold=np.array(self.threshold))
+        os.replace(tmp_path, self.path)
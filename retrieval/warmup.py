@@ -0,0 +1,58 @@
+import threading
+import time
+from typing import Dict, List
+from config import Config
+from monitoring.metrics import READY, STAGE_SECONDS
+from retrieval.query_log import QueryLog
+
+
+class Warmup:
+    """
+    Prime a freshly started retriever before it reports ready.
+
+    Loads the embedding model and runs a first encode (weights and kernels),
+    then replays the most frequent recent queries from the query log, which
+    pulls the touched HNSW graph pages, sidecar and BM25 pages into memory
+    and fills the query-embedding cache. Replays are not logged again.
+    """
+
+    def __init__(self, retriever, query_log: QueryLog = None, num_queries: int = None):
+        self.retriever = retriever
+        self.query_log = query_log or retriever.query_log or QueryLog()
+        self.num_queries = Config.WARMUP_QUERIES if num_queries is None else num_queries
+        self.ready = threading.Event()
+        self.replayed = 0
+        self.seconds = 0.0
+        self._thread = None
+
+    def start(self) -> 'Warmup':
+        """Warm up in a background thread; `ready` is set when it finishes."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            with STAGE_SECONDS.time(stage="warmup"):
+                self.retriever.warm_model()
+                for entry in self._queries():
+                    try:
+                        self.retriever.replay(entry)
+                        self.replayed += 1
+                    except Exception as exc:
+                        print(f"⚠️  Warmup query failed: {exc}")
+        finally:
+            self.seconds = time.perf_counter() - start
+            self.ready.set()
+            READY.set()
+        print(f"✓ Warmup done: {self.replayed} queries replayed in {self.seconds:.1f}s")
+
+    def _queries(self) -> List[Dict]:
+        if not self.num_queries:
+            return []
+        return self.query_log.most_frequent(self.num_queries)
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.ready.wait(timeout)
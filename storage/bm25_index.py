@@ -0,0 +1,161 @@
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import List, Tuple
+from config import Config
+from models.batch import SentenceBatch
+from storage.qdrant_manager import point_id
+
+# Keeps decimals ("28.4") and hyphenated names ("gpt-3") as single terms.
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    On-disk inverted index over claim and evidence text with BM25 scoring.
+
+    Postings are stored in SQLite clustered by (kind, term), so a query reads
+    only the posting lists of its own terms. Documents are keyed by their
+    Qdrant point id and updated incrementally as batches are ingested.
+    """
+
+    def __init__(self, path: Path = None, k1: float = None, b: float = None):
+        self.path = Path(path or Config.BM25_INDEX_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1 or Config.BM25_K1
+        self.b = b if b is not None else Config.BM25_B
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                kind TEXT NOT NULL,
+                point_id INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (kind, point_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS postings (
+                kind TEXT NOT NULL,
+                term TEXT NOT NULL,
+                point_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (kind, term, point_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS stats (
+                kind TEXT PRIMARY KEY,
+                doc_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+        """)
+
+    def add_batch(self, batch: SentenceBatch):
+        """Index (or re-index) every row of a batch."""
+        self.add_documents(batch.kind, [(point_id(item_id), text)
+                                        for item_id, text in zip(batch.ids, batch.texts)])
+
+    def add_documents(self, kind: str, documents: List[Tuple[int, str]]):
+        if not documents:
+            return
+        with self._lock, self.conn:
+            self._delete(kind, [pid for pid, _ in documents])
+            docs_rows = []
+            posting_rows = []
+            for pid, text in documents:
+                terms = Counter(tokenize(text))
+                docs_rows.append((kind, pid, sum(terms.values())))
+                posting_rows.extend((kind, term, pid, tf) for term, tf in terms.items())
+            self.conn.executemany("INSERT INTO docs VALUES (?, ?, ?)", docs_rows)
+            self.conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", posting_rows)
+            self.conn.execute(
+                """INSERT INTO stats VALUES (?, ?, ?)
+                   ON CONFLICT(kind) DO UPDATE SET
+                       doc_count = doc_count + excluded.doc_count,
+                       total_length = total_length + excluded.total_length""",
+                (kind, len(docs_rows), sum(row[2] for row in docs_rows))
+            )
+
+    def delete_documents(self, kind: str, point_ids: List[int]):
+        with self._lock, self.conn:
+            self._delete(kind, point_ids)
+
+    def _delete(self, kind: str, point_ids: List[int]):
+        for start in range(0, len(point_ids), 500):
+            chunk = point_ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            row = self.conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs "
+                f"WHERE kind = ? AND point_id IN ({marks})", [kind, *chunk]
+            ).fetchone()
+            if not row[0]:
+                continue
+            self.conn.execute(
+                "UPDATE stats SET doc_count = doc_count - ?, total_length = total_length - ? "
+                "WHERE kind = ?", (row[0], row[1], kind)
+            )
+            self.conn.execute(f"DELETE FROM docs WHERE kind = ? AND point_id IN ({marks})",
+                              [kind, *chunk])
+            self.conn.execute(f"DELETE FROM postings WHERE kind = ? AND point_id IN ({marks})",
+                              [kind, *chunk])
+
+    def search(self, kind: str, query: str, top_k: int = 20) -> List[Tuple[int, float]]:
+        """Return (point_id, bm25_score) pairs, best first."""
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            stats = self.conn.execute(
+                "SELECT doc_count, total_length FROM stats WHERE kind = ?", (kind,)
+            ).fetchone()
+            if not stats or not stats[0]:
+                return []
+            marks = ",".join("?" * len(terms))
+            rows = self.conn.execute(
+                f"""SELECT p.term, p.point_id, p.tf, d.length
+                    FROM postings p JOIN docs d
+                      ON d.kind = p.kind AND d.point_id = p.point_id
+                    WHERE p.kind = ? AND p.term IN ({marks})""",
+                [kind, *terms]
+            ).fetchall()
+
+        doc_count, total_length = stats
+        avg_length = total_length / doc_count
+        by_term = defaultdict(list)
+        for term, pid, tf, length in rows:
+            by_term[term].append((pid, tf, length))
+
+        scores = defaultdict(float)
+        for term, postings in by_term.items():
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for pid, tf, length in postings:
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[pid] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+
+def is_keyword_query(query: str, max_terms: int = 4) -> bool:
+    """
+    True for short queries made only of acronyms, metric names and numbers
+    ("BLEU 28.4", "GLUE", "WMT 2014"), which BM25 answers on its own.
+    """
+    words = query.split()
+    if not words or len(words) > max_terms:
+        return False
+    return all(any(c.isdigit() for c in word) or (word.isupper() and len(word) > 1)
+               for word in words)
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse several rankings of point ids; returns (point_id, rrf_score), best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, pid in enumerate(ranking):
+            scores[pid] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
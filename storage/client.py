@@ -0,0 +1,77 @@
+import inspect
+import os
+import threading
+from typing import Dict, Optional
+import httpx
+from qdrant_client import QdrantClient
+from qdrant_client.qdrant_remote import QdrantRemote
+from config import Config
+
+_lock = threading.Lock()
+_clients: Dict[int, QdrantClient] = {}
+# grpc_options arrived in qdrant-client 1.7.1; the pinned 1.7.0 would pass it
+# on to httpx.Client and fail, and always uses its built-in channel options.
+_GRPC_OPTIONS = "grpc_options" in inspect.signature(QdrantRemote.__init__).parameters
+
+
+def create_qdrant_client(prefer_grpc: Optional[bool] = None,
+                         location: Optional[str] = None) -> QdrantClient:
+    """
+    Build a Qdrant client from Config.
+
+    QDRANT_LOCATION selects qdrant-client's embedded local mode (":memory:"
+    or a directory) instead of a server. Otherwise the client talks REST
+    through a pooled keep-alive httpx connection pool, or gRPC when
+    QDRANT_PREFER_GRPC is set (vectors go over the wire as packed floats
+    instead of JSON). gRPC keep-alive is only configured on qdrant-client
+    versions that accept channel options.
+    """
+    location = Config.QDRANT_LOCATION if location is None else location
+    if location == ":memory:":
+        return QdrantClient(location=":memory:")
+    if location:
+        return QdrantClient(path=location)
+
+    prefer_grpc = Config.QDRANT_PREFER_GRPC if prefer_grpc is None else prefer_grpc
+    kwargs = {}
+    if _GRPC_OPTIONS:
+        kwargs["grpc_options"] = {
+            "grpc.keepalive_time_ms": Config.QDRANT_KEEPALIVE_MS,
+            "grpc.keepalive_timeout_ms": 10000,
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.max_send_message_length": 64 * 1024 * 1024,
+            "grpc.max_receive_message_length": 64 * 1024 * 1024,
+        }
+    return QdrantClient(
+        host=Config.QDRANT_HOST,
+        port=Config.QDRANT_PORT,
+        grpc_port=Config.QDRANT_GRPC_PORT,
+        prefer_grpc=prefer_grpc,
+        api_key=Config.QDRANT_API_KEY,
+        timeout=Config.QDRANT_TIMEOUT,
+        # Remaining keyword arguments go to httpx.Client for the REST transport.
+        limits=httpx.Limits(
+            max_connections=Config.QDRANT_POOL_SIZE,
+            max_keepalive_connections=Config.QDRANT_POOL_SIZE,
+            keepalive_expiry=Config.QDRANT_KEEPALIVE_MS / 1000
+        ),
+        **kwargs
+    )
+
+
+def get_qdrant_client() -> QdrantClient:
+    """
+    The process-wide shared client. Clients are thread-safe, so every
+    QdrantManager in a process reuses one connection pool; a forked child
+    gets its own.
+    """
+    pid = os.getpid()
+    client = _clients.get(pid)
+    if client is None:
+        with _lock:
+            client = _clients.get(pid)
+            if client is None:
+                client = create_qdrant_client()
+                _clients.clear()
+                _clients[pid] = client
+    return client
@@ -0,0 +1,287 @@
+"""
+Columnar table of numeric results parsed from evidence sentences.
+
+One row per (evidence point, metric, value, unit, dataset, year). Metric,
+dataset and unit are dictionary-encoded; rows are kept sorted by
+(metric, dataset, value), so every metric/dataset pair is one contiguous
+run and range or top-N queries are two binary searches. A secondary
+permutation sorted by evidence id serves per-evidence lookups.
+"""
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from config import Config
+from extractors.numeric_extractor import (
+    LOWER_IS_BETTER, NumericExtractor, normalize_dataset, normalize_metric
+)
+from models.batch import SentenceBatch
+from storage.qdrant_manager import point_id
+
+_DATASET_BITS = 16
+
+
+class NumericIndex:
+    """On-disk numeric results table with range, top-N and consistency queries."""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or Config.NUMERIC_INDEX_PATH)
+        self.extractor = NumericExtractor()
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.metrics: List[str] = []
+        self.datasets: List[str] = [""]
+        self.units: List[str] = [""]
+        self.key = np.empty(0, dtype=np.int64)
+        self.value = np.empty(0, dtype=np.float32)
+        self.evidence_ids = np.empty(0, dtype=np.int64)
+        self.unit = np.empty(0, dtype=np.uint8)
+        self.year = np.empty(0, dtype=np.int16)
+        self.by_evidence = np.empty(0, dtype=np.int64)
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+    def reload(self):
+        """Load the table if it changed on disk since the last load."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        with np.load(self.path) as data:
+            self.metrics = data["metrics"].tolist()
+            self.datasets = data["datasets"].tolist()
+            self.units = data["units"].tolist()
+            self.key = data["key"]
+            self.value = data["value"]
+            self.evidence_ids = data["evidence_ids"]
+            self.unit = data["unit"]
+            self.year = data["year"]
+            self.by_evidence = data["by_evidence"]
+        self._mtime = mtime
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            metrics=np.array(self.metrics, dtype=str),
+            datasets=np.array(self.datasets, dtype=str),
+            units=np.array(self.units, dtype=str),
+            key=self.key,
+            value=self.value,
+            evidence_ids=self.evidence_ids,
+            unit=self.unit,
+            year=self.year,
+            by_evidence=self.by_evidence
+        )
+        os.replace(tmp_path, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    @staticmethod
+    def _code(table: List[str], name: str) -> int:
+        if name not in table:
+            table.append(name)
+        return table.index(name)
+
+    def _key(self, metric: int, dataset: int) -> int:
+        return (metric << _DATASET_BITS) | dataset
+
+    def add_batch(self, batch: SentenceBatch) -> int:
+        """Parse and index every evidence row of a batch; returns the number of results."""
+        return self.add_documents(
+            (point_id(item_id), text, batch.papers[batch.paper_index[i]].year)
+            for i, (item_id, text) in enumerate(zip(batch.ids, batch.texts))
+        )
+
+    def add_documents(self, documents: Iterable[Tuple[int, str, int]]) -> int:
+        """Index (evidence point id, text, year) rows, replacing earlier rows for those ids."""
+        with self._lock:
+            self.reload()
+            ids, keys, values, units, years, seen = [], [], [], [], [], []
+            for pid, text, year in documents:
+                seen.append(pid)
+                for result in self.extractor.extract(text):
+                    ids.append(pid)
+                    keys.append(self._key(self._code(self.metrics, result.metric),
+                                          self._code(self.datasets, result.dataset)))
+                    values.append(result.value)
+                    units.append(self._code(self.units, result.unit))
+                    years.append(year or 0)
+            self._delete(seen)
+            self._append(
+                np.asarray(keys, dtype=np.int64), np.asarray(values, dtype=np.float32),
+                np.asarray(ids, dtype=np.int64), np.asarray(units, dtype=np.uint8),
+                np.asarray(years, dtype=np.int16)
+            )
+            self.save()
+            return len(ids)
+
+    def delete_documents(self, evidence_ids: List[int]):
+        with self._lock:
+            self.reload()
+            self._delete(evidence_ids)
+            self.save()
+
+    def _delete(self, evidence_ids: List[int]):
+        if not len(self) or not evidence_ids:
+            return
+        keep = ~np.isin(self.evidence_ids, np.asarray(evidence_ids, dtype=np.int64))
+        if keep.all():
+            return
+        self._append(*(column[keep] for column in
+                       (self.key, self.value, self.evidence_ids, self.unit, self.year)),
+                     replace=True)
+
+    def _append(self, key, value, evidence_ids, unit, year, replace: bool = False):
+        columns = (key, value, evidence_ids, unit, year)
+        if not replace:
+            current = (self.key, self.value, self.evidence_ids, self.unit, self.year)
+            columns = tuple(np.concatenate([old, new]) for old, new in zip(current, columns))
+        order = np.lexsort((columns[1], columns[0]))
+        self.key, self.value, self.evidence_ids, self.unit, self.year = (
+            column[order] for column in columns
+        )
+        self.by_evidence = np.argsort(self.evidence_ids, kind='stable')
+
+    def rebuild(self, documents: Iterable[Tuple[int, str, int]]) -> int:
+        """Drop the table and re-index from (evidence point id, text, year) rows."""
+        with self._lock:
+            self.metrics, self.datasets, self.units = [], [""], [""]
+            self._append(*(np.empty(0, dtype=column.dtype) for column in
+                           (self.key, self.value, self.evidence_ids, self.unit, self.year)),
+                         replace=True)
+            self.save()
+        return self.add_documents(documents)
+
+    def _run(self, metric: str, dataset: Optional[str]) -> Tuple[int, int]:
+        """[start, end) rows of a metric (and dataset, if given)."""
+        self.reload()
+        metric = normalize_metric(metric) or metric.lower()
+        if metric not in self.metrics:
+            return 0, 0
+        m = self.metrics.index(metric)
+        if dataset is None:
+            lo, hi = self._key(m, 0), self._key(m + 1, 0)
+        else:
+            dataset = normalize_dataset(dataset) or dataset
+            if dataset not in self.datasets:
+                return 0, 0
+            lo = self._key(m, self.datasets.index(dataset))
+            hi = lo + 1
+        return (int(np.searchsorted(self.key, lo, side='left')),
+                int(np.searchsorted(self.key, hi, side='left')))
+
+    def _rows(self, indices: Iterable[int]) -> List[Dict]:
+        return [{
+            'evidence_point_id': int(self.evidence_ids[i]),
+            'metric': self.metrics[self.key[i] >> _DATASET_BITS],
+            'dataset': self.datasets[self.key[i] & ((1 << _DATASET_BITS) - 1)],
+            'value': float(self.value[i]),
+            'unit': self.units[self.unit[i]],
+            'year': int(self.year[i]),
+        } for i in indices]
+
+    def range(self, metric: str, dataset: str = None, min_value: float = None,
+              max_value: float = None, inclusive: bool = True) -> List[Dict]:
+        """Results of `metric` (on `dataset`) with min_value <= value <= max_value."""
+        start, end = self._run(metric, dataset)
+        # Compare at the column's precision so "= 28.4" matches a stored float32 28.4.
+        min_value = None if min_value is None else np.float32(min_value)
+        max_value = None if max_value is None else np.float32(max_value)
+        if dataset is not None:
+            values = self.value[start:end]
+            lo_side, hi_side = ('left', 'right') if inclusive else ('right', 'left')
+            if min_value is not None:
+                start += int(np.searchsorted(values, min_value, side=lo_side))
+            if max_value is not None:
+                end = start + int(np.searchsorted(self.value[start:end], max_value,
+                                                  side=hi_side))
+            return self._rows(range(start, end))
+
+        # Across datasets the metric run is sorted per dataset only; filter with a mask.
+        values = self.value[start:end]
+        mask = np.ones(len(values), dtype=bool)
+        if min_value is not None:
+            mask &= values >= min_value if inclusive else values > min_value
+        if max_value is not None:
+            mask &= values <= max_value if inclusive else values < max_value
+        return self._rows(start + np.nonzero(mask)[0])
+
+    def top(self, metric: str, dataset: str = None, n: int = 10) -> List[Dict]:
+        """Best `n` results of a metric, honouring lower-is-better metrics."""
+        start, end = self._run(metric, dataset)
+        values = self.value[start:end]
+        lower_better = (normalize_metric(metric) or metric.lower()) in LOWER_IS_BETTER
+        if dataset is not None:
+            # The run is already sorted by value.
+            indices = range(start, min(end, start + n)) if lower_better \
+                else range(end - 1, max(start, end - n) - 1, -1)
+            return self._rows(indices)
+        order = np.argsort(values if lower_better else -values, kind='stable')[:n]
+        return self._rows(start + order)
+
+    def for_evidence(self, evidence_point_id: int) -> List[Dict]:
+        """All results parsed from one evidence sentence."""
+        self.reload()
+        sorted_ids = self.evidence_ids[self.by_evidence]
+        lo = np.searchsorted(sorted_ids, evidence_point_id, side='left')
+        hi = np.searchsorted(sorted_ids, evidence_point_id, side='right')
+        return self._rows(self.by_evidence[lo:hi])
+
+    def check_claim(self, claim_text: str, tolerance: float = None) -> List[Dict]:
+        """
+        Compare each number reported in a claim with indexed evidence for the
+        same metric and dataset: values within `tolerance` (relative, with a
+        0.1 absolute floor) are consistent, the rest conflicting.
+        """
+        tolerance = Config.NUMERIC_TOLERANCE if tolerance is None else tolerance
+        checks = []
+        for result in self.extractor.extract(claim_text):
+            rows = self.range(result.metric, result.dataset or None)
+            margin = max(0.1, abs(result.value) * tolerance)
+            consistent = [row for row in rows if abs(row['value'] - result.value) <= margin]
+            conflicting = [row for row in rows if abs(row['value'] - result.value) > margin]
+            checks.append({
+                'metric': result.metric,
+                'dataset': result.dataset,
+                'value': result.value,
+                'unit': result.unit,
+                'consistent': consistent,
+                'conflicting': conflicting
+            })
+        return checks
+
+
+_QUERY_RE = re.compile(
+    r'^\s*(?:all\s+)?(?:(?P<dataset>\S+)\s+)?(?P<metric>[\w\-. ]+?)\s*'
+    r'(?:(?P<op>>=|<=|>|<|=)\s*(?P<value>\d+(?:\.\d+)?)|top\s+(?P<n>\d+))\s*$',
+    re.IGNORECASE
+)
+
+
+def run_numeric_query(index: NumericIndex, query: str) -> List[Dict]:
+    """
+    Answer "WMT14 BLEU > 28", "ImageNet top-1 >= 80", "BLEU top 5" or
+    "GLUE accuracy < 70" style queries.
+    """
+    match = _QUERY_RE.match(query)
+    if not match:
+        raise ValueError(f"Could not parse numeric query: {query!r}")
+    dataset, metric = match.group('dataset'), match.group('metric')
+    if dataset and normalize_metric(metric) is None and normalize_metric(f"{dataset} {metric}"):
+        # Two-word metric without a dataset: "exact match > 80".
+        dataset, metric = None, f"{dataset} {metric}"
+    if match.group('n'):
+        return index.top(metric, dataset, int(match.group('n')))
+    value, op = float(match.group('value')), match.group('op')
+    if op == '=':
+        return index.range(metric, dataset, value, value)
+    if op in ('>', '>='):
+        return index.range(metric, dataset, min_value=value, inclusive=op == '>=')
+    return index.range(metric, dataset, max_value=value, inclusive=op == '<=')
@@ -0,0 +1,161 @@
+"""
+Reduced-dimension first stage for two-stage evidence search.
+
+A linear projection (PCA, or a seeded Gaussian random projection) maps
+stored embeddings to PROJECTION_DIM dimensions. Each evidence collection
+gets a companion "<physical>__reduced" collection holding the projected
+vectors with the same ids and filter payload. Searches run there first for
+top_k * RESCORE_OVERSAMPLE candidates, whose full vectors are then fetched
+and rescored exactly (see QdrantManager.search_evidence).
+"""
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+from config import Config
+
+METHODS = ("pca", "random")
+
+
+def reduced_collection_name(physical: str) -> str:
+    """Companion collection for a physical evidence collection ("__" keeps it out of shard lists)."""
+    return f"{physical}__reduced"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+class Projection:
+    """Linear map from full embeddings to the first-stage search space."""
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or Config.PROJECTION_PATH)
+        self.model: Optional[str] = None
+        self.method: Optional[str] = None
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+
+    @classmethod
+    def load(cls, path: Path = None) -> 'Projection':
+        """The saved projection, or an unfitted one if none was built yet."""
+        projection = cls(path)
+        if projection.path.exists():
+            with np.load(projection.path) as data:
+                projection.model = str(data["model"])
+                projection.method = str(data["method"])
+                projection.mean = data["mean"]
+                projection.components = data["components"]
+        return projection
+
+    @property
+    def fitted(self) -> bool:
+        return self.components is not None
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    def fit(self, vectors: np.ndarray, dim: int, method: str = "pca",
+            model: str = None, seed: int = 0) -> 'Projection':
+        """Learn the projection from a sample of stored (full-dimension) vectors."""
+        if method not in METHODS:
+            raise ValueError(f"Unknown projection method: {method}")
+        vectors = _normalize(vectors)
+        full_dim = vectors.shape[1]
+        if not 0 < dim < full_dim:
+            raise ValueError(f"Projection dim must be between 1 and {full_dim - 1}")
+        if method == "pca":
+            self.mean = vectors.mean(axis=0)
+            # Rows of vt are the principal directions, largest variance first.
+            _, _, vt = np.linalg.svd(vectors - self.mean, full_matrices=False)
+            self.components = vt[:dim].astype(np.float32)
+        else:
+            rng = np.random.default_rng(seed)
+            self.mean = np.zeros(full_dim, dtype=np.float32)
+            self.components = (rng.standard_normal((dim, full_dim)) / np.sqrt(dim)).astype(np.float32)
+        self.method = method
+        self.model = model or Config.EMBEDDING_MODEL
+        return self
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """Project one vector or a matrix of vectors."""
+        return (_normalize(vectors) - self.mean) @ self.components.T
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, model=np.array(self.model), method=np.array(self.method),
+                 mean=self.mean, components=self.components)
+        os.replace(tmp_path, self.path)
+
+
+def two_stage_top_k(projection: Projection, corpus: np.ndarray, queries: np.ndarray,
+                    k: int, candidates: int) -> np.ndarray:
+    """In-memory two-stage search: top `candidates` by projected cosine, rescored exactly."""
+    corpus, queries = _normalize(corpus), _normalize(queries)
+    reduced_corpus = _normalize(projection.project(corpus))
+    reduced_queries = _normalize(projection.project(queries))
+    candidates = min(candidates, len(corpus))
+    rough = np.argpartition(-(reduced_queries @ reduced_corpus.T), candidates - 1,
+                            axis=1)[:, :candidates]
+    exact = np.einsum('qd,qcd->qc', queries, corpus[rough])
+    order = np.argsort(-exact, axis=1)[:, :k]
+    return np.take_along_axis(rough, order, axis=1)
+
+
+def recall_at_k(projection: Projection, corpus: np.ndarray, queries: np.ndarray,
+                k: int, candidates: int) -> float:
+    """Fraction of the exact top-k found by two-stage search, averaged over queries."""
+    exact = np.argsort(-(_normalize(queries) @ _normalize(corpus).T), axis=1)[:, :k]
+    found = two_stage_top_k(projection, corpus, queries, k, candidates)
+    hits = sum(len(set(a.tolist()) & set(b.tolist())) for a, b in zip(exact, found))
+    return hits / exact.size
+
+
+def sample_vectors(qdrant, kind: str, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Up to `limit` (ids, vectors) scrolled from the collections holding `kind`."""
+    ids, vectors = [], []
+    for collection in qdrant.collections_for(kind):
+        offset = None
+        while len(ids) < limit:
+            points, offset = qdrant.client.scroll(
+                collection_name=collection,
+                limit=min(1024, limit - len(ids)),
+                offset=offset,
+                with_payload=False,
+                with_vectors=True
+            )
+            ids.extend(point.id for point in points)
+            vectors.extend(point.vector for point in points)
+            if offset is None:
+                break
+    return np.asarray(ids, dtype=np.int64), np.asarray(vectors, dtype=np.float32)
+
+
+def build_two_stage(qdrant, dim: int = None, method: str = None,
+                    sample: int = None) -> Projection:
+    """Fit the projection on stored evidence vectors and rebuild every companion collection."""
+    dim = dim or Config.PROJECTION_DIM
+    method = method or Config.PROJECTION_METHOD
+    _, vectors = sample_vectors(qdrant, 'evidence', sample or Config.PROJECTION_SAMPLE)
+    if not len(vectors):
+        raise ValueError("No stored evidence vectors to fit a projection on")
+    model = qdrant.active_model(Config.EVIDENCE_COLLECTION) or Config.EMBEDDING_MODEL
+    print(f"Fitting {method} projection {vectors.shape[1]} -> {dim} on {len(vectors)} vectors...")
+    projection = Projection().fit(vectors, dim, method, model)
+
+    # Stored claims stand in for queries when estimating recall on the sample.
+    _, queries = sample_vectors(qdrant, 'claim', 200)
+    if len(queries):
+        k = Config.TOP_K_EVIDENCE
+        recall = recall_at_k(projection, vectors, queries, k, k * Config.RESCORE_OVERSAMPLE)
+        print(f"Estimated recall@{k} with {Config.RESCORE_OVERSAMPLE}x oversampling: {recall:.3f}")
+
+    projection.save()
+    qdrant.projection = projection
+    for name in qdrant.collections_for('evidence'):
+        count = qdrant.build_reduced(name)
+        print(f"✓ {name}: {count} points projected to {dim}-d")
+    return projection
@@ -1,105 +1,596 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from typing import List
+import hashlib
+import heapq
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client.models import (
+    Distance, VectorParams, Batch, SearchRequest, PayloadSchemaType,
+    CreateAlias, CreateAliasOperation, DeleteAlias, DeleteAliasOperation,
+    FieldCondition, Filter, MatchAny, Range, PointGroup, OptimizersConfigDiff,
+    PointIdsList, ScoredPoint
+)
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from models.paper import Claim, Evidence
+from models.batch import SentenceBatch
 from config import Config
+from monitoring.metrics import POINTS_UPSERTED, SEARCH_SECONDS
+from storage.client import get_qdrant_client
+from storage.sidecar import SidecarStore, slim_payload
+from storage.projection import Projection, reduced_collection_name
+
+# Physical collection -> embedding model, kept in Qdrant so every host sees a cutover.
+MODEL_REGISTRY = "__collection_models"
+
+
+def point_id(item_id: str) -> int:
+    """Map a claim/evidence id to a stable, positive 63-bit Qdrant point id."""
+    digest = hashlib.blake2b(item_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+def physical_collection_name(name: str, model_name: str) -> str:
+    """Physical collection for a logical name and embedding model."""
+    slug = re.sub(r"[^a-z0-9]+", "-", model_name.split("/")[-1].lower()).strip("-")
+    return f"{name}__{slug}"
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def shard_name(year: Optional[int] = None, category: Optional[str] = None) -> str:
+    """Logical evidence shard for a paper under Config.EVIDENCE_SHARDING."""
+    if Config.EVIDENCE_SHARDING == "year" and year:
+        start = year - year % Config.EVIDENCE_SHARD_YEARS
+        return f"{Config.EVIDENCE_COLLECTION}_y{start}"
+    if Config.EVIDENCE_SHARDING == "category" and category:
+        return f"{Config.EVIDENCE_COLLECTION}_c{_slug(category)}"
+    return Config.EVIDENCE_COLLECTION
+
+
+def shard_matches(name: str, year_from: int = None, year_to: int = None,
+                  categories: List[str] = None) -> bool:
+    """False if a shard cannot hold anything passing the filters (base collection always may)."""
+    suffix = name[len(Config.EVIDENCE_COLLECTION) + 1:]
+    if suffix.startswith("y") and suffix[1:].isdigit():
+        start = int(suffix[1:])
+        end = start + Config.EVIDENCE_SHARD_YEARS - 1
+        return (year_from is None or end >= year_from) and (year_to is None or start <= year_to)
+    if suffix.startswith("c") and categories:
+        return suffix[1:] in {_slug(category) for category in categories}
+    return True
+
+
+def build_filter(year_from: int = None, year_to: int = None,
+                 categories: List[str] = None) -> Optional[Filter]:
+    conditions = []
+    if year_from is not None or year_to is not None:
+        conditions.append(FieldCondition(key="year", range=Range(gte=year_from, lte=year_to)))
+    if categories:
+        conditions.append(FieldCondition(key="category", match=MatchAny(any=list(categories))))
+    return Filter(must=conditions) if conditions else None
+
+
+def payload_matches(payload: Dict, year_from: int = None, year_to: int = None,
+                    categories: List[str] = None) -> bool:
+    """Client-side check of the same conditions as `build_filter`."""
+    year = payload.get("year")
+    if year_from is not None and (year is None or year < year_from):
+        return False
+    if year_to is not None and (year is None or year > year_to):
+        return False
+    return not categories or payload.get("category") in categories
+
+
+_SHARD_REFRESH_SECONDS = 10.0
+
 
 class QdrantManager:
     def __init__(self):
-        """Initialize Qdrant client and create collections."""
-        self.client = QdrantClient(
-            host=Config.QDRANT_HOST,
-            port=Config.QDRANT_PORT,
-            api_key=Config.QDRANT_API_KEY
-        )
+        """Attach to the shared Qdrant client and create collections."""
+        self.client = get_qdrant_client()
+        self.sidecar = SidecarStore()
+        self._executor = ThreadPoolExecutor(max_workers=Config.SHARD_SEARCH_THREADS)
+        self._shards: List[str] = []
+        self._shards_at = 0.0
+        self._reduced: Dict[str, str] = {}
+        self.projection = Projection.load() if Config.TWO_STAGE_SEARCH else None
         self._ensure_collections()
     
     def _ensure_collections(self):
-        """Create collections if they don't exist."""
-        collections = [c.name for c in self.client.get_collections().collections]
+        """
+        Create collections if they don't exist.
         
-        if Config.CLAIMS_COLLECTION not in collections:
-            self.client.create_collection(
-                collection_name=Config.CLAIMS_COLLECTION,
-                vectors_config=VectorParams(
-                    size=Config.EMBEDDING_DIM,
-                    distance=Distance.COSINE
-                )
-            )
-            print(f"Created collection: {Config.CLAIMS_COLLECTION}")
+        Config.CLAIMS_COLLECTION / EVIDENCE_COLLECTION are aliases pointing at
+        a physical collection per embedding model, so a re-embedded copy can
+        be swapped in atomically (see pipeline/migration.py). Deployments
+        that predate aliases keep using their plain collections.
+        """
+        collections = {c.name for c in self.client.get_collections().collections}
+        aliases = self.aliases()
         
-        if Config.EVIDENCE_COLLECTION not in collections:
+        for name in (Config.CLAIMS_COLLECTION, Config.EVIDENCE_COLLECTION):
+            if name not in collections and name not in aliases:
+                self._create_logical(name, collections)
+            
+            physical = self.resolve(name)
+            size = self.client.get_collection(physical).config.params.vectors.size
+            if size != Config.EMBEDDING_DIM:
+                print(f"⚠️  {name} -> {physical} holds {size}-d vectors but "
+                      f"EMBEDDING_DIM is {Config.EMBEDDING_DIM}; check EMBEDDING_MODEL")
+    
+    def _create_logical(self, name: str, collections=None):
+        """Create the current model's physical collection for `name` and alias it."""
+        if collections is None:
+            collections = {c.name for c in self.client.get_collections().collections}
+        physical = physical_collection_name(name, Config.EMBEDDING_MODEL)
+        if physical not in collections:
+            # With two-stage search, full evidence vectors are only read for rescoring.
+            on_disk = Config.TWO_STAGE_SEARCH and name != Config.CLAIMS_COLLECTION
+            self.create_collection(physical, Config.EMBEDDING_DIM, on_disk=on_disk)
+            print(f"Created collection: {physical}")
+        self.swap_aliases({name: physical})
+    
+    def create_collection(self, name: str, dim: int, model_name: str = None,
+                          on_disk: bool = False, **kwargs):
+        """Create a physical collection with the standard vector and payload index setup."""
+        self._register_model(name, model_name or Config.EMBEDDING_MODEL, dim)
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(
+                size=dim,
+                distance=Distance.COSINE,
+                on_disk=on_disk
+            ),
+            **kwargs
+        )
+        # paper_id backs grouped (per-paper) search; year and category back filters.
+        for field, schema in (("paper_id", PayloadSchemaType.KEYWORD),
+                              ("year", PayloadSchemaType.INTEGER),
+                              ("category", PayloadSchemaType.KEYWORD)):
+            self.client.create_payload_index(
+                collection_name=name,
+                field_name=field,
+                field_schema=schema
+            )
+    
+    def _register_model(self, name: str, model: str, dim: int):
+        """Record which embedding model a physical collection is built with."""
+        if MODEL_REGISTRY not in {c.name for c in self.client.get_collections().collections}:
             self.client.create_collection(
-                collection_name=Config.EVIDENCE_COLLECTION,
-                vectors_config=VectorParams(
-                    size=Config.EMBEDDING_DIM,
-                    distance=Distance.COSINE
-                )
+                collection_name=MODEL_REGISTRY,
+                vectors_config=VectorParams(size=1, distance=Distance.DOT)
             )
-            print(f"Created collection: {Config.EVIDENCE_COLLECTION}")
+        self.client.upsert(
+            collection_name=MODEL_REGISTRY,
+            points=Batch(ids=[point_id(name)], vectors=[[1.0]],
+                         payloads=[{"collection": name, "model": model, "dim": dim}])
+        )
     
-    def store_claims(self, claims: List[Claim]):
-        """Store claims in Qdrant."""
-        points = []
-        for claim in claims:
-            point = PointStruct(
-                id=hash(claim.claim_id) % (2**63),  # Ensure positive int
-                vector=claim.embedding,
-                payload={
-                    "claim_id": claim.claim_id,
-                    "text": claim.text,
-                    "paper_id": claim.paper_id,
-                    "paper_title": claim.paper_title,
-                    "year": claim.year,
-                    "venue": claim.venue,
-                    "section": claim.section
-                }
+    def aliases(self) -> Dict[str, str]:
+        """Alias name -> physical collection name."""
+        return {a.alias_name: a.collection_name
+                for a in self.client.get_aliases().aliases}
+    
+    def resolve(self, name: str) -> str:
+        """Physical collection behind a logical name."""
+        return self.aliases().get(name, name)
+    
+    def swap_aliases(self, mapping: Dict[str, str]):
+        """Point each alias at its collection in one atomic alias update."""
+        collections = {c.name for c in self.client.get_collections().collections}
+        for alias in mapping:
+            if alias in collections:
+                # Pre-alias deployment: the logical name is a real collection
+                # and has to go before the alias can take its name.
+                print(f"⚠️  Dropping legacy collection {alias} to replace it with an alias")
+                self.client.delete_collection(alias)
+        
+        current = self.aliases()
+        operations = []
+        for alias, collection in mapping.items():
+            if alias in current:
+                operations.append(DeleteAliasOperation(
+                    delete_alias=DeleteAlias(alias_name=alias)
+                ))
+            operations.append(CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=collection, alias_name=alias)
+            ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+    
+    def active_model(self, name: str) -> Optional[str]:
+        """Embedding model of the collection currently behind `name`, if recorded."""
+        physical = self.resolve(name)
+        if MODEL_REGISTRY in {c.name for c in self.client.get_collections().collections}:
+            points = self.client.retrieve(MODEL_REGISTRY, ids=[point_id(physical)],
+                                          with_payload=True, with_vectors=False)
+            if points:
+                return points[0].payload["model"]
+        # Collections created before the shared registry were recorded locally.
+        return self.sidecar.collection_model(physical)
+    
+    def collection_for(self, kind: str) -> str:
+        return Config.CLAIMS_COLLECTION if kind == 'claim' else Config.EVIDENCE_COLLECTION
+    
+    def evidence_shards(self, refresh: bool = False) -> List[str]:
+        """Logical evidence shard names (excluding the base collection)."""
+        now = time.monotonic()
+        if refresh or now - self._shards_at > _SHARD_REFRESH_SECONDS:
+            prefix = f"{Config.EVIDENCE_COLLECTION}_"
+            aliases = self.aliases()
+            collections = {c.name for c in self.client.get_collections().collections}
+            self._shards = sorted(name for name in set(aliases) | collections
+                                  if name.startswith(prefix) and "__" not in name)
+            self._reduced = {}
+            for name in [Config.EVIDENCE_COLLECTION] + self._shards:
+                reduced = reduced_collection_name(aliases.get(name, name))
+                if reduced in collections:
+                    self._reduced[name] = reduced
+            self._shards_at = now
+        return self._shards
+    
+    def collections_for(self, kind: str, year_from: int = None, year_to: int = None,
+                        categories: List[str] = None) -> List[str]:
+        """Logical collections holding `kind`, pruned to shards that can match the filters."""
+        if kind == 'claim':
+            return [Config.CLAIMS_COLLECTION]
+        return [Config.EVIDENCE_COLLECTION] + [
+            name for name in self.evidence_shards()
+            if shard_matches(name, year_from, year_to, categories)
+        ]
+    
+    def _route(self, batch: SentenceBatch) -> Dict[str, List[int]]:
+        """Rows of a batch grouped by the collection they are stored in."""
+        if batch.kind == 'claim' or Config.EVIDENCE_SHARDING == "none":
+            return {self.collection_for(batch.kind): list(range(len(batch)))}
+        frozen = self.sidecar.frozen()
+        by_paper = [shard_name(paper.year, paper.category) for paper in batch.papers]
+        routed = defaultdict(list)
+        late = defaultdict(list)
+        for i in range(len(batch)):
+            name = by_paper[batch.paper_index[i]]
+            (late if name in frozen else routed)[name].append(i)
+        # Frozen shards take no new writes; late arrivals land in the base collection.
+        # Points a frozen shard already holds (a re-ingest) stay there and are not copied.
+        for name, rows in late.items():
+            held = {p.id for p in self.client.retrieve(
+                name, ids=[point_id(batch.ids[i]) for i in rows],
+                with_payload=False, with_vectors=False
+            )}
+            fresh = [i for i in rows if point_id(batch.ids[i]) not in held]
+            if len(fresh) < len(rows):
+                print(f"   {len(rows) - len(fresh)} evidence statements already in "
+                      f"frozen {name}; not stored again")
+            if fresh:
+                routed[Config.EVIDENCE_COLLECTION].extend(fresh)
+        
+        existing = set(self.collections_for('evidence'))
+        for name in routed:
+            if name not in existing:
+                self._create_logical(name)
+                if self.projection is not None and self.projection.fitted \
+                        and self.projection.model == self.active_model(name):
+                    self._create_reduced(name)
+                self.evidence_shards(refresh=True)
+        return routed
+    
+    def reduced_collection(self, name: str) -> Optional[str]:
+        """First-stage companion of a logical evidence collection, if two-stage search is set up."""
+        if self.projection is None or not self.projection.fitted:
+            return None
+        self.evidence_shards()
+        return self._reduced.get(name)
+    
+    def _create_reduced(self, name: str) -> str:
+        reduced = reduced_collection_name(self.resolve(name))
+        if reduced in {c.name for c in self.client.get_collections().collections}:
+            self.client.delete_collection(reduced)
+        self.create_collection(reduced, self.projection.dim, model_name=self.projection.model)
+        return reduced
+    
+    def build_reduced(self, name: str, chunk_size: int = 1024) -> int:
+        """(Re)create the first-stage companion of an evidence collection from its stored vectors."""
+        reduced = self._create_reduced(name)
+        total = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=name,
+                limit=chunk_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
             )
-            points.append(point)
+            if points:
+                vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+                self.client.upsert(
+                    collection_name=reduced,
+                    points=Batch(
+                        ids=[point.id for point in points],
+                        vectors=self.projection.project(vectors).tolist(),
+                        payloads=[point.payload for point in points]
+                    )
+                )
+                total += len(points)
+            if offset is None:
+                break
+        self.evidence_shards(refresh=True)
+        return total
+    
+    def store_batch(self, batch: SentenceBatch, chunk_size: int = 256):
+        """Store a columnar claim/evidence batch in Qdrant, routing evidence to its shard."""
+        if not len(batch):
+            return
+        if batch.embeddings is None:
+            raise ValueError("Batch has no embeddings; call EmbeddingService.encode_batch first")
         
-        self.client.upsert(
-            collection_name=Config.CLAIMS_COLLECTION,
-            points=points
+        stored = 0
+        for collection, rows in self._route(batch).items():
+            stored += len(rows)
+            reduced = self.reduced_collection(collection) if batch.kind == 'evidence' else None
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                ids = [point_id(batch.ids[i]) for i in chunk]
+                payloads = [batch.payload(i) for i in chunk]
+                # Text and paper metadata go to the sidecar; Qdrant keeps ids and filter fields.
+                self.sidecar.put(batch.kind, zip(ids, payloads))
+                slim = [slim_payload(payload) for payload in payloads]
+                self.client.upsert(
+                    collection_name=collection,
+                    points=Batch(ids=ids, vectors=batch.embeddings[chunk].tolist(),
+                                 payloads=slim)
+                )
+                if reduced is not None:
+                    self.client.upsert(
+                        collection_name=reduced,
+                        points=Batch(ids=ids,
+                                     vectors=self.projection.project(batch.embeddings[chunk]).tolist(),
+                                     payloads=slim)
+                    )
+            POINTS_UPSERTED.inc(len(rows), collection=collection)
+        label = "claims" if batch.kind == 'claim' else "evidence statements"
+        print(f"Stored {stored} {label} in Qdrant")
+    
+    def delete_points(self, kind: str, ids: List[int]):
+        """Delete points from every collection of a kind and from the sidecar."""
+        if not ids:
+            return
+        collections = self.collections_for(kind)
+        if kind == 'evidence':
+            collections += [reduced for reduced in map(self.reduced_collection, collections)
+                            if reduced]
+        self._fan_out(collections, lambda name: self.client.delete(
+            collection_name=name,
+            points_selector=PointIdsList(points=ids)
+        ))
+        self.sidecar.delete(kind, ids)
+    
+    def freeze_shard(self, name: str):
+        """Stop routing writes to an evidence shard and compact it for read-only serving."""
+        if name not in self.evidence_shards(refresh=True):
+            raise ValueError(f"Unknown evidence shard: {name}")
+        self.sidecar.freeze(name)
+        self.client.update_collection(
+            collection_name=self.resolve(name),
+            optimizers_config=OptimizersConfigDiff(default_segment_number=1)
         )
-        print(f"Stored {len(points)} claims in Qdrant")
+        print(f"✓ Frozen {name}; the optimizer will merge it into a single indexed segment")
+    
+    def _fan_out(self, collections: List[str], fn) -> List:
+        """Run fn(collection) for each collection, in parallel when there are several."""
+        if len(collections) == 1:
+            return [fn(collections[0])]
+        return list(self._executor.map(fn, collections))
+    
+    def store_claims(self, claims: List[Claim]):
+        """Store claims in Qdrant."""
+        self.store_batch(SentenceBatch.from_models('claim', claims))
     
     def store_evidence(self, evidence_list: List[Evidence]):
         """Store evidence in Qdrant."""
-        points = []
-        for evidence in evidence_list:
-            point = PointStruct(
-                id=hash(evidence.evidence_id) % (2**63),
-                vector=evidence.embedding,
-                payload={
-                    "evidence_id": evidence.evidence_id,
-                    "text": evidence.text,
-                    "paper_id": evidence.paper_id,
-                    "paper_title": evidence.paper_title,
-                    "year": evidence.year,
-                    "venue": evidence.venue,
-                    "section": evidence.section
-                }
+        self.store_batch(SentenceBatch.from_models('evidence', evidence_list))
+    
+    def search_claims(self, query_vector: List[float], top_k: int = 10, **filters):
+        """Search for similar claims."""
+        with SEARCH_SECONDS.time(collection=Config.CLAIMS_COLLECTION):
+            return self.client.search(
+                collection_name=Config.CLAIMS_COLLECTION,
+                query_vector=query_vector,
+                query_filter=build_filter(**filters),
+                limit=top_k
             )
-            points.append(point)
+    
+    def search_evidence(self, query_vector: List[float], top_k: int = 20,
+                        with_vectors: bool = False, **filters):
+        """
+        Search for similar evidence across the shards that can match `filters`.
+        With `with_vectors` the hits carry their stored vectors (for stance
+        classification without re-embedding).
+        """
+        collections = self.collections_for('evidence', **filters)
+        query_filter = build_filter(**filters)
         
-        self.client.upsert(
-            collection_name=Config.EVIDENCE_COLLECTION,
-            points=points
-        )
-        print(f"Stored {len(points)} evidence statements in Qdrant")
+        def search(name):
+            reduced = self.reduced_collection(name)
+            if reduced is not None:
+                return self._two_stage_search(name, reduced, query_vector, query_filter,
+                                              top_k, with_vectors)
+            return self.client.search(
+                collection_name=name,
+                query_vector=query_vector,
+                query_filter=query_filter,
+                limit=top_k,
+                with_vectors=with_vectors
+            )
+        
+        with SEARCH_SECONDS.time(collection=Config.EVIDENCE_COLLECTION):
+            return _merge_hits(self._fan_out(collections, search), top_k)
     
-    def search_claims(self, query_vector: List[float], top_k: int = 10):
-        """Search for similar claims."""
-        return self.client.search(
-            collection_name=Config.CLAIMS_COLLECTION,
-            query_vector=query_vector,
-            limit=top_k
+    def _two_stage_search(self, name: str, reduced: str, query_vector: List[float],
+                          query_filter: Optional[Filter], top_k: int,
+                          with_vectors: bool = False) -> List[ScoredPoint]:
+        """Candidates from the projected companion, rescored with the full vectors."""
+        candidates = self.client.search(
+            collection_name=reduced,
+            query_vector=self.projection.project(np.asarray(query_vector)).tolist(),
+            query_filter=query_filter,
+            limit=top_k * Config.RESCORE_OVERSAMPLE,
+            with_payload=False
         )
-    
-    def search_evidence(self, query_vector: List[float], top_k: int = 20):
-        """Search for similar evidence."""
-        return self.client.search(
-            collection_name=Config.EVIDENCE_COLLECTION,
-            query_vector=query_vector,
-            limit=top_k
+        if not candidates:
+            return []
+        points = self.client.retrieve(
+            collection_name=name,
+            ids=[hit.id for hit in candidates],
+            with_payload=True,
+            with_vectors=True
         )
+        if not points:
+            return []
+        vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = (vectors @ query) / np.maximum(
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(query), 1e-12)
+        return [
+            ScoredPoint(id=points[i].id, version=0, score=float(scores[i]),
+                        payload=points[i].payload,
+                        vector=points[i].vector if with_vectors else None)
+            for i in np.argsort(-scores)[:top_k].tolist()
+        ]
+    
+    def search_claims_grouped(self, query_vector: List[float], num_papers: int = 5,
+                              per_paper: int = 3, **filters):
+        """Top papers by best claim match, each with its best `per_paper` claims."""
+        with SEARCH_SECONDS.time(collection=f"{Config.CLAIMS_COLLECTION}:grouped"):
+            return self.client.search_groups(
+                collection_name=Config.CLAIMS_COLLECTION,
+                query_vector=query_vector,
+                query_filter=build_filter(**filters),
+                group_by="paper_id",
+                limit=num_papers,
+                group_size=per_paper,
+                score_threshold=Config.SIMILARITY_THRESHOLD
+            ).groups
+    
+    def search_evidence_grouped(self, query_vector: List[float], num_papers: int = 5,
+                                per_paper: int = 3, with_vectors: bool = False, **filters):
+        """Top papers by best evidence match, each with its best `per_paper` statements."""
+        collections = self.collections_for('evidence', **filters)
+        query_filter = build_filter(**filters)
+        with SEARCH_SECONDS.time(collection=f"{Config.EVIDENCE_COLLECTION}:grouped"):
+            results = self._fan_out(collections, lambda name: self.client.search_groups(
+                collection_name=name,
+                query_vector=query_vector,
+                query_filter=query_filter,
+                group_by="paper_id",
+                limit=num_papers,
+                group_size=per_paper,
+                score_threshold=Config.SIMILARITY_THRESHOLD,
+                with_vectors=with_vectors
+            ).groups)
+        
+        hits_by_paper = defaultdict(list)
+        for groups in results:
+            for group in groups:
+                hits_by_paper[group.id].append(group.hits)
+        merged = [PointGroup(id=paper_id, hits=_merge_hits(hit_lists, per_paper))
+                  for paper_id, hit_lists in hits_by_paper.items()]
+        return heapq.nlargest(num_papers, merged, key=lambda group: group.hits[0].score)
+    
+    def fetch_points(self, kind: str, ids: List[int], with_vectors: bool = False):
+        """Fetch points (slim payload and optionally vector) by id."""
+        if not ids:
+            return []
+        results = self._fan_out(self.collections_for(kind), lambda name: self.client.retrieve(
+            collection_name=name,
+            ids=ids,
+            with_payload=True,
+            with_vectors=with_vectors
+        ))
+        points = {}
+        for found in results:
+            for point in found:
+                points.setdefault(point.id, point)
+        return list(points.values())
+    
+    def hydrate(self, kind: str, points) -> List[dict]:
+        """Full payloads for slim hits/points, read in bulk from the sidecar."""
+        rows = self.sidecar.fetch(kind, [point.id for point in points])
+        return [{**(point.payload or {}), **rows.get(point.id, {})} for point in points]
+    
+    def hydrate_hits(self, kind: str, points) -> List[Tuple[object, dict]]:
+        """
+        (point, full payload) for the points that have sentence text, either
+        from the sidecar or a pre-sidecar payload. Points the local sidecar
+        does not know (written from another host, or a lost sidecar file)
+        are dropped with a warning rather than returned without text.
+        """
+        hydrated = list(zip(points, self.hydrate(kind, points)))
+        complete = [(point, payload) for point, payload in hydrated if 'text' in payload]
+        if len(complete) < len(hydrated):
+            print(f"⚠️  {len(hydrated) - len(complete)} {kind} hits have no sidecar row; "
+                  f"skipped (re-import a snapshot or re-ingest to restore them)")
+        return complete
+    
+    def find_near_duplicates(self, kind: str, vectors: np.ndarray, threshold: float,
+                             chunk_size: int = 64) -> List[Optional[Tuple[object, str]]]:
+        """(nearest existing point, its collection) per vector if cosine >= threshold, else None."""
+        matches: List[Optional[Tuple[object, str]]] = [None] * len(vectors)
+        for collection in self.collections_for(kind):
+            for start in range(0, len(vectors), chunk_size):
+                requests = [
+                    SearchRequest(
+                        vector=vector.tolist(),
+                        limit=1,
+                        score_threshold=threshold,
+                        with_payload=["paper_id", "source_papers"]
+                    )
+                    for vector in vectors[start:start + chunk_size]
+                ]
+                results = self.client.search_batch(collection_name=collection, requests=requests)
+                for i, hits in enumerate(results, start):
+                    if hits and (matches[i] is None or hits[0].score > matches[i][0].score):
+                        matches[i] = (hits[0], collection)
+        return matches
+    
+    def search_batch(self, kind: str, vectors: np.ndarray, top_k: int,
+                     chunk_size: int = 64) -> List[List]:
+        """Top-k hits (ids and scores only) for each vector, across all shards."""
+        def search(collection):
+            results = []
+            for start in range(0, len(vectors), chunk_size):
+                requests = [
+                    SearchRequest(vector=vector.tolist(), limit=top_k, with_payload=False)
+                    for vector in vectors[start:start + chunk_size]
+                ]
+                results.extend(self.client.search_batch(collection_name=collection,
+                                                        requests=requests))
+            return results
+        
+        per_collection = self._fan_out(self.collections_for(kind), search)
+        return [_merge_hits(list(row), top_k) for row in zip(*per_collection)]
+    
+    def set_source_papers(self, kind: str, collection: str, existing_id: int,
+                          paper_ids: List[str]):
+        """Overwrite the list of papers an existing point stands for, companion and sidecar included."""
+        self.evidence_shards()
+        for name in (collection, self._reduced.get(collection)):
+            if name:
+                self.client.set_payload(
+                    collection_name=name,
+                    payload={"source_papers": paper_ids},
+                    points=[existing_id]
+                )
+        self.sidecar.set_source_papers(kind, existing_id, paper_ids)
+
+
+def _merge_hits(hit_lists: List[List], top_k: int) -> List:
+    """Heap-merge per-shard hit lists into the overall top-k, one hit per point id."""
+    best = {}
+    for hits in hit_lists:
+        for hit in hits:
+            if hit.id not in best or hit.score > best[hit.id].score:
+                best[hit.id] = hit
+    return heapq.nlargest(top_k, best.values(), key=lambda hit: hit.score)
@@ -0,0 +1,309 @@
+import json
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from config import Config
+from models.paper import Paper
+
+# Paper-level tables carried in snapshots, with the columns they are written with.
+SNAPSHOT_TABLES = {
+    "papers": ("paper_id", "title", "year", "venue", "category"),
+    "sections": ("paper_id", "section", "text"),
+    "extractions": ("paper_id", "kind", "rules_version"),
+}
+
+# Payload fields kept in Qdrant: ids plus what filters and grouping need.
+INDEX_FIELDS = ("claim_id", "evidence_id", "paper_id", "year", "section", "category",
+                "source_papers")
+
+
+def slim_payload(payload: Dict) -> Dict:
+    """Reduce a full claim/evidence payload to the fields stored in Qdrant."""
+    return {key: payload[key] for key in INDEX_FIELDS if key in payload}
+
+
+class SidecarStore:
+    """
+    Local SQLite store for sentence text and paper metadata.
+
+    Qdrant points carry only ids and filter fields; the retriever fetches
+    text, title and venue from here in bulk, and only for the hits that
+    survive thresholding.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path or Config.SIDECAR_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS papers (
+                paper_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                venue TEXT NOT NULL,
+                category TEXT
+            );
+            CREATE TABLE IF NOT EXISTS sentences (
+                kind TEXT NOT NULL,
+                point_id INTEGER NOT NULL,
+                item_id TEXT NOT NULL,
+                text TEXT NOT NULL,
+                paper_id TEXT NOT NULL,
+                section TEXT NOT NULL,
+                rules_version TEXT NOT NULL DEFAULT '',
+                sentence_hash TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (kind, point_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS sentences_paper ON sentences (paper_id);
+            CREATE TABLE IF NOT EXISTS collection_models (
+                collection TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS frozen_collections (
+                name TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS sections (
+                paper_id TEXT NOT NULL,
+                section TEXT NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (paper_id, section)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS extractions (
+                paper_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                rules_version TEXT NOT NULL,
+                PRIMARY KEY (paper_id, kind)
+            ) WITHOUT ROWID;
+        """)
+        self._add_columns("papers", {"category": "TEXT"})
+        self._add_columns("sentences", {"rules_version": "TEXT NOT NULL DEFAULT ''",
+                                        "sentence_hash": "TEXT NOT NULL DEFAULT ''",
+                                        "source_papers": "TEXT NOT NULL DEFAULT ''"})
+
+    def _add_columns(self, table: str, columns: Dict[str, str]):
+        """Upgrade a sidecar created by an older version in place."""
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+        with self.conn:
+            for name, definition in columns.items():
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+    def put(self, kind: str, rows: Iterable[Tuple[int, Dict]]):
+        """Insert or replace (point_id, full payload) rows."""
+        id_field = f"{kind}_id"
+        papers = {}
+        sentences = []
+        for pid, payload in rows:
+            papers[payload["paper_id"]] = (payload["paper_id"], payload["paper_title"],
+                                           payload["year"], payload["venue"],
+                                           payload.get("category"))
+            sources = payload.get("source_papers") or []
+            sentences.append((kind, int(pid), payload[id_field], payload["text"],
+                              payload["paper_id"], payload["section"],
+                              payload.get("rules_version", ""), payload.get("sentence_hash", ""),
+                              json.dumps(sources) if len(sources) > 1 else ""))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO papers (paper_id, title, year, venue, category) "
+                "VALUES (?, ?, ?, ?, ?)", list(papers.values())
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sentences (kind, point_id, item_id, text, paper_id, "
+                "section, rules_version, sentence_hash, source_papers) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                sentences
+            )
+
+    def fetch(self, kind: str, point_ids: List[int]) -> Dict[int, Dict]:
+        """Full payloads for the given points, keyed by point id."""
+        id_field = f"{kind}_id"
+        found = {}
+        with self._lock:
+            for start in range(0, len(point_ids), 500):
+                chunk = [int(pid) for pid in point_ids[start:start + 500]]
+                marks = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"""SELECT s.point_id, s.item_id, s.text, s.paper_id, s.section,
+                               s.source_papers, p.title, p.year, p.venue
+                        FROM sentences s JOIN papers p ON p.paper_id = s.paper_id
+                        WHERE s.kind = ? AND s.point_id IN ({marks})""",
+                    [kind, *chunk]
+                ).fetchall()
+                for pid, item_id, text, paper_id, section, sources, title, year, venue in rows:
+                    found[pid] = {
+                        id_field: item_id,
+                        "text": text,
+                        "paper_id": paper_id,
+                        "paper_title": title,
+                        "year": year,
+                        "venue": venue,
+                        "section": section
+                    }
+                    if sources:
+                        found[pid]["source_papers"] = json.loads(sources)
+        return found
+
+    def tags(self, kind: str, point_ids: List[int]) -> Dict[int, Dict]:
+        """rules_version and sentence_hash of the given points, for snapshots."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(point_ids), 500):
+                chunk = [int(pid) for pid in point_ids[start:start + 500]]
+                marks = ",".join("?" * len(chunk))
+                for pid, version, digest in self.conn.execute(
+                        f"SELECT point_id, rules_version, sentence_hash FROM sentences "
+                        f"WHERE kind = ? AND point_id IN ({marks})", [kind, *chunk]):
+                    found[pid] = {"rules_version": version, "sentence_hash": digest}
+        return found
+
+    def table_rows(self, table: str, page_size: int = 1000) -> Iterator[List[Tuple]]:
+        """Pages of rows from one of SNAPSHOT_TABLES."""
+        columns = ", ".join(SNAPSHOT_TABLES[table])
+        key = ", ".join(SNAPSHOT_TABLES[table][:2])  # unique for every table
+        offset = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT {columns} FROM {table} ORDER BY {key} LIMIT ? OFFSET ?",
+                    (page_size, offset)
+                ).fetchall()
+            if not rows:
+                return
+            yield rows
+            offset += len(rows)
+
+    def put_rows(self, table: str, rows: List[Tuple]):
+        """Insert or replace rows of one of SNAPSHOT_TABLES."""
+        columns = SNAPSHOT_TABLES[table]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})", rows
+            )
+
+    def unsectioned_papers(self, kind: str) -> int:
+        """Papers with stored sentences of `kind` but no section text to re-extract from."""
+        with self._lock:
+            return self.conn.execute(
+                """SELECT COUNT(DISTINCT paper_id) FROM sentences s WHERE kind = ?
+                   AND NOT EXISTS (SELECT 1 FROM sections t WHERE t.paper_id = s.paper_id)""",
+                (kind,)
+            ).fetchone()[0]
+
+    def delete(self, kind: str, point_ids: List[int]):
+        with self._lock, self.conn:
+            for start in range(0, len(point_ids), 500):
+                chunk = [int(pid) for pid in point_ids[start:start + 500]]
+                marks = ",".join("?" * len(chunk))
+                self.conn.execute(
+                    f"DELETE FROM sentences WHERE kind = ? AND point_id IN ({marks})",
+                    [kind, *chunk]
+                )
+
+    def scan(self, kind: str) -> Iterator[Tuple[int, str, int]]:
+        """Yield (point_id, text, year) for every stored sentence of a kind."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT s.point_id, s.text, p.year "
+                "FROM sentences s JOIN papers p ON p.paper_id = s.paper_id WHERE s.kind = ?",
+                (kind,)
+            ).fetchall()
+        yield from rows
+
+    def put_sections(self, papers: Iterable[Paper], sections: Iterable[str]):
+        """Keep the raw section text of ingested papers for later re-extraction."""
+        papers = list(papers)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO papers (paper_id, title, year, venue, category) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(p.paper_id, p.title, p.year, p.venue, p.category) for p in papers]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sections VALUES (?, ?, ?)",
+                [(p.paper_id, section, getattr(p, section))
+                 for p in papers for section in sections if getattr(p, section)]
+            )
+
+    def set_extracted(self, kind: str, paper_ids: Iterable[str], rules_version: str):
+        """Record the rule set a kind was last extracted with, per paper."""
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO extractions VALUES (?, ?, ?)",
+                                  [(paper_id, kind, rules_version) for paper_id in paper_ids])
+
+    def stale_papers(self, kind: str, rules_version: str) -> List[Paper]:
+        """Papers with stored sections that `kind` was not extracted from with this rule set."""
+        with self._lock:
+            papers = self.conn.execute(
+                """SELECT p.paper_id, p.title, p.year, p.venue, p.category FROM papers p
+                   LEFT JOIN extractions e ON e.paper_id = p.paper_id AND e.kind = ?
+                   WHERE (e.rules_version IS NULL OR e.rules_version != ?)
+                     AND EXISTS (SELECT 1 FROM sections s WHERE s.paper_id = p.paper_id)""",
+                (kind, rules_version)
+            ).fetchall()
+            sections = defaultdict(dict)
+            for start in range(0, len(papers), 500):
+                chunk = [row[0] for row in papers[start:start + 500]]
+                marks = ",".join("?" * len(chunk))
+                for paper_id, section, text in self.conn.execute(
+                        f"SELECT paper_id, section, text FROM sections "
+                        f"WHERE paper_id IN ({marks})", chunk):
+                    sections[paper_id][section] = text
+        return [Paper(paper_id=paper_id, title=title, authors=[], year=year, venue=venue,
+                      category=category, **sections[paper_id])
+                for paper_id, title, year, venue, category in papers]
+
+    def sentence_hashes(self, kind: str, paper_ids: List[str]) -> Dict[int, str]:
+        """point_id -> sentence_hash for every stored sentence of the given papers."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(paper_ids), 500):
+                chunk = paper_ids[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(self.conn.execute(
+                    f"SELECT point_id, sentence_hash FROM sentences "
+                    f"WHERE kind = ? AND paper_id IN ({marks})", [kind, *chunk]
+                ).fetchall())
+        return found
+
+    def retag(self, kind: str, point_ids: List[int], rules_version: str):
+        """Mark unchanged sentences as produced by a newer rule set."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE sentences SET rules_version = ? WHERE kind = ? AND point_id = ?",
+                [(rules_version, kind, int(pid)) for pid in point_ids]
+            )
+
+    def set_source_papers(self, kind: str, point_id: int, paper_ids: List[str]):
+        """Record the papers a merged duplicate sentence was found in."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE sentences SET source_papers = ? WHERE kind = ? AND point_id = ?",
+                (json.dumps(paper_ids), kind, int(point_id))
+            )
+
+    def set_collection_model(self, collection: str, model: str, dim: int):
+        """Record which embedding model a physical collection was built with."""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO collection_models VALUES (?, ?, ?)",
+                              (collection, model, dim))
+
+    def collection_model(self, collection: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT model FROM collection_models WHERE collection = ?", (collection,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def freeze(self, name: str):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO frozen_collections VALUES (?)", (name,))
+
+    def frozen(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT name FROM frozen_collections")}
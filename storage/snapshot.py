@@ -0,0 +1,373 @@
+"""
+Binary snapshots of the claim/evidence collections.
+
+Layout (little-endian):
+
+    b"CLMSNAP1" | uint32 version | uint16 model_len | model | uint32 num_collections
+    per collection:
+        uint16 name_len | name | uint32 dim
+        blocks: uint32 n | n * uint64 ids | n * dim * float32 vectors
+                | n * (uint32 len | JSON full payload) | uint32 crc32(block)
+        uint32 0 (end of blocks) | uint64 point count
+    uint32 num_tables
+    per sidecar table (papers, sections, extractions):
+        uint16 name_len | name
+        blocks: uint32 n | n * (uint32 len | JSON row) | uint32 crc32(block)
+        uint32 0 (end of blocks) | uint64 row count
+    sha256 of everything above (32 bytes)
+
+`model` is the embedding model the vectors were made with. Payloads carry
+each sentence's rules_version and sentence_hash, and the sidecar tables
+hold section text and extraction versions, so --reextract on the restored
+store only touches what the current rules change. Version 1 files have no
+model field; versions 1 and 2 have no sidecar tables. Points whose text is in no sidecar are left out on
+export; every record must carry the full sidecar payload to be restored.
+"""
+import hashlib
+import json
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+import numpy as np
+from qdrant_client.models import Batch, OptimizersConfigDiff
+from config import Config
+from storage.projection import reduced_collection_name
+from storage.qdrant_manager import QdrantManager, physical_collection_name
+from storage.sidecar import SNAPSHOT_TABLES, slim_payload
+
+MAGIC = b"CLMSNAP1"
+VERSION = 3
+BLOCK_SIZE = 1024
+# What sidecar.put and the BM25 index need from every record, besides the id field.
+_RECORD_FIELDS = ("text", "paper_id", "paper_title", "year", "venue", "section")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _HashingWriter:
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.sha = hashlib.sha256()
+
+    def write(self, data: bytes):
+        self.sha.update(data)
+        self.f.write(data)
+
+
+class _HashingReader:
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.sha = hashlib.sha256()
+
+    def read(self, size: int) -> bytes:
+        data = self.f.read(size)
+        if len(data) != size:
+            raise SnapshotError("Snapshot is truncated")
+        self.sha.update(data)
+        return data
+
+    def unpack(self, fmt: str):
+        return struct.unpack(fmt, self.read(struct.calcsize(fmt)))
+
+
+def _collections(qdrant: QdrantManager) -> List[str]:
+    """Claims, the base evidence collection and every evidence shard."""
+    return qdrant.collections_for('claim') + qdrant.collections_for('evidence')
+
+
+def _kind(collection: str) -> str:
+    return 'claim' if collection == Config.CLAIMS_COLLECTION else 'evidence'
+
+
+def export_snapshot(qdrant: QdrantManager, path: str) -> Dict[str, int]:
+    """Stream the collections and sidecar tables into a snapshot file; returns point counts."""
+    counts = {}
+    with open(path, "wb") as f:
+        out = _HashingWriter(f)
+        collections = _collections(qdrant)
+        model = qdrant.active_model(Config.CLAIMS_COLLECTION) or Config.EMBEDDING_MODEL
+        model = model.encode("utf-8")
+        out.write(MAGIC + struct.pack("<IH", VERSION, len(model)) + model
+                  + struct.pack("<I", len(collections)))
+        for name in collections:
+            info = qdrant.client.get_collection(name)
+            dim = info.config.params.vectors.size
+            encoded = name.encode("utf-8")
+            out.write(struct.pack("<H", len(encoded)) + encoded + struct.pack("<I", dim))
+
+            total = skipped = 0
+            offset = None
+            while True:
+                points, offset = qdrant.client.scroll(
+                    collection_name=name,
+                    limit=BLOCK_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                complete = qdrant.hydrate_hits(_kind(name), points) if points else []
+                skipped += len(points) - len(complete)
+                if complete:
+                    tags = qdrant.sidecar.tags(_kind(name), [point.id for point, _ in complete])
+                    complete = [(point, {**payload, **tags.get(point.id, {})})
+                                for point, payload in complete]
+                    out.write(_encode_block([point for point, _ in complete],
+                                            [payload for _, payload in complete], dim))
+                    total += len(complete)
+                if offset is None:
+                    break
+            out.write(struct.pack("<IQ", 0, total))
+            counts[name] = total
+            print(f"   ✓ {name}: {total} points")
+            if skipped:
+                print(f"⚠️  {name}: {skipped} points without sidecar text left out")
+
+        out.write(struct.pack("<I", len(SNAPSHOT_TABLES)))
+        for table in SNAPSHOT_TABLES:
+            encoded = table.encode("utf-8")
+            out.write(struct.pack("<H", len(encoded)) + encoded)
+            total = 0
+            for rows in qdrant.sidecar.table_rows(table):
+                out.write(_encode_rows(rows))
+                total += len(rows)
+            out.write(struct.pack("<IQ", 0, total))
+            print(f"   ✓ sidecar {table}: {total} rows")
+        f.write(out.sha.digest())
+    return counts
+
+
+def _encode_block(points, payloads: List[Dict], dim: int) -> bytes:
+    ids = np.fromiter((p.id for p in points), dtype="<u8", count=len(points))
+    vectors = np.asarray([p.vector for p in points], dtype="<f4").reshape(len(points), dim)
+    records = []
+    for payload in payloads:
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        records.append(struct.pack("<I", len(data)))
+        records.append(data)
+    body = ids.tobytes() + vectors.tobytes() + b"".join(records)
+    return struct.pack("<I", len(points)) + body + struct.pack("<I", zlib.crc32(body))
+
+
+def _encode_rows(rows: List[Tuple]) -> bytes:
+    records = []
+    for row in rows:
+        data = json.dumps(list(row), separators=(",", ":")).encode("utf-8")
+        records.append(struct.pack("<I", len(data)))
+        records.append(data)
+    body = b"".join(records)
+    return struct.pack("<I", len(rows)) + body + struct.pack("<I", zlib.crc32(body))
+
+
+def _read_records(reader: _HashingReader, n: int) -> List[bytes]:
+    records = []
+    for _ in range(n):
+        (length,) = reader.unpack("<I")
+        records.append(struct.pack("<I", length) + reader.read(length))
+    return records
+
+
+def _read_snapshot(f: BinaryIO) -> Iterator[Tuple[str, int, object]]:
+    """
+    Yield a ("model", version, model or None) event, then ("collection",
+    dim, name), ("block", dim, (ids, vectors, payloads)) and ("end", count,
+    name) events, then ("rows", 0, (table, rows)) and ("table", count,
+    table) events, verifying every block CRC and the trailing SHA-256.
+    """
+    reader = _HashingReader(f)
+    if reader.read(len(MAGIC)) != MAGIC:
+        raise SnapshotError("Not a claim/evidence snapshot")
+    (version,) = reader.unpack("<I")
+    if version not in (1, 2, VERSION):
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    model = None
+    if version >= 2:
+        (model_len,) = reader.unpack("<H")
+        model = reader.read(model_len).decode("utf-8")
+    (num_collections,) = reader.unpack("<I")
+    yield "model", version, model
+
+    for _ in range(num_collections):
+        (name_len,) = reader.unpack("<H")
+        name = reader.read(name_len).decode("utf-8")
+        (dim,) = reader.unpack("<I")
+        yield "collection", dim, name
+
+        total = 0
+        while True:
+            (n,) = reader.unpack("<I")
+            if n == 0:
+                break
+            ids_bytes = reader.read(n * 8)
+            vector_bytes = reader.read(n * dim * 4)
+            records = _read_records(reader, n)
+            (crc,) = reader.unpack("<I")
+            body = ids_bytes + vector_bytes + b"".join(records)
+            if zlib.crc32(body) != crc:
+                raise SnapshotError(f"Checksum mismatch in block of {name}")
+            ids = np.frombuffer(ids_bytes, dtype="<u8")
+            vectors = np.frombuffer(vector_bytes, dtype="<f4").reshape(n, dim)
+            payloads = [json.loads(record[4:]) for record in records]
+            _check_records(name, ids, payloads)
+            total += n
+            yield "block", dim, (ids, vectors, payloads)
+
+        (count,) = reader.unpack("<Q")
+        if count != total:
+            raise SnapshotError(f"{name}: header says {count} points, found {total}")
+        yield "end", count, name
+
+    (num_tables,) = reader.unpack("<I") if version >= 3 else (0,)
+    for _ in range(num_tables):
+        (name_len,) = reader.unpack("<H")
+        table = reader.read(name_len).decode("utf-8")
+        if table not in SNAPSHOT_TABLES:
+            raise SnapshotError(f"Unknown sidecar table {table}")
+        total = 0
+        while True:
+            (n,) = reader.unpack("<I")
+            if n == 0:
+                break
+            records = _read_records(reader, n)
+            (crc,) = reader.unpack("<I")
+            if zlib.crc32(b"".join(records)) != crc:
+                raise SnapshotError(f"Checksum mismatch in block of sidecar {table}")
+            total += n
+            yield "rows", 0, (table, [tuple(json.loads(record[4:])) for record in records])
+        (count,) = reader.unpack("<Q")
+        if count != total:
+            raise SnapshotError(f"sidecar {table}: header says {count} rows, found {total}")
+        yield "table", count, table
+
+    digest = f.read(32)
+    if digest != reader.sha.digest():
+        raise SnapshotError("Snapshot SHA-256 mismatch")
+
+
+def _check_records(name: str, ids: np.ndarray, payloads: List[Dict]):
+    """Refuse records that sidecar.put or the BM25 index could not load."""
+    fields = (f"{_kind(name)}_id",) + _RECORD_FIELDS
+    for pid, payload in zip(ids.tolist(), payloads):
+        missing = [field for field in fields if field not in payload]
+        if missing:
+            raise SnapshotError(f"{name}: point {pid} has no {', '.join(missing)}; "
+                                f"re-export it from a store whose sidecar has its text")
+
+
+def verify_snapshot(path: str) -> Dict[str, int]:
+    """Check all checksums and records without loading anything; returns point counts."""
+    counts = {}
+    with open(path, "rb") as f:
+        for event, value, data in _read_snapshot(f):
+            if event == "end":
+                counts[data] = value
+    return counts
+
+
+def restore_snapshot(qdrant: QdrantManager, path: str, recreate: bool = False,
+                     bm25=None, parallel: int = 4) -> Dict[str, int]:
+    """
+    Bulk-load a snapshot into the store.
+
+    The file is verified first, records included, so an incomplete snapshot
+    is refused before anything is replaced. Each collection is created with indexing
+    disabled, filled with parallel un-awaited upserts, then re-indexed and
+    its point count checked against the snapshot. Collections are created
+    and recorded for the model named in the snapshot, so a running
+    retriever switches its query embedder to it, as after a migration.
+    Two-stage search companions of replaced evidence collections are
+    dropped, and rebuilt if the saved projection is for the same model.
+    Sentence rule tags, section text and extraction versions go back into
+    the sidecar.
+    """
+    expected = verify_snapshot(path)
+    existing = {c.name for c in qdrant.client.get_collections().collections} | set(qdrant.aliases())
+    for name in expected:
+        if name in existing and qdrant.client.count(name, exact=True).count and not recreate:
+            raise SnapshotError(f"{name} is not empty; pass recreate=True to replace it")
+
+    with open(path, "rb") as f, ThreadPoolExecutor(max_workers=parallel) as pool:
+        futures = []
+        name = model = None
+        for event, value, data in _read_snapshot(f):
+            if event == "model":
+                model = data
+                if value < 3:
+                    print(f"⚠️  Version {value} snapshot has no section text; --reextract "
+                          f"skips its papers until they are re-ingested")
+                if model is None:
+                    model = Config.EMBEDDING_MODEL
+                    print(f"⚠️  Snapshot does not record its embedding model; assuming {model}")
+                elif model != Config.EMBEDDING_MODEL:
+                    print(f"⚠️  Snapshot vectors are from {model}, not EMBEDDING_MODEL "
+                          f"{Config.EMBEDDING_MODEL}; ingest with EMBEDDING_MODEL={model}")
+            elif event == "collection":
+                name = data
+                previous = qdrant.resolve(name)
+                physical = physical_collection_name(name, model)
+                # Companions index the replaced points; first-stage hits would miss.
+                for stale in {previous, physical}:
+                    qdrant.client.delete_collection(reduced_collection_name(stale))
+                qdrant.client.delete_collection(physical)
+                qdrant.create_collection(
+                    physical, value, model_name=model,
+                    optimizers_config=OptimizersConfigDiff(indexing_threshold=0)
+                )
+                qdrant.swap_aliases({name: physical})
+                if previous not in (name, physical):
+                    # Replaced data of another model: its collection is no longer aliased.
+                    qdrant.client.delete_collection(previous)
+            elif event == "block":
+                ids, vectors, payloads = data
+                kind = _kind(name)
+                qdrant.sidecar.put(kind, zip(ids.tolist(), payloads))
+                futures.append(pool.submit(
+                    qdrant.client.upsert,
+                    collection_name=name,
+                    points=Batch(ids=ids.tolist(), vectors=vectors.tolist(),
+                                 payloads=[slim_payload(payload) for payload in payloads]),
+                    wait=False
+                ))
+                if bm25 is not None:
+                    bm25.add_documents(kind, [(int(pid), payload['text'])
+                                              for pid, payload in zip(ids, payloads)])
+            elif event == "end":
+                for future in futures:
+                    future.result()
+                futures = []
+                _wait_for_count(qdrant, name, value)
+                qdrant.client.update_collection(
+                    collection_name=physical,
+                    optimizers_config=OptimizersConfigDiff(indexing_threshold=20000)
+                )
+            elif event == "rows":
+                qdrant.sidecar.put_rows(*data)
+            elif event == "table":
+                print(f"   ✓ sidecar {data}: {value} rows")
+
+    qdrant._ensure_collections()
+    qdrant.evidence_shards(refresh=True)
+    for name, count in expected.items():
+        stored = qdrant.client.count(name, exact=True).count
+        if stored != count:
+            raise SnapshotError(f"{name}: restored {stored} points, snapshot has {count}")
+        print(f"   ✓ {name}: {stored} points")
+
+    projection = qdrant.projection
+    if projection is not None and projection.fitted and projection.model == model:
+        for name in expected:
+            if _kind(name) == 'evidence':
+                print(f"   ✓ {name}: {qdrant.build_reduced(name)} points projected")
+    return expected
+
+
+def _wait_for_count(qdrant: QdrantManager, name: str, count: int, timeout: float = 120.0):
+    """Un-awaited upserts are acknowledged before they are applied; wait for them."""
+    deadline = time.monotonic() + timeout
+    while qdrant.client.count(name, exact=True).count < count:
+        if time.monotonic() > deadline:
+            break
+        time.sleep(0.2)